@@ -5,7 +5,10 @@ Denna fil definierar vilka klasser som innehåller elever från flera årskurser
 och hur eleverna ska kategoriseras baserat på personnummer.
 """
 
-from typing import Dict, List, Tuple
+import hashlib
+import json
+import re
+from typing import Dict, List, Optional, Tuple
 
 # Blandklasser: klassnamn -> (årskurs_mappning)
 # Format: {
@@ -37,6 +40,85 @@ BLANDKLASSER_CONFIG: Dict[str, Dict] = {
 }
 
 
+def få_avtryck() -> str:
+    """
+    Hash av ``BLANDKLASSER_CONFIG``.
+
+    Årskursen i cachade tabeller beror på konfigurationen, så hashen ingår i
+    cachens nyckel: ändras konfigurationen tolkas skolfilerna om.
+    """
+    text = json.dumps(BLANDKLASSER_CONFIG, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class BlandklassMatcher:
+    """
+    Förkompilerad matchning av klassnamn mot ``BLANDKLASSER_CONFIG``.
+
+    Alla konfigurerade namn slås ihop till ett reguljärt uttryck så att ett
+    klassnamn bara behöver genomsökas en gång, oavsett antal blandklasser.
+    Samma regler som tidigare gäller: exakt matchning först, annars det första
+    konfigurerade namnet (i konfigurationens ordning) som ingår i klassnamnet,
+    utan hänsyn till versaler/gemener.
+    """
+
+    def __init__(self, config: Dict[str, Dict]):
+        self.config = config
+        self.namn = list(config.keys())
+        self._gemener = [namn.lower() for namn in self.namn]
+        # En grupp per namn i en lookahead, så att överlappande träffar också hittas.
+        # Vid varje position vinner första alternativet, och den lägsta gruppen
+        # över alla positioner motsvarar det första namnet i konfigurationen.
+        if self.namn:
+            alternativ = "|".join(f"({re.escape(namn)})" for namn in self._gemener)
+            self._monster = re.compile(f"(?=(?:{alternativ}))")
+        else:
+            self._monster = None
+
+    def hitta(self, klassnamn: str) -> Optional[str]:
+        """
+        Hitta det konfigurerade blandklassnamn som klassnamnet matchar.
+
+        Returns:
+            Nyckeln i ``BLANDKLASSER_CONFIG`` eller None om klassen inte är en blandklass
+        """
+        if not isinstance(klassnamn, str):
+            return None
+        klassnamn = klassnamn.strip()
+        if klassnamn in self.config:
+            return klassnamn
+        if self._monster is None:
+            return None
+        grupper = [m.lastindex for m in self._monster.finditer(klassnamn.lower()) if m.lastindex]
+        if not grupper:
+            return None
+        return self.namn[min(grupper) - 1]
+
+    def årskurs(self, config_klass: str, personnummer: str) -> Optional[str]:
+        """Årskurs för en elev i den angivna blandklassen (nyckel från ``hitta``)."""
+        if not isinstance(personnummer, str):
+            return None
+        personnummer = personnummer.strip()
+        if len(personnummer) < 2:
+            return None
+        return self.config[config_klass].get("födelseår_mappning", {}).get(personnummer[:2])
+
+
+_MATCHER: Optional[BlandklassMatcher] = None
+
+
+def få_matcher() -> BlandklassMatcher:
+    """
+    Den kompilerade matchern för ``BLANDKLASSER_CONFIG``.
+
+    Byggs en gång och byggs om bara om konfigurationen har ändrats.
+    """
+    global _MATCHER
+    if _MATCHER is None or _MATCHER.namn != list(BLANDKLASSER_CONFIG.keys()):
+        _MATCHER = BlandklassMatcher(BLANDKLASSER_CONFIG)
+    return _MATCHER
+
+
 def är_blandklass(klassnamn: str) -> bool:
     """
     Kontrollera om en klass är en blandklass.
@@ -47,22 +129,7 @@ def är_blandklass(klassnamn: str) -> bool:
     Returns:
         True om klassen är definierad som blandklass, annars False
     """
-    if not isinstance(klassnamn, str):
-        return False
-    
-    # Trimma och normalisera klassnamnet
-    klassnamn = klassnamn.strip()
-    
-    # Exakt matchning
-    if klassnamn in BLANDKLASSER_CONFIG:
-        return True
-    
-    # Kontrollera även om klassnamnet innehåller någon av de konfigurerade namnen
-    for config_klass in BLANDKLASSER_CONFIG.keys():
-        if config_klass.lower() in klassnamn.lower():
-            return True
-    
-    return False
+    return få_matcher().hitta(klassnamn) is not None
 
 
 def få_årskurs_för_blandklass(klassnamn: str, personnummer: str) -> str:
@@ -79,34 +146,13 @@ def få_årskurs_för_blandklass(klassnamn: str, personnummer: str) -> str:
     if not isinstance(klassnamn, str) or not isinstance(personnummer, str):
         return None
     
-    klassnamn = klassnamn.strip()
-    personnummer = str(personnummer).strip()
-    
-    # Hitta matchande konfiguration
-    config = None
-    if klassnamn in BLANDKLASSER_CONFIG:
-        config = BLANDKLASSER_CONFIG[klassnamn]
-    else:
-        # Försök hitta genom partiell matchning
-        for config_klass, conf in BLANDKLASSER_CONFIG.items():
-            if config_klass.lower() in klassnamn.lower():
-                config = conf
-                break
-    
-    if not config:
-        return None
-    
-    # Extrahera födelseår (första två siffrorna i personnumret)
-    if len(personnummer) < 2:
+    matcher = få_matcher()
+    config_klass = matcher.hitta(klassnamn)
+    if config_klass is None:
         return None
     
-    födelseår_kort = personnummer[:2]
-    
-    # Slå upp i mappningen
-    födelseår_mappning = config.get("födelseår_mappning", {})
-    årskurs = födelseår_mappning.get(födelseår_kort)
-    
-    return årskurs
+    # Födelseår = första två siffrorna i personnumret
+    return matcher.årskurs(config_klass, personnummer)
 
 
 def få_alla_blandklasser() -> List[str]:
@@ -129,12 +175,7 @@ def få_blandklass_info(klassnamn: str) -> Dict:
     Returns:
         Dictionary med konfiguration eller None om klassen inte finns
     """
-    if klassnamn in BLANDKLASSER_CONFIG:
-        return BLANDKLASSER_CONFIG[klassnamn]
-    
-    # Försök partiell matchning
-    for config_klass, conf in BLANDKLASSER_CONFIG.items():
-        if config_klass.lower() in klassnamn.lower():
-            return conf
-    
-    return None
+    config_klass = få_matcher().hitta(klassnamn)
+    if config_klass is None:
+        return None
+    return BLANDKLASSER_CONFIG[config_klass]
@@ -0,0 +1,197 @@
+"""
+Analys av tolkad frånvarodata: rensning, årskurs och procent.
+
+Används både av ``skript works.py`` (läser franvaro.xls) och av
+``pipeline.py`` (tar raderna direkt från insamlingen utan mellanfil).
+"""
+import os
+import re
+import sys
+from typing import Optional
+import numpy as np
+import pandas as pd
+import matning
+from config_paths import LASAR
+from elever import elevnycklar, fodelsear, lasarets_referensar
+from avkodning import avkoda, avkoda_matt, tolka_procent
+from schema import kompaktera
+
+# Importera blandklass-konfiguration (projektroten behöver bara läggas till
+# sökvägen när modulen körs utan franvaro-kommandot)
+try:
+    from config.blandklasser_config import få_matcher
+except ImportError:
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+    from config.blandklasser_config import få_matcher
+
+_SIFFRA = re.compile(r"\d")
+
+
+def convert_percent(col: pd.Series) -> pd.Series:
+    return avkoda(col, tolka_procent)
+
+
+def _blandklass_for(klass: str, skola: str = None) -> Optional[str]:
+    """
+    Konfigurerad blandklass som klassen matchar.
+
+    Prova först bara klassnamnet, sedan kombinerat med skola ("skola klass" och "skola-klass").
+    """
+    matcher = få_matcher()
+    klass_att_testa = [klass]
+    if skola and isinstance(skola, str):
+        skola_clean = skola.strip()
+        klass_att_testa.append(f"{skola_clean} {klass}")
+        klass_att_testa.append(f"{skola_clean}-{klass}")
+
+    for test_klass in klass_att_testa:
+        config_klass = matcher.hitta(test_klass)
+        if config_klass is not None:
+            return config_klass
+    return None
+
+
+def _arskurs_fran_klassnamn(klass: str) -> Optional[str]:
+    """Årskurs ur klassnamnet (AGSÄ-klasser som de är, annars första siffran)."""
+    # Specialfall: AGSÄ
+    if klass.lower().startswith("agsä"):
+        return klass
+
+    # Hitta första siffran i klassnamnet
+    match = _SIFFRA.search(klass)
+    if match:
+        return f"Åk {match.group()}"
+    return None
+
+
+def _varna_okand_klass(klass: str, skola: str):
+    print(f"⚠️ Kunde inte bestämma årskurs för klass '{klass}' (skola: '{skola}').")
+
+
+def extrahera_arskurs(klass: str, personnummer: str = None, skola: str = None) -> str:
+    """
+    Extrahera årskurs från klassnamn. Hanterar specialfall som blandklasser.
+    
+    Args:
+        klass: Klassnamn (t.ex. "1-2", "5A", "Åk 7")
+        personnummer: Personnummer för att bestämma årskurs i blandklasser
+        skola: Skolnamn (t.ex. "rörvik") för att kombinera med klass vid blandklasser
+        
+    Returns:
+        Årskurs som sträng (t.ex. "Åk 1", "Åk 2", "Åk F")
+    """
+    if not isinstance(klass, str):
+        return "Åk F"
+    
+    klass = klass.strip()
+    
+    # Blandklass: årskurs från födelseåret i personnumret
+    config_klass = _blandklass_for(klass, skola)
+    ar = fodelsear(personnummer) if config_klass is not None and personnummer else None
+    if ar is not None:
+        # Konfigurationen anger födelseåret med två siffror
+        årskurs = få_matcher().årskurs(config_klass, f"{ar % 100:02d}")
+        if årskurs:
+            return årskurs
+    # Om personnummer saknas eller årskurs inte kunde bestämmas,
+    # försök extrahera från klassnamnet som vanligt
+    årskurs = _arskurs_fran_klassnamn(klass)
+    if årskurs is None:
+        # Om ingen logik matchar, logga klassnamnet för felsökning
+        _varna_okand_klass(klass, skola)
+        return "Åk F"
+    return årskurs
+
+
+def bestam_arskurser(df: pd.DataFrame) -> pd.Series:
+    """
+    Årskurs för varje elev, kolumnvis (samma regler som ``extrahera_arskurs``).
+
+    Klassnamnet tolkas en gång per unik (skola, klass), och födelseåret (kolumnen
+    ``födelseår``, annars tolkat ur personnumret) används bara för elever i
+    blandklasser. Varningar för klasser som inte kan tolkas skrivs ut en gång per klass.
+
+    Returns:
+        Series med årskurs, samma index som ``df``
+    """
+    if df.empty:
+        return pd.Series(index=df.index, dtype=object)
+
+    matcher = få_matcher()
+    koder, par = pd.factorize(pd.MultiIndex.from_arrays([df["skola"], df["klass"]]))
+
+    fran_namn = []
+    blandklass = []
+    for skola, klass in par:
+        if not isinstance(klass, str):
+            fran_namn.append("Åk F")
+            blandklass.append(None)
+            continue
+        klass = klass.strip()
+        fran_namn.append(_arskurs_fran_klassnamn(klass))
+        blandklass.append(_blandklass_for(klass, skola))
+
+    arskurs = pd.Series(np.array(fran_namn, dtype=object)[koder], index=df.index, dtype=object)
+
+    # Blandklasser: födelseår (två sista siffrorna, som i konfigurationen) -> årskurs
+    if any(config_klass is not None for config_klass in blandklass):
+        fodelsear = df["födelseår"] if "födelseår" in df else elevnycklar(df["personnr"])["födelseår"]
+    for nr, config_klass in enumerate(blandklass):
+        if config_klass is None:
+            continue
+        ar = fodelsear[koder == nr].dropna()
+        mappning = matcher.config[config_klass].get("födelseår_mappning", {})
+        fran_personnr = (ar.astype(int) % 100).map(lambda ar: f"{ar:02d}").map(mappning)
+        fran_personnr = fran_personnr[fran_personnr.notna() & (fran_personnr != "")]
+        arskurs.loc[fran_personnr.index] = fran_personnr
+
+    # Klasser som varken gick att tolka via namn eller personnummer
+    okanda = arskurs.isna().to_numpy()
+    for nr in np.unique(koder[okanda]):
+        skola, klass = par[nr]
+        _varna_okand_klass(klass.strip(), skola)
+    arskurs[okanda] = "Åk F"
+
+    return arskurs
+
+
+def rensa_franvaro(df: pd.DataFrame, lasar: str = LASAR) -> pd.DataFrame:
+    """
+    Rensa tolkade elevrader och lägg till årskurs och procentkolumner.
+
+    Args:
+        df: Tabell från ``tolkning.tolka_franvaro``
+        lasar: Läsåret som exporten gäller; avgör seklet för tiosiffriga personnummer
+
+    Returns:
+        Rensad tabell i det kompakta formatet (``schema.KOLUMNER``): med ``årskurs``
+        och exportens minuter och procent även som tal
+    """
+    # Ta bort rader där personnr är tom eller där rubriker läckt med
+    df = df[
+        df["personnr"].notna() &
+        ~df["personnr"].astype(str).str.lower().str.contains("personnr|namn|undv_tid")
+    ].copy()
+
+    # Personnumret tolkas en gång: heltalsnyckel och födelseår (elever.py)
+    with matning.steg("elevnycklar") as post:
+        post["rader"] = len(df)
+        nycklar = elevnycklar(df["personnr"], lasarets_referensar(lasar))
+        df["elev_id"] = nycklar["elev_id"]
+        df["födelseår"] = nycklar["födelseår"]
+
+    # Extrahera årskurs med hänsyn till blandklasser och födelseår
+    with matning.steg("arskurs") as post:
+        post["rader"] = len(df)
+        df["årskurs"] = bestam_arskurser(df)
+
+    # Minuter och procent som tal; varje olika värde tolkas en gång (avkodning.py)
+    with matning.steg("avkodning") as post:
+        post["rader"] = len(df)
+        for kol, tal in avkoda_matt(df).items():
+            df[kol] = tal
+
+    # Ta bort helt tomma mätvärden (om båda är NaN)
+    df = df[~(df["närvaro_pct"].isna() & df["ogiltig_frånvaro_pct"].isna())]
+    return kompaktera(df)
+
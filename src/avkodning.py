@@ -0,0 +1,76 @@
+"""
+Typad avkodning av mätvärdena: minuter och procent som tal.
+
+Efter insamlingen är varje cell text (``str(cell)``), och samma värden upprepas
+för många elever: "100 %", "0,0 %" och klassens lektionstid. I stället för att
+köra strängoperationer över hela kolumnen faktoriseras den (``pd.factorize``),
+varje unikt värde tolkas en gång och talen läggs tillbaka på raderna med en
+uppslagning i arrayen (``np.take``). Arbetet per rad blir en heltalsuppslagning;
+texttolkningen växer bara med antalet olika värden.
+
+Svenska format som förstås:
+- decimalkomma ("12,5")
+- mellanslag och hårt mellanslag (U+00A0) som tusentalsavgränsare eller före "%"
+- procenttecken ("97 %"); för procent tas det första talet i cellen, som tidigare
+
+Celler som inte går att tolka blir NaN.
+"""
+import math
+import re
+from typing import Callable, Dict
+
+import numpy as np
+import pandas as pd
+from schema import RAA_MINUTKOLUMNER, RAA_PROCENTKOLUMNER
+
+_PROCENTTAL = re.compile(r"\d+\.?\d*")
+
+
+def tolka_minuter(varde) -> float:
+    """Ett minutvärde som tal ("1 234" -> 1234.0, "12,5" -> 12.5)."""
+    if isinstance(varde, (int, float, np.number)) and not isinstance(varde, bool):
+        return float(varde)
+    text = str(varde).replace("\xa0", "").replace(" ", "").replace(",", ".")
+    try:
+        return float(text)
+    except ValueError:
+        return math.nan
+
+
+def tolka_procent(varde) -> float:
+    """Ett procentvärde som tal: första talet efter att "%", hårda mellanslag och decimalkomma rensats."""
+    text = str(varde).replace("%", "").replace(",", ".").replace("\xa0", "")
+    traff = _PROCENTTAL.search(text)
+    return float(traff.group()) if traff else math.nan
+
+
+def avkoda(col: pd.Series, tolka: Callable[[object], float]) -> pd.Series:
+    """
+    Tolka en kolumn genom att tolka varje unikt värde en gång.
+
+    Args:
+        col: Kolumn med värden som de står i exporten
+        tolka: Tolkning av ett enskilt värde (t.ex. ``tolka_procent``)
+
+    Returns:
+        float64-kolumn med samma index och namn; saknade och otolkbara värden blir NaN
+    """
+    koder, unika = pd.factorize(col, use_na_sentinel=True)
+    # Saknade värden har koden -1, som pekar på NaN-platsen sist i arrayen
+    tal = np.empty(len(unika) + 1, dtype=np.float64)
+    tal[:-1] = [tolka(v) for v in unika]
+    tal[-1] = np.nan
+    return pd.Series(np.take(tal, koder), index=col.index, name=col.name)
+
+
+def avkoda_matt(df: pd.DataFrame) -> Dict[str, pd.Series]:
+    """
+    Alla exportens mätvärden som tal.
+
+    Returns:
+        {kolumn: float64-kolumn} under namnen i ``schema.RAA_MINUTKOLUMNER`` och
+        ``schema.RAA_PROCENTKOLUMNER`` (t.ex. ``n_min`` -> ``närvaro_min``, ``n_pct`` -> ``närvaro_pct``)
+    """
+    ut = {kol: avkoda(df[raa], tolka_minuter) for raa, kol in RAA_MINUTKOLUMNER.items()}
+    ut.update({kol: avkoda(df[raa], tolka_procent) for raa, kol in RAA_PROCENTKOLUMNER.items()})
+    return ut
@@ -0,0 +1,139 @@
+"""
+Batchkörning över flera läsår och jämförelse mellan åren.
+
+Hittar alla ``data/raw/franvaro/<YYYY-YYYY>``-mappar, kör hela flödet för varje
+läsår parallellt (en process per läsår) och skriver varje års rapport till sin
+egen ``data/output/<läsår>/``. Till sist skapas en jämförelsefil med antal per
+kategori, skola och årskurs sida vid sida för alla läsår.
+
+Användning:
+    python batch_lasar.py                         # alla läsår som har rådata
+    python batch_lasar.py 2023-2024 2024-2025     # bara valda läsår
+"""
+import argparse
+import io
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pandas as pd
+from openpyxl import Workbook
+from config_paths import (
+    OUTPUT_DIR, hitta_lasar, output_franvaro_dir, processed_franvaro_dir, raw_franvaro_dir
+)
+from bevakning import bygglas
+from pipeline import kor_pipeline
+from rapport import skriv_tabell_blad
+from summering import KUB_FILNAMN, SUMMERING_KOLUMNER, Kub
+
+JAMFORELSE_FILNAMN = "jamforelse_lasar.xlsx"
+
+
+def kor_lasar(lasar: str) -> tuple:
+    """
+    Kör hela flödet för ett läsår med läsårets egna mappar.
+
+    Returns:
+        (läsår, antal per (skola, årskurs) eller None om inga datarader, körningslogg)
+    """
+    output_mapp = output_franvaro_dir(lasar)
+    output_mapp.mkdir(parents=True, exist_ok=True)
+
+    cache_mapp = processed_franvaro_dir(lasar)
+    logg = io.StringIO()
+    # Samma lås som franvaro all/watch: ett pågående bygge av läsåret hinner klart först
+    with redirect_stdout(logg), bygglas(cache_mapp):
+        df = kor_pipeline(
+            indata_mapp=raw_franvaro_dir(lasar),
+            output_mapp=output_mapp,
+            cache_mapp=cache_mapp,
+            lasar=lasar,
+        )
+    # Kuben som körningen sparade räcker, elevraderna behöver inte gås igenom igen
+    antal = None if df.empty else Kub.las(output_mapp / KUB_FILNAMN).oversikt(["skola", "årskurs"])
+    return lasar, antal, logg.getvalue()
+
+
+def bygg_jamforelse(antal_per_lasar: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+    """
+    Ställ läsårens antal sida vid sida.
+
+    Returns:
+        {"Kommun": per årskurs, "Per skola": per (skola, årskurs)}. Kolumnerna är
+        "<kategori> <läsår>" grupperade per kategori; saknade kombinationer blir 0.
+    """
+    lasar = sorted(antal_per_lasar)
+    alla = pd.concat({ar: antal_per_lasar[ar] for ar in lasar}, names=["läsår"])
+
+    def sida_vid_sida(antal: pd.DataFrame) -> pd.DataFrame:
+        bred = antal.unstack("läsår", fill_value=0)
+        bred = bred.reindex(
+            columns=pd.MultiIndex.from_product([SUMMERING_KOLUMNER, lasar]), fill_value=0
+        )
+        bred.columns = [f"{kat} {ar}" for kat, ar in bred.columns]
+        return bred.sort_index().reset_index()
+
+    per_skola = sida_vid_sida(alla.reorder_levels(["skola", "årskurs", "läsår"]))
+    kommun = sida_vid_sida(alla.groupby(level=["årskurs", "läsår"]).sum())
+    return {"Kommun": kommun, "Per skola": per_skola}
+
+
+def kor_alla_lasar(
+    lasar: Optional[List[str]] = None, max_workers: Optional[int] = None
+) -> Optional[Path]:
+    """
+    Kör flera läsår parallellt och skriv jämförelsefilen.
+
+    Args:
+        lasar: Läsår att köra (standard: alla med rådatamapp)
+        max_workers: Antal processer (standard: ett per läsår, högst antal kärnor)
+
+    Returns:
+        Sökväg till jämförelsefilen, eller None om inget läsår gav data
+    """
+    lasar = lasar or hitta_lasar()
+    if not lasar:
+        print("⚠️ Hittade inga läsårsmappar i data/raw/franvaro/")
+        return None
+
+    antal_per_lasar = {}
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        framtider = [(ar, pool.submit(kor_lasar, ar)) for ar in lasar]
+        for ar, framtid in framtider:
+            try:
+                _, antal, logg = framtid.result()
+            except Exception as e:
+                print(f"⚠️ Läsår {ar} misslyckades: {e}")
+                continue
+            print(f"📅 {ar}")
+            print(logg, end="")
+            if antal is None:
+                print(f"⚠️ Inga datarader för läsår {ar}, hoppar över i jämförelsen")
+                continue
+            antal_per_lasar[ar] = antal
+
+    if not antal_per_lasar:
+        return None
+
+    jamforelse = bygg_jamforelse(antal_per_lasar)
+    wb = Workbook(write_only=True)
+    for titel, tabell in jamforelse.items():
+        skriv_tabell_blad(wb, titel, tabell)
+
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    output_path = OUTPUT_DIR / JAMFORELSE_FILNAMN
+    wb.save(str(output_path))
+    print(f"✔️ Jämförelse för {len(antal_per_lasar)} läsår sparades till {output_path}")
+    return output_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Kör flera läsår och jämför dem")
+    parser.add_argument("lasar", nargs="*", help="Läsår (YYYY-YYYY); standard: alla med rådata")
+    parser.add_argument("--arbetare", type=int, default=None, help="Antal processer")
+    args = parser.parse_args()
+
+    if kor_alla_lasar(args.lasar or None, max_workers=args.arbetare) is None:
+        sys.exit(1)
@@ -0,0 +1,127 @@
+"""
+Tidsmätning av flödet steg för steg på syntetiska skolrapporter.
+
+Stegen körs i samma ordning som steg 1 + steg 2 och mäts var för sig:
+
+    samla      busavsjo_samla_franvarorapporter (läs skolfiler, skriv franvaro.xls)
+    las_xls    las_blad av franvaro.xls (utan tomma rader, se xlslasare)
+    tolka      tolka_franvaro (STEG 1: klass- och elevrader)
+    arskurs    bestam_arskurser (extrahera_arskurs för alla elever)
+    rensa      rensa_franvaro (inklusive årskurs och procent)
+    summering  bygg_summeringar (kommun + skolor)
+    spara      skapa_rapport (bygg och spara arbetsboken)
+
+Resultaten sparas som JSON i ``data/processed/benchmark/``. Att resultatet är
+detsamma som baslinjens kontrolleras av ``tests/test_golden.py``.
+
+Användning:
+    python benchmark.py [--skolor 20] [--klasser 12] [--elever 25] [--upprepningar 3]
+"""
+import argparse
+import io
+import json
+import platform
+import statistics
+import time
+from contextlib import redirect_stdout
+from datetime import datetime
+from pathlib import Path
+from typing import Dict
+
+import pandas as pd
+from config_paths import PROCESSED_DATA_DIR
+from analys import bestam_arskurser, rensa_franvaro
+from avkodning import avkoda_matt
+from busavsjo_samla_franvaro import busavsjo_samla_franvarorapporter
+from rapport import RAPPORT_FILNAMN, skapa_rapport
+from summering import bygg_summeringar
+from syntetiska_rapporter import skapa_syntetiska_rapporter
+from tolkning import tolka_franvaro
+from xlslasare import las_blad
+
+BENCHMARK_DIR = PROCESSED_DATA_DIR / "benchmark"
+STEG = ["samla", "las_xls", "tolka", "arskurs", "avkodning", "rensa", "summering", "spara"]
+
+
+def kor_steg(indata_mapp: Path, output_mapp: Path) -> Dict[str, float]:
+    """Kör hela flödet en gång och returnera sekunder per steg."""
+    tider = {}
+
+    def mat(namn, funktion, *args, **kwargs):
+        start = time.perf_counter()
+        with redirect_stdout(io.StringIO()):
+            resultat = funktion(*args, **kwargs)
+        tider[namn] = time.perf_counter() - start
+        return resultat
+
+    mat("samla", busavsjo_samla_franvarorapporter, indata_mapp=indata_mapp, output_mapp=output_mapp)
+    raw = mat("las_xls", las_blad, output_mapp / "franvaro.xls", utan_tomma_rader=True)
+    df = mat("tolka", tolka_franvaro, raw)
+    elever = df[df["personnr"].notna()]
+    mat("arskurs", bestam_arskurser, elever)
+    mat("avkodning", avkoda_matt, elever)
+    df = mat("rensa", rensa_franvaro, df)
+    mat("summering", bygg_summeringar, df)
+    mat("spara", skapa_rapport, df, output_mapp / RAPPORT_FILNAMN)
+    return tider
+
+
+def kor_benchmark(
+    skolor: int = 20, klasser: int = 12, elever: int = 25, fro: int = 0,
+    upprepningar: int = 3,
+) -> dict:
+    """
+    Skapa (eller återanvänd) syntetiska rapporter och mät stegen.
+
+    Returns:
+        Resultatet som också sparas som JSON
+    """
+    namn = f"{skolor}x{klasser}x{elever}_s{fro}"
+    mapp = BENCHMARK_DIR / namn
+    indata_mapp = mapp / "raw"
+    output_mapp = mapp / "output"
+
+    if not indata_mapp.is_dir():
+        print(f"📝 Skapar {skolor} syntetiska rapporter i '{indata_mapp}'")
+        skapa_syntetiska_rapporter(indata_mapp, skolor, klasser, elever, fro)
+
+    korningar = [kor_steg(indata_mapp, output_mapp) for _ in range(upprepningar)]
+
+    resultat = {
+        "tidpunkt": datetime.now().isoformat(timespec="seconds"),
+        "storlek": {"skolor": skolor, "klasser": klasser, "elever": elever, "frö": fro},
+        "antal_elever": skolor * klasser * elever,
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "steg": {
+            steg: {
+                "min": min(k[steg] for k in korningar),
+                "median": statistics.median(k[steg] for k in korningar),
+                "alla": [k[steg] for k in korningar],
+            }
+            for steg in STEG
+        },
+    }
+    stampel = datetime.now().strftime("%Y%m%d-%H%M%S")
+    (mapp / f"resultat_{stampel}.json").write_text(
+        json.dumps(resultat, indent=2, ensure_ascii=False), encoding="utf-8"
+    )
+    return resultat
+
+
+def skriv_ut(resultat: dict):
+    print(f"📊 {resultat['antal_elever']} elever ({resultat['storlek']})")
+    for steg, tid in resultat["steg"].items():
+        print(f"   {steg:<10} min {tid['min'] * 1000:9.1f} ms   median {tid['median'] * 1000:9.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mät flödet steg för steg på syntetiska rapporter")
+    parser.add_argument("--skolor", type=int, default=20)
+    parser.add_argument("--klasser", type=int, default=12)
+    parser.add_argument("--elever", type=int, default=25)
+    parser.add_argument("--frö", dest="fro", type=int, default=0)
+    parser.add_argument("--upprepningar", type=int, default=3)
+    args = parser.parse_args()
+
+    skriv_ut(kor_benchmark(args.skolor, args.klasser, args.elever, args.fro, args.upprepningar))
@@ -0,0 +1,134 @@
+"""
+Bevakning av rådatamappen: bygg om när skolorna lämnat nya exporter.
+
+Mappen avläses med jämna mellanrum (namn, storlek och mtime för varje skolrapport),
+så det fungerar på vilken Linux-maskin som helst, även mot nätverksmappar där
+inotify inte räcker. En ändring räknas först när mappen varit oförändrad i
+``lugn`` sekunder: en fil som fortfarande kopieras växer och får ny mtime, och
+flera skolor som lämnar filer samtidigt blir ett enda bygge.
+
+Byggen (``franvaro all``, bevakningen, frågetjänstens omläsning, ``pipeline.py``
+och batchkörningen) tar ``bygglas`` för läsåret, ett fillås i cachemappen. Två byggen kan alltså aldrig
+skriva cache och rapporter samtidigt, inte ens från olika processer.
+
+Användning:
+    franvaro watch [--intervall 2] [--lugn 10]
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: låset gäller bara inom processen
+    fcntl = None
+
+LASFIL = ".bygg.lock"
+
+_processlas = threading.Lock()
+
+
+def filsignatur(indata_mapp: Path) -> Tuple:
+    """(namn, storlek, mtime) för skolrapporterna i mappen, samma urval som ``hitta_rapportfiler``."""
+    try:
+        poster = list(os.scandir(indata_mapp))
+    except FileNotFoundError:
+        return ()
+    signatur = []
+    for post in poster:
+        if post.name.lower().endswith(".xls") and post.name != "franvaro.xls" and post.is_file():
+            stat = post.stat()
+            signatur.append((post.name, stat.st_size, stat.st_mtime_ns))
+    return tuple(sorted(signatur))
+
+
+@contextmanager
+def bygglas(cache_mapp: Path):
+    """Ensamrätt att bygga om läsårets cache och rapporter. Väntar om ett annat bygge pågår."""
+    cache_mapp.mkdir(parents=True, exist_ok=True)
+    with _processlas, open(cache_mapp / LASFIL, "w") as fil:
+        if fcntl is not None:
+            try:
+                fcntl.flock(fil, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                print("⏳ Ett annat bygge pågår, väntar...")
+                fcntl.flock(fil, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fil, fcntl.LOCK_UN)
+
+
+@dataclass
+class Andring:
+    """Skillnaden mellan två signaturer (filnamn)."""
+
+    tillagda: List[str]
+    andrade: List[str]
+    borttagna: List[str]
+    signatur: Tuple
+
+    @classmethod
+    def mellan(cls, fore: Optional[Tuple], nu: Tuple) -> "Andring":
+        fore_filer = {namn: (storlek, mtime) for namn, storlek, mtime in fore or ()}
+        nu_filer = {namn: (storlek, mtime) for namn, storlek, mtime in nu}
+        return cls(
+            tillagda=sorted(set(nu_filer) - set(fore_filer)),
+            andrade=sorted(n for n in nu_filer if n in fore_filer and nu_filer[n] != fore_filer[n]),
+            borttagna=sorted(set(fore_filer) - set(nu_filer)),
+            signatur=nu,
+        )
+
+    def beskrivning(self, max_namn: int = 5) -> str:
+        delar = []
+        for rubrik, namn in [("nya", self.tillagda), ("ändrade", self.andrade), ("borttagna", self.borttagna)]:
+            if namn:
+                lista = ", ".join(Path(n).stem for n in namn[:max_namn])
+                if len(namn) > max_namn:
+                    lista += f" och {len(namn) - max_namn} till"
+                delar.append(f"{rubrik}: {lista}")
+        return "; ".join(delar)
+
+
+class Bevakare:
+    """
+    Avläser rådatamappen och ger en ``Andring`` när mappen har lugnat sig.
+
+    Args:
+        intervall: Sekunder mellan avläsningarna
+        lugn: Sekunder som mappen ska vara oförändrad innan ändringen räknas
+        signatur: Signaturen som redan är byggd (None: alla filer räknas som nya)
+    """
+
+    def __init__(self, indata_mapp: Path, intervall: float = 2.0, lugn: float = 10.0,
+                 signatur: Optional[Tuple] = None):
+        self.indata_mapp = Path(indata_mapp)
+        self.intervall = intervall
+        self.lugn = lugn
+        self.byggd = signatur
+
+    def andringar(self, stopp: Optional[threading.Event] = None) -> Iterator[Andring]:
+        """
+        Ge en ändring i taget tills ``stopp`` sätts.
+
+        Nästa ändring jämförs med den förra som gavs ut, så anroparen ska bygga
+        klart innan generatorn får fortsätta.
+        """
+        stopp = stopp or threading.Event()
+        sedd, sedd_tid = self.byggd, time.monotonic()
+        while True:
+            nu = filsignatur(self.indata_mapp)
+            if nu != sedd:
+                sedd, sedd_tid = nu, time.monotonic()
+            elif nu != self.byggd and time.monotonic() - sedd_tid >= self.lugn:
+                andring = Andring.mellan(self.byggd, nu)
+                self.byggd = nu
+                yield andring
+                continue
+            if stopp.wait(self.intervall):
+                return
@@ -1,61 +1,163 @@
-import xlrd
-import xlwt
+import argparse
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import List, Optional
+
+import pandas as pd
+import xlwt
+import matning
 from config_paths import RAW_FRANVARO_DIR, OUTPUT_FRANVARO_DIR
+from xlslasare import las_blad
 
+# Antal rubrikrader i varje skolrapport (behålls bara från första filen)
+RUBRIKRADER = 4
 
-def busavsjo_samla_franvarorapporter():
-    """
-    Slår ihop alla .xls-filer i ``data/raw/franvaro/<läsår>`` till en fil
-    (``data/output/<läsår>/franvaro.xls``),
-    behåller bara rubriken från första filen och hoppar över de fyra första raderna i resten.
+
+def hitta_rapportfiler(indata_mapp: Path) -> List[Path]:
+    """Alla skolrapporter (.xls) i mappen, i sorterad ordning."""
+    if not indata_mapp.is_dir():
+        print(f"⚠️ Hittade inte rådatamappen '{indata_mapp}'")
+        return []
+    return [
+        filvag for filvag in sorted(indata_mapp.iterdir())
+        if filvag.suffix.lower() == ".xls" and filvag.name != "franvaro.xls"
+    ]
+
+
+def las_skolrapport(filvag: Path, utan_tomma_rader: bool = False) -> pd.DataFrame:
     """
-    indata_mapp = RAW_FRANVARO_DIR
-    output_fil = OUTPUT_FRANVARO_DIR / "franvaro.xls"
+    Läs första bladet i en skolrapport till en tabell.
 
-    wb_out = xlwt.Workbook()
-    ws_out = wb_out.add_sheet("Data")
+    Cellerna behåller xlrd:s typer (tal som float, text som str, tomma som "").
 
-    rad_index = 0
-    antal_filer = 0
+    Args:
+        utan_tomma_rader: Hoppa över helt tomma rader (tolkningen behöver dem inte,
+            men franvaro.xls behåller dem)
+    """
+    return las_blad(filvag, utan_tomma_rader=utan_tomma_rader)
 
-    for filvag in sorted(indata_mapp.iterdir()):
-        if filvag.suffix.lower() != ".xls" or filvag.name == "franvaro.xls":
-            continue
 
-        skola = Path(filvag).stem
+def sla_ihop_tabeller(tabeller: List[tuple]) -> pd.DataFrame:
+    """
+    Slå ihop inlästa skolrapporter till en tabell med skola i kolumn 0.
 
-        try:
-            wb_in = xlrd.open_workbook(filvag)
-            sheet = wb_in.sheet_by_index(0)
+    Args:
+        tabeller: Lista med (skola, tabell) i den ordning de ska läggas ihop
 
-            start_row = 0 if antal_filer == 0 else 4  # behåll rubrik bara från första filen
+    Returns:
+        Samma rader som skrivs till franvaro.xls: rubriken från första filen
+        (med "skola" först) och resten av filerna utan sina fyra rubrikrader
+    """
+    delar = []
+    for nr, (skola, tabell) in enumerate(tabeller):
+        if nr > 0:
+            tabell = tabell.iloc[RUBRIKRADER:]
+        tabell = tabell.reset_index(drop=True)
+        skolkolumn = pd.Series(skola, index=tabell.index, dtype=object)
+        if nr == 0 and len(tabell):
+            skolkolumn.iloc[0] = "skola"
+        tabell.columns = range(1, tabell.shape[1] + 1)
+        tabell.insert(0, 0, skolkolumn)
+        delar.append(tabell)
+
+    if not delar:
+        return pd.DataFrame(dtype=object)
+    return pd.concat(delar, ignore_index=True)
+
+
+def samla_franvarotabeller(
+    filer: List[Path], parallellt: bool = False, max_workers: Optional[int] = None
+) -> tuple:
+    """
+    Läs skolrapporterna (valfritt parallellt i en processpool) och slå ihop dem.
 
-            for row_idx in range(start_row, sheet.nrows):
-                row_vals = sheet.row_values(row_idx)
+    Filer som inte går att läsa rapporteras och hoppas över; ordningen följer ``filer``.
 
-                # Rubrikrad från första filen: lägg till "skola" först
-                if antal_filer == 0 and row_idx == 0:
-                    ws_out.write(rad_index, 0, "skola")
-                    for col_idx, cell in enumerate(row_vals):
-                        ws_out.write(rad_index, col_idx + 1, str(cell))
-                    rad_index += 1
+    Returns:
+        (sammanslagen tabell, antal inlästa rapporter)
+    """
+    if parallellt and len(filer) > 1:
+        rapport = matning.aktiv()
+        minne = rapport is not None and rapport.minne
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            framtider = [
+                pool.submit(matning.mat_anrop, "las_skolrapport", filvag.stem, minne, las_skolrapport, filvag)
+                for filvag in filer
+            ]
+            resultat = []
+            for filvag, framtid in zip(filer, framtider):
+                try:
+                    tabell, post = framtid.result()
+                except Exception as e:
+                    print(f"⚠️ Kunde inte läsa {filvag.name}: {e}")
                     continue
+                post["rader"] = len(tabell)
+                matning.lagg_till(post)
+                resultat.append((filvag.stem, tabell))
+    else:
+        resultat = []
+        for filvag in filer:
+            try:
+                with matning.steg("las_skolrapport", skola=filvag.stem) as post:
+                    tabell = las_skolrapport(filvag)
+                    post["rader"] = len(tabell)
+                resultat.append((filvag.stem, tabell))
+            except Exception as e:
+                print(f"⚠️ Kunde inte läsa {filvag.name}: {e}")
+
+    with matning.steg("sla_ihop") as post:
+        tabell = sla_ihop_tabeller(resultat)
+        post["rader"] = len(tabell)
+    return tabell, len(resultat)
+
+
+def skriv_franvaro_xls(tabell: pd.DataFrame, output_fil: Path):
+    """Skriv den sammanslagna tabellen som text till ett xls-blad ("Data")."""
+    with matning.steg("skriv_franvaro_xls") as post:
+        post["rader"] = len(tabell)
+        wb_out = xlwt.Workbook()
+        ws_out = wb_out.add_sheet("Data")
+
+        for rad_index, rad in enumerate(tabell.itertuples(index=False)):
+            for col_idx, cell in enumerate(rad):
+                if pd.isna(cell):
+                    continue  # utfyllnad när filerna har olika antal kolumner
+                ws_out.write(rad_index, col_idx, str(cell))
+
+        output_fil.parent.mkdir(parents=True, exist_ok=True)
+        wb_out.save(str(output_fil))
+
+
+def busavsjo_samla_franvarorapporter(
+    parallellt: bool = False,
+    max_workers: Optional[int] = None,
+    indata_mapp: Optional[Path] = None,
+    output_mapp: Optional[Path] = None,
+):
+    """
+    Slår ihop alla .xls-filer i ``data/raw/franvaro/<läsår>`` till en fil
+    (``data/output/<läsår>/franvaro.xls``),
+    behåller bara rubriken från första filen och hoppar över de fyra första raderna i resten.
 
-                # Data: skola i kol 0 + resten skiftat
-                ws_out.write(rad_index, 0, skola)
-                for col_idx, cell in enumerate(row_vals):
-                    ws_out.write(rad_index, col_idx + 1, str(cell))
-                rad_index += 1
-
-            antal_filer += 1
+    Med ``parallellt=True`` tolkas varje skolfil i en egen process och tabellerna
+    slås ihop i samma ordning som vid sekventiell körning.
+    """
+    indata_mapp = indata_mapp or RAW_FRANVARO_DIR
+    output_fil = (output_mapp or OUTPUT_FRANVARO_DIR) / "franvaro.xls"
 
-        except Exception as e:
-            print(f"⚠️ Kunde inte läsa {filvag.name}: {e}")
+    filer = hitta_rapportfiler(indata_mapp)
+    tabell, antal_filer = samla_franvarotabeller(filer, parallellt=parallellt, max_workers=max_workers)
 
-    wb_out.save(str(output_fil))
+    skriv_franvaro_xls(tabell, output_fil)
     print(f"✔️ Skapade '{output_fil}' med {antal_filer} rapporter")
 
 
 if __name__ == "__main__":
-    busavsjo_samla_franvarorapporter()
+    parser = argparse.ArgumentParser(description="Slå ihop skolornas frånvarorapporter")
+    parser.add_argument("--parallellt", action="store_true", help="Läs skolfilerna parallellt")
+    parser.add_argument("--arbetare", type=int, default=None, help="Antal processer (standard: alla kärnor)")
+    parser.add_argument("--profil", action="store_true", help="Spara även en cProfile-dump av körningen")
+    parser.add_argument("--minne", action="store_true", help="Mät toppminne per steg (tracemalloc, långsammare)")
+    args = parser.parse_args()
+    with matning.Korningsrapport("collect", OUTPUT_FRANVARO_DIR, minne=args.minne, profil=args.profil):
+        busavsjo_samla_franvarorapporter(parallellt=args.parallellt, max_workers=args.arbetare)
@@ -0,0 +1,409 @@
+"""
+Kommandoradsverktyget ``franvaro`` med ett underkommando per steg.
+
+Tunga bibliotek (pandas, openpyxl, xlrd/xlwt) importeras bara av de
+underkommandon som behöver dem, så ``status`` och ``new-year`` startar snabbt.
+
+Användning:
+    franvaro new-year 2026-2027
+    franvaro status
+    franvaro collect [--parallellt]
+    franvaro analyze
+    franvaro over-threshold [--trosklar 5 10 11 15 20 30]
+    franvaro all [--parallellt] [--utan-cache] [--delad-rapport]
+    franvaro all --strommande         # en skola i taget, minnet begränsat av den största skolan
+    franvaro cube --per skola klass [--urval skola=Alpha]
+    franvaro snapshot
+    franvaro duplicates
+    franvaro delta [--datum 2026-03-02] [--bara-okning]
+    franvaro watch [--lugn 10]
+    franvaro serve [--port 8765] [--prov]
+
+``--lasar YYYY-YYYY`` (före underkommandot) kör mot ett annat läsår än LASAR.
+Varje körning (utom new-year/status) skriver en körningsrapport med tid och minne
+per steg till ``data/output/<läsår>/korningar/``; ``--minne`` mäter toppminne per steg
+och ``--profil`` lägger till en cProfile-dump.
+"""
+import argparse
+import sys
+from datetime import date
+from typing import List, Optional
+
+from config_paths import (
+    LASAR, hitta_lasar, output_franvaro_dir, processed_franvaro_dir, raw_franvaro_dir
+)
+
+
+def _mappar(args) -> tuple:
+    """(rådata, output, cache) för det valda läsåret."""
+    return (
+        raw_franvaro_dir(args.lasar),
+        output_franvaro_dir(args.lasar),
+        processed_franvaro_dir(args.lasar),
+    )
+
+
+def kommando_new_year(args) -> int:
+    from skapa_nytt_lasar import skapa_lasar_struktur
+
+    return 0 if skapa_lasar_struktur(args.nytt_lasar) else 1
+
+
+def kommando_status(args) -> int:
+    indata_mapp, output_mapp, cache_mapp = _mappar(args)
+    print(f"📅 Läsår: {args.lasar}")
+    if indata_mapp.is_dir():
+        antal = sum(1 for f in indata_mapp.iterdir() if f.suffix.lower() == ".xls" and f.name != "franvaro.xls")
+        print(f"   📁 {indata_mapp}: {antal} rapporter")
+    else:
+        print(f"   ⚠️ Rådatamappen saknas: {indata_mapp}")
+    for namn in ["franvaro.xls", "franvaro_rensad_kategoriserad.xlsx", "franvaro_kommun.xlsx",
+                 "franvaro_med_over11.xlsx"]:
+        fil = output_mapp / namn
+        print(f"   {'✔️' if fil.exists() else '–'} {fil}")
+    skolmapp = output_mapp / "skolor"
+    if skolmapp.is_dir():
+        print(f"   ✔️ {skolmapp}: {sum(1 for f in skolmapp.glob('*.xlsx'))} skolrapporter")
+    print(f"   {'✔️' if cache_mapp.is_dir() else '–'} {cache_mapp} (cache)")
+
+    alla = hitta_lasar()
+    print(f"📚 Läsår med rådata: {', '.join(alla) if alla else 'inga'}")
+    return 0
+
+
+def kommando_collect(args) -> int:
+    from busavsjo_samla_franvaro import busavsjo_samla_franvarorapporter
+
+    indata_mapp, output_mapp, _ = _mappar(args)
+    busavsjo_samla_franvarorapporter(
+        parallellt=args.parallellt, max_workers=args.arbetare,
+        indata_mapp=indata_mapp, output_mapp=output_mapp,
+    )
+    return 0
+
+
+def kommando_analyze(args) -> int:
+    from pipeline import analysera_franvaro_xls
+
+    _, output_mapp, _ = _mappar(args)
+    df = analysera_franvaro_xls(
+        output_mapp=output_mapp, delad_rapport=args.delad_rapport, parquet=args.parquet, arrow=args.arrow,
+        lasar=args.lasar,
+    )
+    return 1 if df.empty else 0
+
+
+def kommando_over_threshold(args, df=None) -> int:
+    from trosklar import las_rensad_data
+
+    indata_mapp, output_mapp, cache_mapp = _mappar(args)
+    if df is None:
+        df = las_rensad_data(indata_mapp, cache_mapp, args.lasar)
+    if df.empty:
+        print("⚠️ Hittade inga datarader.")
+        return 1
+
+    if args.trosklar:
+        from trosklar import MATT, kor_trosklar
+
+        kor_trosklar(args.trosklar, matt=args.matt or MATT, df=df, output_mapp=output_mapp)
+    else:
+        from franvaro_med_over11 import rakna_over_11
+
+        rakna_over_11(df, output_mapp=output_mapp)
+    return 0
+
+
+def kommando_all(args) -> int:
+    from bevakning import bygglas
+
+    _, _, cache_mapp = _mappar(args)
+    with bygglas(cache_mapp):
+        return _bygg_allt(args)
+
+
+def _bygg_allt(args) -> int:
+    if args.strommande:
+        return _bygg_strommande(args)
+
+    from pipeline import kor_pipeline
+
+    indata_mapp, output_mapp, cache_mapp = _mappar(args)
+    df = kor_pipeline(
+        indata_mapp=indata_mapp,
+        output_mapp=output_mapp,
+        parallellt=args.parallellt,
+        max_workers=args.arbetare,
+        spara_franvaro_xls=args.spara_franvaro_xls,
+        anvand_cache=not args.utan_cache,
+        cache_mapp=cache_mapp,
+        rensad_lista=args.rensad_lista,
+        delad_rapport=args.delad_rapport,
+        parquet=args.parquet,
+        arrow=args.arrow,
+        lasar=args.lasar,
+    )
+    if df.empty:
+        return 1
+
+    from busavsjo_samla_franvaro import hitta_rapportfiler
+    from ogonblicksbilder import spara_ogonblicksbild
+
+    spara_ogonblicksbild(df, hitta_rapportfiler(indata_mapp), lasar=args.lasar)
+    # Gränserna räknas på den rensade datan i minnet
+    return kommando_over_threshold(args, df)
+
+
+def _bygg_strommande(args) -> int:
+    from franvaro_med_over11 import GRANS
+    from strommande import kor_strommande
+
+    ej_strommande = [
+        flagga for flagga, vald in [
+            ("--parallellt", args.parallellt), ("--spara-franvaro-xls", args.spara_franvaro_xls),
+            ("--delad-rapport", args.delad_rapport), ("--parquet", args.parquet), ("--arrow", args.arrow),
+        ] if vald
+    ]
+    if ej_strommande:
+        print(f"⚠️ {', '.join(ej_strommande)} går inte att kombinera med --strommande")
+        return 1
+
+    indata_mapp, output_mapp, cache_mapp = _mappar(args)
+    resultat = kor_strommande(
+        indata_mapp=indata_mapp,
+        output_mapp=output_mapp,
+        anvand_cache=not args.utan_cache,
+        cache_mapp=cache_mapp,
+        rensad_lista=args.rensad_lista,
+        trosklar=args.trosklar or [GRANS],
+        lasar=args.lasar,
+    )
+    if resultat is None:
+        return 1
+    _, histogram = resultat
+
+    # Gränserna räknas på skolornas hopslagna histogram
+    if args.trosklar:
+        from trosklar import MATT, kor_trosklar
+
+        kor_trosklar(args.trosklar, matt=args.matt or MATT, output_mapp=output_mapp, histogram=histogram)
+    else:
+        from franvaro_med_over11 import rakna_over_11
+
+        rakna_over_11(output_mapp=output_mapp, histogram=histogram)
+    return 0
+
+
+def kommando_watch(args) -> int:
+    import matning
+    from bevakning import Bevakare
+
+    indata_mapp, output_mapp, _ = _mappar(args)
+    bevakare = Bevakare(indata_mapp, intervall=args.intervall, lugn=args.lugn)
+    print(f"👀 Bevakar {indata_mapp} (bygger om {args.lugn:g} s efter senaste ändringen, Ctrl+C avslutar)")
+    try:
+        for andring in bevakare.andringar():
+            if not andring.signatur:
+                print("⚠️ Inga skolrapporter i mappen, väntar.")
+                continue
+            print(f"🔁 {andring.beskrivning()}")
+            # En trasig eller halvkopierad export ska inte stoppa bevakningen
+            try:
+                if args.utan_matning:
+                    kommando_all(args)
+                else:
+                    with matning.Korningsrapport("watch", output_mapp, minne=args.minne, profil=args.profil):
+                        kommando_all(args)
+            except Exception as e:
+                print(f"⚠️ Bygget misslyckades, fortsätter bevaka och bygger om vid nästa ändring: {e}")
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def kommando_cube(args) -> int:
+    import pandas as pd
+    from summering import KUB_FILNAMN, Kub
+
+    _, output_mapp, _ = _mappar(args)
+    kubfil = output_mapp / KUB_FILNAMN
+    if not kubfil.exists():
+        print(f"⚠️ Hittade ingen kub i '{kubfil}'. Kör 'franvaro all' eller 'franvaro analyze' först.")
+        return 1
+    urval = dict(villkor.split("=", 1) for villkor in args.urval)
+    with pd.option_context("display.max_rows", None, "display.max_columns", None, "display.width", 250):
+        print(Kub.las(kubfil).oversikt(args.per, **urval))
+    return 0
+
+
+def kommando_snapshot(args) -> int:
+    from busavsjo_samla_franvaro import hitta_rapportfiler
+    from ogonblicksbilder import spara_ogonblicksbild
+    from trosklar import las_rensad_data
+
+    indata_mapp, _, cache_mapp = _mappar(args)
+    df = las_rensad_data(indata_mapp, cache_mapp, args.lasar)
+    if df.empty:
+        print("⚠️ Hittade inga datarader.")
+        return 1
+    spara_ogonblicksbild(df, hitta_rapportfiler(indata_mapp), lasar=args.lasar)
+    return 0
+
+
+def kommando_duplicates(args) -> int:
+    import pandas as pd
+    from elever import hitta_dubbletter
+    from trosklar import las_rensad_data
+
+    indata_mapp, _, cache_mapp = _mappar(args)
+    dubbletter = hitta_dubbletter(las_rensad_data(indata_mapp, cache_mapp, args.lasar))
+    if dubbletter.empty:
+        print("✔️ Ingen elev finns på mer än en rad.")
+        return 0
+    with pd.option_context("display.max_rows", None, "display.width", 250):
+        print(dubbletter.to_string(index=False))
+    return 0
+
+
+def kommando_delta(args) -> int:
+    from ogonblicksbilder import kor_forandringar
+
+    _, output_mapp, _ = _mappar(args)
+    forandringar = kor_forandringar(args.lasar, args.datum, args.bara_okning, output_mapp=output_mapp)
+    return 1 if forandringar is None else 0
+
+
+def kommando_serve(args) -> int:
+    from fragetjanst import Fragetjanst, belastningsprov, starta
+
+    indata_mapp, _, cache_mapp = _mappar(args)
+    if args.prov:
+        tjanst = Fragetjanst(indata_mapp, cache_mapp, lasar=args.lasar)
+        return 0 if belastningsprov(tjanst, tradar=args.tradar, anrop=args.anrop) else 1
+    starta(args.port, args.intervall, args.lugn, indata_mapp, cache_mapp, lasar=args.lasar)
+    return 0
+
+
+def _lagg_till_trosklar(p: argparse.ArgumentParser):
+    p.add_argument("--trosklar", nargs="+", type=float, default=None, metavar="PROCENT",
+                   help="Gränser i procent, t.ex. 5 10 11 15 20 30 (skriver franvaro_over_trosklar.xlsx)")
+    p.add_argument("--matt", choices=["total", "ogiltig"], action="append",
+                   help="Mått för --trosklar (standard: båda)")
+
+
+def _lagg_till_strommande(p: argparse.ArgumentParser):
+    p.add_argument("--strommande", action="store_true",
+                   help="En skolfil i taget (minnet begränsas av den största skolan); sparar ingen ögonblicksbild")
+
+
+def _lagg_till_utdata(p: argparse.ArgumentParser):
+    p.add_argument("--delad-rapport", action="store_true",
+                   help="En arbetsbok per skola (skolor/) och en för kommunen i stället för en stor; "
+                        "oförändrade skolor skrivs inte om")
+    p.add_argument("--parquet", action="store_true",
+                   help="Exportera även elevrader och översikter som Parquet (parquet/, partitionerat per skola)")
+    p.add_argument("--arrow", action="store_true", help="Som --parquet, plus parquet/elever.arrow (minnesmappbar)")
+
+
+def skapa_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="franvaro", description="Samla och analysera frånvarorapporter")
+    parser.add_argument("--lasar", default=LASAR, help=f"Läsår YYYY-YYYY (standard: {LASAR})")
+    parser.add_argument("--profil", action="store_true", help="Spara även en cProfile-dump av körningen")
+    parser.add_argument("--minne", action="store_true", help="Mät toppminne per steg (tracemalloc, långsammare)")
+    parser.add_argument("--utan-matning", action="store_true", help="Skriv ingen körningsrapport")
+    sub = parser.add_subparsers(dest="kommando", required=True)
+
+    p = sub.add_parser("new-year", help="Skapa mappstruktur för ett nytt läsår")
+    p.add_argument("nytt_lasar", metavar="LASAR", help="Läsår YYYY-YYYY")
+    p.set_defaults(kor=kommando_new_year)
+
+    p = sub.add_parser("status", help="Visa rådata, rapporter och cache för läsåret")
+    p.set_defaults(kor=kommando_status)
+
+    p = sub.add_parser("collect", help="Steg 1: slå ihop skolrapporterna till franvaro.xls")
+    p.add_argument("--parallellt", action="store_true", help="Läs skolfilerna parallellt")
+    p.add_argument("--arbetare", type=int, default=None, help="Antal processer (standard: alla kärnor)")
+    p.set_defaults(kor=kommando_collect)
+
+    p = sub.add_parser("analyze", help="Steg 2: kategorisera franvaro.xls och skapa rapporten")
+    _lagg_till_utdata(p)
+    p.set_defaults(kor=kommando_analyze)
+
+    p = sub.add_parser("over-threshold", help="Räkna elever över frånvarogränser (standard: >11 %% total)")
+    _lagg_till_trosklar(p)
+    p.set_defaults(kor=kommando_over_threshold)
+
+    p = sub.add_parser("all", help="Hela flödet i minnet (pipeline) och >11 %%-sammanställningen")
+    p.add_argument("--parallellt", action="store_true", help="Läs skolfilerna parallellt")
+    p.add_argument("--arbetare", type=int, default=None, help="Antal processer (standard: alla kärnor)")
+    p.add_argument("--spara-franvaro-xls", action="store_true",
+                   help="Spara även den sammanslagna franvaro.xls (felsökning, utan cache)")
+    p.add_argument("--utan-cache", action="store_true", help="Tolka alla filer, använd inte cachen")
+    p.add_argument("--rensad-lista", action="store_true",
+                   help="Skriv även rensad_output_formaterad.xlsx (namn, personnr, procent per skola)")
+    _lagg_till_strommande(p)
+    _lagg_till_utdata(p)
+    _lagg_till_trosklar(p)
+    p.set_defaults(kor=kommando_all)
+
+    p = sub.add_parser("watch", help="Bevaka rådatamappen och kör all när nya eller ändrade rapporter kommit")
+    p.add_argument("--intervall", type=float, default=2.0, help="Sekunder mellan kontroller av rådatamappen")
+    p.add_argument("--lugn", type=float, default=10.0,
+                   help="Sekunder utan ändringar innan ett bygge startar (filer som kopieras)")
+    p.add_argument("--parallellt", action="store_true", help="Läs skolfilerna parallellt")
+    p.add_argument("--arbetare", type=int, default=None, help="Antal processer (standard: alla kärnor)")
+    p.add_argument("--rensad-lista", action="store_true",
+                   help="Skriv även rensad_output_formaterad.xlsx vid varje bygge")
+    _lagg_till_strommande(p)
+    _lagg_till_utdata(p)
+    _lagg_till_trosklar(p)
+    p.set_defaults(kor=kommando_watch, spara_franvaro_xls=False, utan_cache=False)
+
+    p = sub.add_parser("cube", help="Valfri översikt ur den sparade aggregeringskuben")
+    p.add_argument("--per", nargs="+", default=["årskurs"], choices=["skola", "klass", "årskurs"],
+                   help="Dimensioner att gruppera på (standard: årskurs)")
+    p.add_argument("--urval", nargs="+", default=[], metavar="DIM=VÄRDE", help="Filter, t.ex. skola=Alpha")
+    p.set_defaults(kor=kommando_cube)
+
+    p = sub.add_parser("snapshot", help="Spara en ögonblicksbild av rensad data (görs även av all)")
+    p.set_defaults(kor=kommando_snapshot)
+
+    p = sub.add_parser("duplicates", help="Elever som finns i flera skolors rapporter (samma personnummer)")
+    p.set_defaults(kor=kommando_duplicates)
+
+    p = sub.add_parser("delta", help="Elever som bytt kategori eller passerat 11 %% sedan föregående bild")
+    p.add_argument("--datum", type=date.fromisoformat, default=None, help="Bild att jämföra (standard: senaste)")
+    p.add_argument("--bara-okning", action="store_true", help="Bara elever vars frånvaro ökat")
+    p.set_defaults(kor=kommando_delta)
+
+    p = sub.add_parser("serve", help="Lokal frågetjänst (JSON) som läser in ny rådata automatiskt")
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("--intervall", type=float, default=2.0, help="Sekunder mellan kontroller av rådatamappen")
+    p.add_argument("--lugn", type=float, default=5.0, help="Sekunder utan ändringar innan datan läses om")
+    p.add_argument("--prov", action="store_true", help="Kör belastningsprovet med samtidiga klienter och avsluta")
+    p.add_argument("--tradar", type=int, default=8, help="Samtidiga klienter i provet")
+    p.add_argument("--anrop", type=int, default=500, help="Frågor per klient i provet")
+    p.set_defaults(kor=kommando_serve)
+
+    return parser
+
+
+# Kommandon som bara läser eller skapar mappar, och tjänsten, mäts inte.
+# Bevakningen skriver en körningsrapport per bygge.
+UTAN_MATNING = {"new-year", "status", "delta", "cube", "serve", "watch", "duplicates"}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = skapa_parser().parse_args(argv)
+    if args.kommando in UTAN_MATNING or args.utan_matning:
+        return args.kor(args)
+
+    import matning
+
+    _, output_mapp, _ = _mappar(args)
+    with matning.Korningsrapport(args.kommando, output_mapp, minne=args.minne, profil=args.profil):
+        return args.kor(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
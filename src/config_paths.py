@@ -1,7 +1,11 @@
 """
 Konfigurationsfil för sökvägar i frånvaro-projektet
+
+Inga mappar skapas vid import; de skapas av de kommandon som skriver till dem.
 """
+import re
 from pathlib import Path
+from typing import List
 
 # Projektets rotmapp
 ROOT_DIR = Path(__file__).parent.parent
@@ -15,10 +19,38 @@ RAW_DATA_DIR = DATA_DIR / "raw"
 PROCESSED_DATA_DIR = DATA_DIR / "processed"
 OUTPUT_DIR = DATA_DIR / "output"
 
-# Frånvarospecifika mappar
-RAW_FRANVARO_DIR = RAW_DATA_DIR / "franvaro" / LASAR
-OUTPUT_FRANVARO_DIR = OUTPUT_DIR / LASAR
+# Mappen med en undermapp per läsår (YYYY-YYYY) för råa frånvarorapporter
+RAW_FRANVARO_ROOT = RAW_DATA_DIR / "franvaro"
+
+
+def raw_franvaro_dir(lasar: str) -> Path:
+    """Råa .xls-rapporter för ett läsår."""
+    return RAW_FRANVARO_ROOT / lasar
+
+
+def output_franvaro_dir(lasar: str) -> Path:
+    """Färdiga rapporter för ett läsår."""
+    return OUTPUT_DIR / lasar
 
-# Skapa mappar om de inte finns
-for directory in [RAW_FRANVARO_DIR, OUTPUT_FRANVARO_DIR, PROCESSED_DATA_DIR]:
-    directory.mkdir(parents=True, exist_ok=True)
+
+def processed_franvaro_dir(lasar: str) -> Path:
+    """Mellanresultat (cache) för ett läsår."""
+    return PROCESSED_DATA_DIR / "franvaro" / lasar
+
+
+def hitta_lasar() -> List[str]:
+    """Alla läsår (YYYY-YYYY, slutår = startår + 1) som har en rådatamapp, i ordning."""
+    if not RAW_FRANVARO_ROOT.is_dir():
+        return []
+    lasar = []
+    for mapp in sorted(RAW_FRANVARO_ROOT.iterdir()):
+        match = re.fullmatch(r"(\d{4})-(\d{4})", mapp.name)
+        if mapp.is_dir() and match and int(match.group(2)) == int(match.group(1)) + 1:
+            lasar.append(mapp.name)
+    return lasar
+
+
+# Frånvarospecifika mappar
+RAW_FRANVARO_DIR = raw_franvaro_dir(LASAR)
+OUTPUT_FRANVARO_DIR = output_franvaro_dir(LASAR)
+PROCESSED_FRANVARO_DIR = processed_franvaro_dir(LASAR)
@@ -0,0 +1,168 @@
+"""
+Elevdimensionen: normaliserade personnummer som heltalsnycklar.
+
+Skolornas exporter skriver personnumret på olika sätt: 10 eller 12 siffror, med
+eller utan bindestreck ("+" för den som fyllt 100). Det tolkas en gång vid
+rensningen till en nyckel ``elev_id`` och ett födelseår, och allt efter det
+(blandklasser, dubbletter, ögonblicksbilder) jämför heltal i stället för text.
+
+``elev_id`` är personnumrets tolv siffror (ÅÅÅÅMMDDNNNN) som int64. Nyckeln blir
+därför densamma i varje skolfil, i cachen och i äldre ögonblicksbilder utan något
+gemensamt register. Nummer som inte går att tolka (t.ex. tillfälliga nummer med
+bokstäver) får en negativ nyckel ur en stabil hash av texten. Rader utan
+personnummer får ``TOM_NYCKEL`` och räknas aldrig som samma elev.
+
+Seklet för tiosiffriga nummer bestäms av läsåret (``lasarets_referensar``), inte
+av dagens datum, så samma export ger samma nycklar oavsett när den körs.
+
+Användning:
+    franvaro duplicates         # elever som finns på flera rader/skolor i läsårets data
+"""
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from config_paths import LASAR
+
+# Längd utan mellanslag -> (siffrornas positioner, skiljeteckens position)
+_FORMAT = {
+    10: (list(range(10)), None),                    # ÅÅMMDDNNNN
+    11: (list(range(6)) + list(range(7, 11)), 6),   # ÅÅMMDD-NNNN
+    12: (list(range(12)), None),                    # ÅÅÅÅMMDDNNNN
+    13: (list(range(8)) + list(range(9, 13)), 8),   # ÅÅÅÅMMDD-NNNN
+}
+_MINUS, _PLUS = ord("-") - ord("0"), ord("+") - ord("0")
+# Nyckeln för rader utan personnummer (giltiga nycklar är positiva, hashade negativa)
+TOM_NYCKEL = 0
+
+
+def lasarets_referensar(lasar: str = LASAR) -> int:
+    """Referensåret för tiosiffriga personnummer: läsårets slutår ("2025-2026" -> 2026)."""
+    return int(lasar.split("-")[-1])
+
+
+def _tal(siffror: np.ndarray) -> np.ndarray:
+    """Siffrorna i varje rad som ett heltal."""
+    tal = np.zeros(len(siffror), dtype=np.int64)
+    for kol in range(siffror.shape[1]):
+        tal = tal * 10 + siffror[:, kol]
+    return tal
+
+
+def elevnycklar(personnr: pd.Series, referensar: Optional[int] = None) -> pd.DataFrame:
+    """
+    ``elev_id`` (int64) och ``födelseår`` (Int16) per personnummer.
+
+    Tecknen läggs i en matris (ett tecken per kolumn) och varje format tolkas med
+    arrayoperationer, utan reguljära uttryck per värde.
+
+    Args:
+        personnr: Personnummer som de står i exporten
+        referensar: År som avgör sekel för tiosiffriga nummer (standard: slutåret för
+            ``LASAR``, se ``lasarets_referensar``). ÅÅ tolkas som 20ÅÅ om det inte
+            ligger efter referensåret, annars 19ÅÅ; "+" drar av ytterligare hundra år.
+
+    Returns:
+        Tabell med samma index som ``personnr``. Födelseåret saknas (<NA>) för nummer
+        som inte kunde tolkas, och ``elev_id`` är ``TOM_NYCKEL`` där personnumret saknas.
+    """
+    referensar = referensar or lasarets_referensar()
+    saknas = personnr.isna().to_numpy()
+    text = [
+        "" if tom else str(v).replace(" ", "").upper()
+        for v, tom in zip(personnr.to_numpy(dtype=object), saknas)
+    ]
+    antal = len(text)
+    langd = np.fromiter(map(len, text), dtype=np.int64, count=antal)
+    # Kodpunkt - "0", så att siffror blir 0-9 (längre texter kortas, men har fel längd ändå)
+    tecken = np.array(text, dtype="U13").view(np.uint32).reshape(antal, 13).astype(np.int64) - ord("0")
+
+    giltig = np.zeros(antal, dtype=bool)
+    fodelsear = np.zeros(antal, dtype=np.int64)
+    manad_dag_nr = np.zeros(antal, dtype=np.int64)
+    for antal_tecken, (positioner, skiljetecken) in _FORMAT.items():
+        rader = np.flatnonzero(langd == antal_tecken)
+        if not len(rader):
+            continue
+        siffror = tecken[np.ix_(rader, positioner)]
+        ok = ((siffror >= 0) & (siffror <= 9)).all(axis=1)
+        plus = np.zeros(len(rader), dtype=bool)
+        if skiljetecken is not None:
+            tecknet = tecken[rader, skiljetecken]
+            ok &= (tecknet == _MINUS) | (tecknet == _PLUS)
+            plus = tecknet == _PLUS
+        if len(positioner) == 10:
+            ar = _tal(siffror[:, :2])
+            ar = np.where(2000 + ar <= referensar, 2000 + ar, 1900 + ar) - 100 * plus
+        else:
+            ar = _tal(siffror[:, :4])
+        # Dag + 60 för samordningsnummer
+        manad, dag = _tal(siffror[:, -8:-6]), _tal(siffror[:, -6:-4]) % 60
+        ok &= (manad >= 1) & (manad <= 12) & (dag >= 1) & (dag <= 31)
+
+        giltig[rader] = ok
+        fodelsear[rader] = ar
+        manad_dag_nr[rader] = _tal(siffror[:, -8:])
+
+    elev_id = fodelsear * 10**8 + manad_dag_nr
+    if not giltig.all():
+        ovriga = np.array(text, dtype=object)[~giltig]
+        # hash_array är deterministisk (fast nyckel), så nyckeln blir densamma mellan körningar
+        elev_id[~giltig] = -(pd.util.hash_array(ovriga) >> np.uint64(1)).astype(np.int64) - 1
+        elev_id[langd == 0] = TOM_NYCKEL
+
+    return pd.DataFrame({
+        "elev_id": elev_id,
+        "födelseår": pd.arrays.IntegerArray(fodelsear.astype(np.int16), ~giltig),
+    }, index=personnr.index)
+
+
+def fodelsear(personnr: str, referensar: Optional[int] = None) -> Optional[int]:
+    """Födelseåret för ett enskilt personnummer, eller None om det inte kan tolkas."""
+    ar = elevnycklar(pd.Series([personnr], dtype=object), referensar)["födelseår"].iloc[0]
+    return None if pd.isna(ar) else int(ar)
+
+
+def hitta_dubbletter(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Elever (``elev_id``) som finns på mer än en rad, t.ex. i två skolors rapporter
+    efter en flytt mitt i läsåret.
+
+    En gruppering över nyckeln, linjär i antalet rader. Rader utan personnummer
+    (``TOM_NYCKEL``) är inte dubbletter av varandra och tas inte med.
+
+    Returns:
+        En rad per elev: ``elev_id``, ``personnr``, ``namn``, ``antal_rader``, ``skolor``
+        och ``klasser`` (sorterade, kommaseparerade), sorterat på namn
+    """
+    kolumner = ["elev_id", "personnr", "namn", "antal_rader", "skolor", "klasser"]
+    rader = df[df["elev_id"].duplicated(keep=False) & (df["elev_id"] != TOM_NYCKEL)]
+    if rader.empty:
+        return pd.DataFrame(columns=kolumner)
+
+    def lista(varden: pd.Series) -> str:
+        return ", ".join(sorted(str(v) for v in varden.dropna().unique()))
+
+    grupper = rader.groupby("elev_id", sort=False)
+    resultat = pd.DataFrame({
+        "personnr": grupper["personnr"].first(),
+        "namn": grupper["namn"].first(),
+        "antal_rader": grupper.size(),
+        "skolor": grupper["skola"].agg(lista),
+        "klasser": grupper["klass"].agg(lista),
+    }).reset_index()
+    return resultat[kolumner].sort_values(["namn", "elev_id"]).reset_index(drop=True)
+
+
+def varna_for_dubbletter(df: pd.DataFrame, max_namn: int = 5) -> pd.DataFrame:
+    """Skriv ut en varning om samma elev finns i flera skolor eller på flera rader."""
+    dubbletter = hitta_dubbletter(df)
+    if dubbletter.empty:
+        return dubbletter
+    flera_skolor = dubbletter["skolor"].str.contains(",", regex=False)
+    exempel = ", ".join(f"{r.namn} ({r.skolor})" for r in dubbletter.head(max_namn).itertuples())
+    if len(dubbletter) > max_namn:
+        exempel += f" och {len(dubbletter) - max_namn} till"
+    print(f"⚠️ {len(dubbletter)} elever finns på flera rader ({int(flera_skolor.sum())} i flera skolor): {exempel}")
+    return dubbletter
+
@@ -0,0 +1,404 @@
+"""
+Lokal frågetjänst (HTTP, bara läsning) över läsårets senaste siffror.
+
+Tjänsten läser in den rensade datan via pipelinens cache (samma rensning och
+kategorisering som ``skript works.py``) och bygger aggregeringskuben och
+gränshistogrammet en gång. Svaren är JSON och sparas per fråga (sökvägen och de
+parametrar adressen använder; andra parametrar ignoreras), så en upprepad fråga
+är bara en uppslagning. Högst ``MAX_SVAR`` svar sparas; det som använts minst
+nyligen kastas först.
+
+En bakgrundstråd bevakar rådatamappen (``bevakning.Bevakare``). När en fil
+tillkommit, ändrats eller tagits bort och mappen sedan varit lugn en stund läses
+datan in på nytt – bara de ändrade skolfilerna tolkas – och hela läget med sina
+sparade svar byts ut på en gång. Under omläsningen fortsätter det gamla läget att svara.
+
+Adresser:
+    GET /status                        läsår, filer, elevantal och när datan lästes in
+    GET /skolor                        skolorna i datan
+    GET /skola/<skola>[?per=klass]     skolans översikt per årskurs (eller klass)
+    GET /arskurs                       kommunens översikt per årskurs
+    GET /arskurs/<årskurs>             årskursens översikt per skola
+    GET /trosklar?grans=11&grans=20[&matt=ogiltig][&per=skola]
+
+Användning:
+    python fragetjanst.py [--port 8765] [--intervall 2] [--lugn 5]
+    python fragetjanst.py --prov [--tradar 8 --anrop 500]   # belastningsprov
+"""
+import argparse
+import json
+import statistics
+import sys
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from http.client import HTTPConnection
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+
+import pandas as pd
+from bevakning import Bevakare, bygglas, filsignatur
+from config_paths import LASAR, PROCESSED_FRANVARO_DIR, RAW_FRANVARO_DIR
+from summering import Kub
+from trosklar import NYCKLAR, STANDARDGRANSER, TroskelHistogram, las_rensad_data
+
+STANDARDPORT = 8765
+# Sparade svar per läge (godtyckliga gränser i /trosklar ger annars hur många som helst)
+MAX_SVAR = 1024
+# Frågeparametrar som varje adress använder; övriga ingår inte i svarets nyckel
+PARAMETRAR = {"skola": ("per",), "trosklar": ("grans", "matt", "per")}
+
+
+class Fragefel(Exception):
+    """Fel i en fråga, med HTTP-status."""
+
+    def __init__(self, status: int, meddelande: str):
+        super().__init__(meddelande)
+        self.status = status
+
+
+def _tabell_som_json(tabell: pd.DataFrame) -> List[dict]:
+    """En post per rad med indexnivåerna först (saknade värden blir null)."""
+    rader = tabell.reset_index().astype(object)
+    return rader.where(rader.notna(), None).to_dict("records")
+
+
+def _fraga_nyckel(adress: str) -> tuple:
+    """(sökvägens delar, adressens kända parametrar i ordning) – samma fråga ger samma nyckel."""
+    delar = urlsplit(adress)
+    steg = tuple(unquote(d) for d in delar.path.strip("/").split("/") if d)
+    parametrar = parse_qs(delar.query, keep_blank_values=True)
+    kanda = PARAMETRAR.get(steg[0], ()) if steg else ()
+    return steg, tuple((namn, tuple(parametrar[namn])) for namn in kanda if namn in parametrar)
+
+
+class Lage:
+    """
+    En inläsning av datan med sina svar. Byts ut i sin helhet vid omläsning.
+
+    ``svar`` fylls på efterhand med lyckade svar: fråga -> (status, JSON-bytes), där
+    frågan är sökvägen och adressens kända parametrar (``_fraga_nyckel``).
+    """
+
+    def __init__(self, df: pd.DataFrame, signatur: Tuple, lasar: str):
+        self.signatur = signatur
+        self.lasar = lasar
+        self.laddad = datetime.now()
+        self.elevantal = len(df)
+        self.kub = Kub.fran_tabell(df)
+        self.histogram = TroskelHistogram.fran_tabell(df)
+        self.skolor = sorted(df["skola"].dropna().unique().tolist())
+        self.arskurser = sorted(df["årskurs"].dropna().unique().tolist())
+        self.svar: "OrderedDict[tuple, Tuple[int, bytes]]" = OrderedDict()
+        self._las = threading.Lock()
+
+    def fraga(self, adress: str) -> Tuple[int, bytes]:
+        """Svaret på en adress (sökväg + frågesträng), från de sparade svaren om det finns."""
+        nyckel = _fraga_nyckel(adress)
+        with self._las:
+            svar = self.svar.get(nyckel)
+            if svar is not None:
+                self.svar.move_to_end(nyckel)
+                return svar
+        steg, parametrar = nyckel
+        try:
+            svar = 200, self._kodad(self._berakna(list(steg), {namn: list(v) for namn, v in parametrar}))
+        except Fragefel as e:
+            # Felsvar sparas inte, så att godtyckliga adresser inte fyller minnet
+            return e.status, self._kodad({"fel": str(e)})
+        with self._las:
+            svar = self.svar.setdefault(nyckel, svar)
+            while len(self.svar) > MAX_SVAR:
+                self.svar.popitem(last=False)
+            return svar
+
+    @staticmethod
+    def _kodad(data) -> bytes:
+        return json.dumps(data, ensure_ascii=False).encode("utf-8")
+
+    def _berakna(self, steg: List[str], parametrar: Dict[str, List[str]]):
+        if steg == ["status"]:
+            return self.status()
+        if steg == ["skolor"]:
+            return {"skolor": self.skolor}
+        if len(steg) == 2 and steg[0] == "skola":
+            skola = steg[1]
+            if skola not in self.skolor:
+                raise Fragefel(404, f"Okänd skola '{skola}'")
+            per = parametrar.get("per", ["årskurs"])[0]
+            if per not in ("årskurs", "klass"):
+                raise Fragefel(400, "per måste vara årskurs eller klass")
+            return {"skola": skola, "per": per, "rader": _tabell_som_json(self.kub.oversikt([per], skola=skola))}
+        if steg == ["arskurs"]:
+            return {"per": "årskurs", "rader": _tabell_som_json(self.kub.oversikt(["årskurs"]))}
+        if len(steg) == 2 and steg[0] == "arskurs":
+            arskurs = steg[1]
+            if arskurs not in self.arskurser:
+                raise Fragefel(404, f"Okänd årskurs '{arskurs}'")
+            return {
+                "årskurs": arskurs, "per": "skola",
+                "rader": _tabell_som_json(self.kub.oversikt(["skola"], årskurs=arskurs)),
+            }
+        if steg == ["trosklar"]:
+            return self._trosklar(parametrar)
+        raise Fragefel(404, f"Okänd adress '/{'/'.join(steg)}'")
+
+    def _trosklar(self, parametrar: Dict[str, List[str]]):
+        try:
+            trosklar = [float(g) for g in parametrar.get("grans", [])] or STANDARDGRANSER
+        except ValueError:
+            raise Fragefel(400, "grans måste vara tal i procent")
+        matt = parametrar.get("matt", ["total"])[0]
+        per = [p for p in parametrar.get("per", ["årskurs"])[0].split(",") if p]
+        if any(p not in NYCKLAR for p in per):
+            raise Fragefel(400, f"per måste vara en eller flera av {NYCKLAR} (eller tom för kommunen)")
+        try:
+            tabell = self.histogram.antal_over(trosklar, matt, per=per)
+        except ValueError as e:
+            raise Fragefel(400, str(e))
+        if not per:
+            tabell.index.name = "kommun"
+        return {"matt": matt, "trosklar": trosklar, "per": per, "rader": _tabell_som_json(tabell)}
+
+    def status(self) -> dict:
+        return {
+            "läsår": self.lasar,
+            "laddad": self.laddad.isoformat(timespec="seconds"),
+            "filer": len(self.signatur),
+            "elevantal": self.elevantal,
+            "skolor": len(self.skolor),
+        }
+
+
+class Fragetjanst:
+    """
+    Håller det aktuella ``Lage`` och läser in datan på nytt när rådatamappen ändras.
+
+    Läget byts ut med en enda tilldelning, så frågor som pågår under en omläsning
+    svarar färdigt från det gamla läget.
+    """
+
+    def __init__(
+        self, indata_mapp: Optional[Path] = None, cache_mapp: Optional[Path] = None,
+        lasar: str = LASAR, intervall: float = 2.0, lugn: float = 5.0,
+    ):
+        self.indata_mapp = Path(indata_mapp or RAW_FRANVARO_DIR)
+        self.cache_mapp = Path(cache_mapp or PROCESSED_FRANVARO_DIR)
+        self.lasar = lasar
+        self.intervall = intervall
+        self.lugn = lugn
+        self.lage: Optional[Lage] = None
+        self._stopp = threading.Event()
+        self._bevakare: Optional[threading.Thread] = None
+
+    def ladda_om(self, tvinga: bool = False) -> bool:
+        """
+        Läs in datan om rådatamappen ändrats sedan förra inläsningen.
+
+        Returns:
+            True om ett nytt läge laddades
+        """
+        with bygglas(self.cache_mapp):
+            signatur = filsignatur(self.indata_mapp)
+            if not tvinga and self.lage is not None and signatur == self.lage.signatur:
+                return False
+            start = time.perf_counter()
+            try:
+                df = las_rensad_data(self.indata_mapp, self.cache_mapp, self.lasar)
+                lage = Lage(df, signatur, self.lasar)
+            except Exception as e:
+                print(f"⚠️ Kunde inte läsa in datan, fortsätter med förra inläsningen: {e}")
+                return False
+            self.lage = lage
+            print(
+                f"🔄 Läste in {lage.elevantal} elever från {len(signatur)} filer "
+                f"({time.perf_counter() - start:.2f} s)"
+            )
+            return True
+
+    def _bevaka(self):
+        bevakare = Bevakare(
+            self.indata_mapp, self.intervall, self.lugn, signatur=self.lage.signatur if self.lage else None
+        )
+        for _ in bevakare.andringar(self._stopp):
+            self.ladda_om()
+
+    def starta_bevakning(self):
+        self._stopp.clear()
+        self._bevakare = threading.Thread(target=self._bevaka, name="bevakning", daemon=True)
+        self._bevakare.start()
+
+    def stoppa(self):
+        self._stopp.set()
+        if self._bevakare is not None:
+            self._bevakare.join()
+
+    def fraga(self, adress: str) -> Tuple[int, bytes]:
+        lage = self.lage
+        if lage is None:
+            return 503, Lage._kodad({"fel": "Datan är inte inläst"})
+        return lage.fraga(adress)
+
+
+class _Hanterare(BaseHTTPRequestHandler):
+    # Håll anslutningen öppen mellan frågor (Content-Length skickas alltid)
+    protocol_version = "HTTP/1.1"
+    # Rubriker och kropp skrivs var för sig; utan TCP_NODELAY väntar svaret på fördröjd ACK
+    disable_nagle_algorithm = True
+    tjanst: Fragetjanst = None
+
+    def do_GET(self):
+        status, kropp = self.tjanst.fraga(self.path)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(kropp)))
+        self.end_headers()
+        self.wfile.write(kropp)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def skapa_server(tjanst: Fragetjanst, port: int = STANDARDPORT, vard: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """HTTP-server (en tråd per anslutning) för tjänsten. Port 0 ger en ledig port."""
+    hanterare = type("Hanterare", (_Hanterare,), {"tjanst": tjanst})
+    server = ThreadingHTTPServer((vard, port), hanterare)
+    server.daemon_threads = True
+    return server
+
+
+def starta(
+    port: int = STANDARDPORT, intervall: float = 2.0, lugn: float = 5.0, indata_mapp: Optional[Path] = None,
+    cache_mapp: Optional[Path] = None, lasar: str = LASAR,
+):
+    """Läs in datan och svara på frågor tills processen avbryts (Ctrl+C)."""
+    tjanst = Fragetjanst(indata_mapp, cache_mapp, lasar=lasar, intervall=intervall, lugn=lugn)
+    tjanst.ladda_om()
+    tjanst.starta_bevakning()
+    server = skapa_server(tjanst, port)
+    print(f"🌐 Frågetjänsten svarar på http://127.0.0.1:{server.server_address[1]}/status (Ctrl+C avslutar)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        tjanst.stoppa()
+
+
+def provadresser(lage: Lage) -> List[str]:
+    """Adresser som täcker alla frågetyper för datan i läget."""
+    adresser = ["/skolor", "/arskurs", "/trosklar", "/trosklar?grans=11&per=skola,%C3%A5rskurs",
+                "/trosklar?grans=5&grans=15.5&matt=ogiltig&per=", "/trosklar?grans=11.05", "/skola/finns-inte"]
+    adresser += [f"/skola/{quote(s)}" for s in lage.skolor]
+    adresser += [f"/skola/{quote(s)}?per=klass" for s in lage.skolor]
+    adresser += [f"/arskurs/{quote(a)}" for a in lage.arskurser]
+    return adresser
+
+
+def belastningsprov(
+    tjanst: Fragetjanst, tradar: int = 8, anrop: int = 500, omladdningar: int = 3,
+    utskrift: Callable[[str], None] = print,
+) -> bool:
+    """
+    Samtidiga frågor mot en lokal server medan datan läses in på nytt.
+
+    Varje tråd har en egen anslutning och frågar adresserna från ``provadresser``
+    om och om igen. Svaren jämförs med svaren från en fråga i taget före provet;
+    samtidigt tvingas ``omladdningar`` omläsningar fram så att läget byts under
+    pågående frågor. Ger svarstider (median, 99:e percentilen) för upprepade frågor.
+
+    Returns:
+        True om alla svar var identiska med förväntat och inga fel uppstod
+    """
+    if tjanst.lage is None:
+        tjanst.ladda_om()
+    if tjanst.lage is None:
+        utskrift("⚠️ Ingen data att prova mot.")
+        return False
+
+    server = skapa_server(tjanst, port=0)
+    servertrad = threading.Thread(target=server.serve_forever, daemon=True)
+    servertrad.start()
+    port = server.server_address[1]
+
+    def hamta(anslutning: HTTPConnection, adress: str) -> Tuple[int, bytes]:
+        anslutning.request("GET", adress)
+        svar = anslutning.getresponse()
+        return svar.status, svar.read()
+
+    adresser = provadresser(tjanst.lage)
+    anslutning = HTTPConnection("127.0.0.1", port)
+    forvantat = {adress: hamta(anslutning, adress) for adress in adresser}
+    anslutning.close()
+
+    fel: List[str] = []
+    tider: List[float] = []
+    tider_las = threading.Lock()
+    start = threading.Barrier(tradar + 1)
+
+    def arbetare(nr: int):
+        egna_tider = []
+        anslutning = HTTPConnection("127.0.0.1", port)
+        start.wait()
+        try:
+            for i in range(anrop):
+                adress = adresser[(nr + i) % len(adresser)]
+                t0 = time.perf_counter()
+                svar = hamta(anslutning, adress)
+                egna_tider.append(time.perf_counter() - t0)
+                if svar != forvantat[adress]:
+                    fel.append(f"{adress}: {svar[0]} {svar[1][:80]!r}")
+        except Exception as e:
+            fel.append(f"tråd {nr}: {type(e).__name__}: {e}")
+        finally:
+            anslutning.close()
+        with tider_las:
+            tider.extend(egna_tider)
+
+    tradlista = [threading.Thread(target=arbetare, args=(nr,)) for nr in range(tradar)]
+    for trad in tradlista:
+        trad.start()
+    start.wait()
+    t_start = time.perf_counter()
+    for _ in range(omladdningar):
+        tjanst.ladda_om(tvinga=True)
+    for trad in tradlista:
+        trad.join()
+    total = time.perf_counter() - t_start
+    server.shutdown()
+    server.server_close()
+
+    if tider:
+        tider_ms = sorted(t * 1000 for t in tider)
+        p99 = tider_ms[min(len(tider_ms) - 1, int(len(tider_ms) * 0.99))]
+        utskrift(
+            f"⏱️ {len(tider)} frågor från {tradar} trådar på {total:.2f} s "
+            f"({len(tider) / total:.0f} frågor/s), median {statistics.median(tider_ms):.3f} ms, p99 {p99:.3f} ms, "
+            f"{omladdningar} omläsningar under provet"
+        )
+    for rad in fel[:10]:
+        utskrift(f"⚠️ {rad}")
+    if fel:
+        utskrift(f"⚠️ {len(fel)} avvikande svar eller fel")
+        return False
+    utskrift(f"✔️ Alla svar identiska med förväntat ({len(adresser)} adresser)")
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Lokal frågetjänst (JSON) över läsårets siffror")
+    parser.add_argument("--port", type=int, default=STANDARDPORT)
+    parser.add_argument("--intervall", type=float, default=2.0, help="Sekunder mellan kontroller av rådatamappen")
+    parser.add_argument("--lugn", type=float, default=5.0, help="Sekunder utan ändringar innan datan läses om")
+    parser.add_argument("--prov", action="store_true", help="Kör belastningsprovet i stället för att starta tjänsten")
+    parser.add_argument("--tradar", type=int, default=8, help="Samtidiga klienter i provet")
+    parser.add_argument("--anrop", type=int, default=500, help="Frågor per klient i provet")
+    args = parser.parse_args()
+
+    if args.prov:
+        sys.exit(0 if belastningsprov(Fragetjanst(), tradar=args.tradar, anrop=args.anrop) else 1)
+    starta(args.port, args.intervall, args.lugn)
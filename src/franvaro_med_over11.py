@@ -1,44 +1,75 @@
-import os
+import argparse
+from pathlib import Path
+from typing import Optional
+
 import pandas as pd
 from openpyxl import Workbook
-from openpyxl.utils.dataframe import dataframe_to_rows
-
-# === Sökvägar (rotmapp = 'franvaro') ===
-ROOT_DIR = "franvaro"
-OUTPUT_DIR = os.path.join(ROOT_DIR, "data", "output")
-os.makedirs(OUTPUT_DIR, exist_ok=True)
-
-# Läs in filen som works.py producerar
-INPUT_PATH = os.path.join(OUTPUT_DIR, "franvaro_rensad_kategoriserad.xlsx")
-df = pd.read_excel(INPUT_PATH, sheet_name="Rensad data")
-
-# Lägg till total frånvaro i procent
-df["total_franvaro_pct"] = 100 - df["närvaro_pct"]
-
-# Räkna antal elever med >11% total frånvaro
-antal_over_11 = (df["total_franvaro_pct"] > 11).sum()
-print(f"Antal elever med >11% total frånvaro: {antal_over_11}")
-
-# Skapa enkel Excel med resultatet
-wb = Workbook()
-ws = wb.active
-ws.title = "Sammanställning"
-ws.append(["Mått", "Antal"])
-ws.append([">11% total frånvaro", int(antal_over_11)])
-
-# (Valfritt) per årskurs också – bra vid uppföljning
-per_ak = (
-    df.assign(over11=df["total_franvaro_pct"] > 11)
-      .groupby("årskurs")["over11"]
-      .sum()
-      .reset_index()
-      .rename(columns={"over11": "Antal >11%"})
-)
-ws2 = wb.create_sheet("Per årskurs")
-for r in dataframe_to_rows(per_ak, index=False, header=True):
-    ws2.append(r)
-
-# Spara
-OUTPUT_PATH = os.path.join(OUTPUT_DIR, "franvaro_med_over11.xlsx")
-wb.save(OUTPUT_PATH)
-print(f"✔️ Klar! Filen sparades till {OUTPUT_PATH}")
+import matning
+from config_paths import OUTPUT_FRANVARO_DIR
+from trosklar import TroskelHistogram, las_rensad_data
+
+OVER11_FILNAMN = "franvaro_med_over11.xlsx"
+GRANS = 11
+
+
+def rakna_over_11(
+    df: Optional[pd.DataFrame] = None,
+    output_mapp: Optional[Path] = None,
+    histogram: Optional[TroskelHistogram] = None,
+) -> int:
+    """
+    Räkna elever med >11 % total frånvaro (totalt och per årskurs).
+
+    Args:
+        df: Rensad data från en pipelinekörning; annars läses den via cachen
+            (se ``trosklar.las_rensad_data``) i stället för att rapporten tolkas om
+        histogram: Färdigt histogram (t.ex. hopslaget från skolornas i strömmande läge); då behövs inte ``df``
+
+    Returns:
+        Antal elever med >11 % total frånvaro
+    """
+    if histogram is None:
+        if df is None:
+            with matning.steg("las_rensad_data") as post:
+                df = las_rensad_data()
+                post["rader"] = len(df)
+        with matning.steg("histogram") as post:
+            post["rader"] = len(df)
+            histogram = TroskelHistogram.fran_tabell(df)
+    kolumn = f"> {GRANS} %"
+
+    # Räkna antal elever med >11% total frånvaro
+    antal_over_11 = int(histogram.antal_over([GRANS], per=())[kolumn].iloc[0])
+    print(f"Antal elever med >11% total frånvaro: {antal_over_11}")
+
+    # Skapa enkel Excel med resultatet
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Sammanställning"
+    ws.append(["Mått", "Antal"])
+    ws.append([">11% total frånvaro", antal_over_11])
+
+    # (Valfritt) per årskurs också – bra vid uppföljning
+    per_ak = histogram.antal_over([GRANS])[kolumn]
+    ws2 = wb.create_sheet("Per årskurs")
+    ws2.append(["årskurs", "Antal >11%"])
+    for ak, antal in per_ak.items():
+        ws2.append([ak, int(antal)])
+
+    # Spara
+    output_mapp = output_mapp or OUTPUT_FRANVARO_DIR
+    output_mapp.mkdir(parents=True, exist_ok=True)
+    output_path = output_mapp / OVER11_FILNAMN
+    with matning.steg("spara_xlsx"):
+        wb.save(output_path)
+    print(f"✔️ Klar! Filen sparades till {output_path}")
+    return antal_over_11
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Räkna elever med >11 % total frånvaro")
+    parser.add_argument("--profil", action="store_true", help="Spara även en cProfile-dump av körningen")
+    parser.add_argument("--minne", action="store_true", help="Mät toppminne per steg (tracemalloc, långsammare)")
+    args = parser.parse_args()
+    with matning.Korningsrapport("over-threshold", OUTPUT_FRANVARO_DIR, minne=args.minne, profil=args.profil):
+        rakna_over_11()
@@ -0,0 +1,137 @@
+"""
+Läsårets frånvarodata som ett objekt för notebooks och egna skript.
+
+``FranvaroDataset`` samlar det pipelinen räknar fram bakom egenskaper som räknas
+ut först när de används och sedan sparas: en översikt kräver bara den rensade
+datan (via pipelinens cache), och råraderna läses bara om någon frågar efter dem.
+Vid varje åtkomst jämförs rådatamappens filsignatur (namn, storlek, ändringstid)
+med den vid förra uträkningen; har en rapport tillkommit, ändrats eller tagits
+bort räknas allt om vid nästa åtkomst.
+
+Användning (t.ex. i notebooks/, med ``sys.path.append("../src")``):
+    from franvarodata import FranvaroDataset
+    data = FranvaroDataset("2025-2026")
+    data.kommun                     # kommunens översikt per årskurs
+    data.skolor["Alpha"]            # en skolas översikt
+    data.antal_over([11, 20])       # antal elever över gränserna per årskurs
+    data.rensad                     # rensad elevtabell (schema.KOLUMNER)
+"""
+import functools
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import pandas as pd
+from bevakning import bygglas, filsignatur
+from config_paths import LASAR, processed_franvaro_dir, raw_franvaro_dir
+from summering import Kub
+from trosklar import STANDARDGRANSER, TroskelHistogram
+
+
+def _lat(berakna):
+    """Egenskap som räknas ut vid första åtkomsten och sparas tills rådatan ändras."""
+    namn = berakna.__name__
+
+    @functools.wraps(berakna)
+    def hamta(self):
+        self._kontrollera()
+        if namn not in self._varden:
+            self._varden[namn] = berakna(self)
+        return self._varden[namn]
+
+    return property(hamta)
+
+
+class FranvaroDataset:
+    """
+    Ett läsårs rådata, rensade data och översikter, uträknade vid behov.
+
+    Args:
+        lasar: Läsår YYYY-YYYY (standard: ``LASAR``)
+        indata_mapp: Mapp med skolrapporter (standard: läsårets rådatamapp)
+        cache_mapp: Pipelinens cache (standard: läsårets ``data/processed``-mapp)
+    """
+
+    def __init__(self, lasar: str = LASAR, indata_mapp: Optional[Path] = None, cache_mapp: Optional[Path] = None):
+        self.lasar = lasar
+        self.indata_mapp = Path(indata_mapp or raw_franvaro_dir(lasar))
+        self.cache_mapp = Path(cache_mapp or processed_franvaro_dir(lasar))
+        self._varden: Dict[str, object] = {}
+        self._signatur: Optional[tuple] = None
+
+    def _kontrollera(self):
+        signatur = filsignatur(self.indata_mapp)
+        if signatur != self._signatur:
+            self._varden.clear()
+            self._signatur = signatur
+
+    def glom(self):
+        """Släpp allt uträknat (räknas om vid nästa åtkomst även om rådatan är oförändrad)."""
+        self._varden.clear()
+
+    @property
+    def utraknat(self) -> List[str]:
+        """Egenskaperna som är uträknade och aktuella just nu."""
+        self._kontrollera()
+        return list(self._varden)
+
+    def __repr__(self) -> str:
+        return f"FranvaroDataset({self.lasar!r}, filer={len(self.filer)}, utraknat={self.utraknat})"
+
+    @_lat
+    def filer(self) -> List[Path]:
+        """Skolrapporterna i rådatamappen, i sorterad ordning."""
+        from busavsjo_samla_franvaro import hitta_rapportfiler
+
+        return hitta_rapportfiler(self.indata_mapp)
+
+    @_lat
+    def raa_rader(self) -> pd.DataFrame:
+        """Alla skolrapporters rader som de står i exporten, med skolan i kolumn 0 (som franvaro.xls)."""
+        from busavsjo_samla_franvaro import samla_franvarotabeller
+
+        tabell, _ = samla_franvarotabeller(self.filer)
+        return tabell
+
+    @_lat
+    def rensad(self) -> pd.DataFrame:
+        """Rensad elevtabell i det kompakta formatet; bara nya eller ändrade skolfiler tolkas (cachen)."""
+        from pipeline import bearbeta_med_cache
+        from tolkningscache import TolkningsCache
+
+        with bygglas(self.cache_mapp):
+            df, _, _ = bearbeta_med_cache(self.filer, TolkningsCache(self.cache_mapp, self.lasar))
+        return df
+
+    @_lat
+    def arskurser(self) -> pd.DataFrame:
+        """Vilken årskurs klassernas elever fått: en rad per (skola, klass, årskurs) med antal elever."""
+        return (
+            self.rensad.groupby(["skola", "klass", "årskurs"], observed=True, dropna=False)
+            .size().rename("elever").reset_index()
+        )
+
+    @_lat
+    def kub(self) -> Kub:
+        """Aggregeringskuben; alla översikter nedan är summeringar av den."""
+        return Kub.fran_tabell(self.rensad)
+
+    @_lat
+    def kommun(self) -> pd.DataFrame:
+        """Kommunens översikt per årskurs (som rapportens översiktsflik)."""
+        return self.kub.summeringar()[0]
+
+    @_lat
+    def skolor(self) -> Dict[str, pd.DataFrame]:
+        """{skola: skolans översikt per årskurs}, skolorna i sorterad ordning."""
+        return self.kub.summeringar()[1]
+
+    @_lat
+    def histogram(self) -> TroskelHistogram:
+        """Tröskelhistogrammet; ``antal_over`` är sedan en uppslagning per gräns."""
+        return TroskelHistogram.fran_tabell(self.rensad)
+
+    def antal_over(
+        self, trosklar: Iterable[float] = STANDARDGRANSER, matt: str = "total", per: Sequence[str] = ("årskurs",)
+    ) -> pd.DataFrame:
+        """Antal elever över gränserna (se ``TroskelHistogram.antal_over``)."""
+        return self.histogram.antal_over(trosklar, matt, per)
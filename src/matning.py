@@ -0,0 +1,190 @@
+"""
+Mätning av körningar: väggtid, CPU-tid, toppminne och rader/s per steg och skolfil.
+
+Ett kommando öppnar en ``Korningsrapport``; koden i flödet markerar sina steg med
+``matning.steg(...)``. Utan aktiv rapport gör ``steg`` ingenting, så funktionerna
+kan anropas som vanligt från andra skript. Rapporten sparas som JSON i
+``<output>/korningar/`` och kan kompletteras med en cProfile-dump (``.prof``).
+
+    with Korningsrapport("collect", OUTPUT_FRANVARO_DIR, profil=args.profil):
+        busavsjo_samla_franvarorapporter()
+
+Processens högsta RSS efter varje steg sparas alltid (där ``resource`` finns).
+Med ``minne=True`` mäts dessutom varje stegs eget toppminne med tracemalloc, som
+topp över minnet vid stegets start; det gör körningen flera gånger långsammare.
+Steg kan nästlas (t.ex. "arskurs" inom "rensa").
+"""
+import cProfile
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+_aktiv: Optional["Korningsrapport"] = None
+
+
+def _rss_topp_mb() -> Optional[float]:
+    """Processens högsta RSS hittills (ru_maxrss är kB på Linux, byte på macOS)."""
+    if resource is None:
+        return None
+    topp = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return topp / 2**20 if sys.platform == "darwin" else topp / 2**10
+
+
+class Korningsrapport:
+    """Samlar mätpunkter för en körning och sparar dem när ``with``-blocket lämnas."""
+
+    def __init__(self, kommando: str, output_mapp: Path, minne: bool = False, profil: bool = False):
+        self.kommando = kommando
+        self.output_mapp = output_mapp
+        self.minne = minne
+        self.profil = profil
+        self.poster: List[dict] = []
+        self._oppna: List[dict] = []
+        self._profiler = None
+        self._startade_tracemalloc = False
+        self.sokvag: Optional[Path] = None
+
+    def __enter__(self):
+        global _aktiv
+        _aktiv = self
+        self.start = datetime.now()
+        if self.minne and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._startade_tracemalloc = True
+        if self.profil:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        self._total = self.steg(self.kommando)
+        self._total.__enter__()
+        return self
+
+    def __exit__(self, typ, varde, tb):
+        global _aktiv
+        self._total.__exit__(typ, varde, tb)
+        if self._profiler is not None:
+            self._profiler.disable()
+        if self._startade_tracemalloc:
+            tracemalloc.stop()
+        _aktiv = None
+        self.spara(fel=None if typ is None else f"{typ.__name__}: {varde}")
+        return False
+
+    def _minne_start(self) -> int:
+        if not self.minne:
+            return 0
+        nu, topp = tracemalloc.get_traced_memory()
+        for post in self._oppna:
+            post["_topp"] = max(post["_topp"], topp)
+        tracemalloc.reset_peak()
+        return nu
+
+    @contextmanager
+    def steg(self, namn: str, skola: Optional[str] = None):
+        """Mät ett steg. Posten som ges ut kan få ``rader`` satt inne i blocket."""
+        post = {"steg": namn, "skola": skola, "nivå": len(self._oppna)}
+        self.poster.append(post)
+        post["_start_minne"] = self._minne_start()
+        post["_topp"] = 0
+        self._oppna.append(post)
+        start_vagg, start_cpu = time.perf_counter(), time.process_time()
+        try:
+            yield post
+        finally:
+            post["vägg_s"] = time.perf_counter() - start_vagg
+            post["cpu_s"] = time.process_time() - start_cpu
+            post["rss_topp_mb"] = _rss_topp_mb()
+            self._oppna.pop()
+            if self.minne:
+                topp = max(post["_topp"], tracemalloc.get_traced_memory()[1])
+                for oppen in self._oppna:
+                    oppen["_topp"] = max(oppen["_topp"], topp)
+                tracemalloc.reset_peak()
+                post["minne_topp_mb"] = max(0, topp - post["_start_minne"]) / 2**20
+            del post["_start_minne"], post["_topp"]
+
+    def lagg_till(self, post: dict):
+        """Lägg till en post som mätts i en annan process (se ``mat_anrop``)."""
+        post["nivå"] = len(self._oppna)
+        self.poster.append(post)
+
+    def spara(self, fel: Optional[str] = None) -> Path:
+        poster = []
+        for post in self.poster:
+            post = dict(post)
+            if post.get("rader") is not None and post.get("vägg_s"):
+                post["rader_per_s"] = post["rader"] / post["vägg_s"]
+            poster.append(post)
+
+        rapport = {
+            "kommando": self.kommando,
+            "start": self.start.isoformat(timespec="seconds"),
+            "argv": sys.argv,
+            "python": platform.python_version(),
+            "processorer": os.cpu_count(),
+            "fel": fel,
+            "steg": poster,
+        }
+        mapp = self.output_mapp / "korningar"
+        mapp.mkdir(parents=True, exist_ok=True)
+        namn = f"{self.kommando}_{self.start.strftime('%Y%m%d-%H%M%S')}"
+        self.sokvag = mapp / f"{namn}.json"
+        self.sokvag.write_text(json.dumps(rapport, indent=2, ensure_ascii=False), encoding="utf-8")
+        if self._profiler is not None:
+            self._profiler.dump_stats(str(mapp / f"{namn}.prof"))
+        print(f"⏱️ Körningsrapport: {self.sokvag}")
+        return self.sokvag
+
+
+def aktiv() -> Optional[Korningsrapport]:
+    return _aktiv
+
+
+def steg(namn: str, skola: Optional[str] = None):
+    """``with steg("tolka") as post: ...``, eller ingenting om ingen rapport är aktiv."""
+    if _aktiv is None:
+        return nullcontext({})
+    return _aktiv.steg(namn, skola)
+
+
+def lagg_till(post: Optional[dict]):
+    if _aktiv is not None and post is not None:
+        _aktiv.lagg_till(post)
+
+
+def mat_anrop(namn: str, skola: Optional[str], minne: bool, funktion: Callable, *args):
+    """
+    Kör ``funktion(*args)`` i en arbetsprocess och mät den.
+
+    Returns:
+        (resultat, post) där posten läggs till i rapporten med ``lagg_till`` i huvudprocessen
+    """
+    if minne:
+        tracemalloc.start()
+        tracemalloc.reset_peak()
+        start_minne = tracemalloc.get_traced_memory()[0]
+    start_vagg, start_cpu = time.perf_counter(), time.process_time()
+    resultat = funktion(*args)
+    post = {
+        "steg": namn,
+        "skola": skola,
+        "vägg_s": time.perf_counter() - start_vagg,
+        "cpu_s": time.process_time() - start_cpu,
+        "pid": os.getpid(),
+        "rss_topp_mb": _rss_topp_mb(),
+    }
+    if minne:
+        post["minne_topp_mb"] = max(0, tracemalloc.get_traced_memory()[1] - start_minne) / 2**20
+        tracemalloc.stop()
+    return resultat, post
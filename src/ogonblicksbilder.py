@@ -0,0 +1,316 @@
+"""
+Ögonblicksbilder av rensad elevdata över tid, och förändringar mellan dem.
+
+Varje körning kan spara den rensade tabellen som en egen partition:
+
+    data/processed/ogonblicksbilder/lasar=<läsår>/exportdatum=<YYYY-MM-DD>/elever.parquet
+
+Exportdatum tas från "Utskriftsdatum:" i skolrapporternas rubrik. Bredvid
+varje partition sparas ett fingeravtryck av innehållet: samma export körd igen
+hoppas över, men har innehållet ändrats (t.ex. en skola exporterade om samma
+dag, eller bevakningen byggde innan alla filer kommit) skrivs partitionen om.
+
+``forandringar`` jämför en ögonblicksbild med den närmast föregående och läser
+bara de två partitionerna. Den ger eleverna (nyckel: ``elev_id``) som bytt
+kategori i översikten (total eller ogiltig frånvaro), passerat 11 %, tillkommit
+eller försvunnit, med en riktning per förändring.
+
+Användning:
+    python ogonblicksbilder.py --status
+    python ogonblicksbilder.py --forandringar [--datum 2026-03-02] [--bara-okning]
+"""
+import argparse
+import hashlib
+import re
+import sys
+from datetime import date
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+from config_paths import LASAR, OUTPUT_FRANVARO_DIR, PROCESSED_DATA_DIR
+from elever import TOM_NYCKEL, elevnycklar, lasarets_referensar
+from summering import kategorisera
+
+OGONBLICK_DIR = PROCESSED_DATA_DIR / "ogonblicksbilder"
+FILNAMN = "elever.parquet"
+AVTRYCK_FILNAMN = "avtryck.txt"
+FORANDRINGAR_FILNAMN = "franvaro_forandringar.xlsx"
+GRANS = 11
+
+_UTSKRIFTSDATUM = re.compile(r"Utskriftsdatum:\s*(\d{4}-\d{2}-\d{2})")
+
+# Kolumner som behövs för att jämföra två ögonblicksbilder
+JAMFOR_KOLUMNER = ["personnr", "namn", "skola", "klass", "årskurs", "närvaro_pct", "ogiltig_frånvaro_pct"]
+
+
+def las_exportdatum(filer: Iterable[Path]) -> Optional[date]:
+    """
+    Senaste "Utskriftsdatum:" i skolrapporternas rubrikrader (None om inget hittas).
+
+    Filer vars rubrik inte kan läsas eller saknar datum varnas det för.
+    """
+    from busavsjo_samla_franvaro import RUBRIKRADER
+    from xlslasare import las_blad
+
+    datum, utan_datum = [], []
+    for filvag in filer:
+        try:
+            rubrik = las_blad(filvag, sista_rad=RUBRIKRADER)
+        except Exception as e:
+            print(f"⚠️ Kunde inte läsa rubriken i {filvag.name}: {e}")
+            utan_datum.append(filvag.name)
+            continue
+        fil_datum = [
+            date.fromisoformat(match.group(1))
+            for match in map(_UTSKRIFTSDATUM.search, map(str, rubrik.to_numpy().ravel()))
+            if match
+        ]
+        if fil_datum:
+            datum.extend(fil_datum)
+        else:
+            utan_datum.append(filvag.name)
+    if utan_datum:
+        print(f"⚠️ Inget Utskriftsdatum i {len(utan_datum)} rapporter: {', '.join(utan_datum)}")
+    return max(datum) if datum else None
+
+
+def innehallsavtryck(df: pd.DataFrame) -> str:
+    """SHA-256 av tabellens värden (inte index), för att se om en ögonblicksbild ändrats."""
+    h = hashlib.sha256(",".join(map(str, df.columns)).encode("utf-8"))
+    h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def _nivå(kategori: pd.Series) -> np.ndarray:
+    """Kategorins position (-1 för ingen kategori) så att två kategorier kan jämföras."""
+    return kategori.cat.codes.to_numpy()
+
+
+def _riktning(steg: np.ndarray) -> np.ndarray:
+    """"upp", "ned" eller "" (oförändrad) per elev."""
+    return np.select([steg > 0, steg < 0], ["upp", "ned"], default="")
+
+
+class OgonblicksLager:
+    """Partitionerat Parquet-lager med en ögonblicksbild per (läsår, exportdatum)."""
+
+    def __init__(self, mapp: Optional[Path] = None):
+        self.mapp = Path(mapp or OGONBLICK_DIR)
+
+    def _partition(self, lasar: str, exportdatum: date) -> Path:
+        return self.mapp / f"lasar={lasar}" / f"exportdatum={exportdatum.isoformat()}"
+
+    def datum(self, lasar: str) -> List[date]:
+        """Exportdatum med sparad ögonblicksbild för läsåret, i ordning."""
+        lasar_mapp = self.mapp / f"lasar={lasar}"
+        if not lasar_mapp.is_dir():
+            return []
+        datum = []
+        for mapp in lasar_mapp.iterdir():
+            if mapp.name.startswith("exportdatum=") and (mapp / FILNAMN).exists():
+                datum.append(date.fromisoformat(mapp.name.split("=", 1)[1]))
+        return sorted(datum)
+
+    def spara(self, df: pd.DataFrame, lasar: str, exportdatum: date) -> Optional[Path]:
+        """
+        Spara en ögonblicksbild (``elev_id`` ska vara unika).
+
+        Finns partitionen redan med samma innehåll görs ingenting; har innehållet
+        ändrats skrivs den över.
+
+        Returns:
+            Sökväg till den skrivna filen, eller None om den redan fanns oförändrad
+        """
+        partition = self._partition(lasar, exportdatum)
+        filvag = partition / FILNAMN
+        avtrycksfil = partition / AVTRYCK_FILNAMN
+        df = df.reset_index(drop=True)
+        avtryck = innehallsavtryck(df)
+        if filvag.exists() and avtrycksfil.exists() and avtrycksfil.read_text(encoding="utf-8") == avtryck:
+            return None
+
+        partition.mkdir(parents=True, exist_ok=True)
+        tmp = filvag.with_suffix(".tmp")
+        df.to_parquet(tmp, index=False)
+        tmp.replace(filvag)
+        avtrycksfil.write_text(avtryck, encoding="utf-8")
+        return filvag
+
+    def las(self, lasar: str, exportdatum: date, kolumner: Optional[List[str]] = None) -> pd.DataFrame:
+        return pd.read_parquet(self._partition(lasar, exportdatum) / FILNAMN, columns=kolumner)
+
+    def las_jamforelse(self, lasar: str, exportdatum: date) -> pd.DataFrame:
+        """``JAMFOR_KOLUMNER`` och ``elev_id`` (tolkas ur personnr i bilder sparade innan nyckeln fanns)."""
+        import pyarrow.parquet as pq
+
+        filvag = self._partition(lasar, exportdatum) / FILNAMN
+        if "elev_id" in pq.read_schema(filvag).names:
+            return self.las(lasar, exportdatum, JAMFOR_KOLUMNER + ["elev_id"])
+        df = self.las(lasar, exportdatum, JAMFOR_KOLUMNER)
+        df["elev_id"] = elevnycklar(df["personnr"], lasarets_referensar(lasar))["elev_id"]
+        return df[df["elev_id"] != TOM_NYCKEL]
+
+    def forandringar(
+        self, lasar: str, datum: Optional[date] = None, bara_okning: bool = False
+    ) -> Optional[pd.DataFrame]:
+        """
+        Elever som bytt kategori, passerat 11 %, tillkommit eller försvunnit sedan föregående ögonblicksbild.
+
+        Args:
+            datum: Ögonblicksbilden att jämföra (standard: senaste)
+            bara_okning: Bara elever vars total eller ogiltiga frånvaro ökat över en gräns,
+                och nya elever som ligger över 11 %
+
+        Returns:
+            En rad per elev med värden och kategorier före/nu, ``status`` ("kvar", "ny"
+            eller "borttagen") och en riktning ("upp", "ned" eller tom) per förändring,
+            eller None om det inte finns någon föregående ögonblicksbild
+        """
+        alla = self.datum(lasar)
+        if datum is None and alla:
+            datum = alla[-1]
+        tidigare = [d for d in alla if datum is not None and d < datum]
+        if datum not in alla or not tidigare:
+            return None
+        fore_datum = tidigare[-1]
+
+        fore = self.las_jamforelse(lasar, fore_datum)
+        nu = self.las_jamforelse(lasar, datum)
+        par = nu.merge(fore, on="elev_id", how="outer", suffixes=("", "_före"), indicator=True)
+        status = np.select(
+            [par["_merge"] == "left_only", par["_merge"] == "right_only"], ["ny", "borttagen"], default="kvar"
+        )
+        kvar = status == "kvar"
+        # Borttagna elever finns bara i den föregående bilden
+        identitet = {
+            kol: par[kol].astype(object).where(par[kol].notna(), par[f"{kol}_före"].astype(object))
+            for kol in ["personnr", "namn", "skola", "klass", "årskurs"]
+        }
+
+        kat_nu = kategorisera(par)
+        kat_fore = kategorisera(pd.DataFrame({
+            "närvaro_pct": par["närvaro_pct_före"],
+            "ogiltig_frånvaro_pct": par["ogiltig_frånvaro_pct_före"],
+        }))
+        total_nu = 100 - par["närvaro_pct"].astype(float)
+        total_fore = 100 - par["närvaro_pct_före"].astype(float)
+
+        # Stegen jämför bara elever som finns i båda bilderna
+        steg_total = np.where(kvar, np.sign(_nivå(kat_nu["total_kategori"]) - _nivå(kat_fore["total_kategori"])), 0)
+        steg_ogiltig = np.where(
+            kvar, np.sign(_nivå(kat_nu["ogiltig_kategori"]) - _nivå(kat_fore["ogiltig_kategori"])), 0
+        )
+        over_nu = (total_nu > GRANS).to_numpy()
+        over_fore = (total_fore > GRANS).to_numpy()
+        steg_grans = np.where(kvar, over_nu.astype(int) - over_fore.astype(int), 0)
+
+        if bara_okning:
+            valda = (steg_total > 0) | (steg_ogiltig > 0) | (steg_grans > 0) | ((status == "ny") & over_nu)
+        else:
+            valda = (steg_total != 0) | (steg_ogiltig != 0) | (steg_grans != 0) | ~kvar
+
+        resultat = pd.DataFrame({
+            **identitet,
+            "status": status,
+            "total_före": total_fore.round(2),
+            "total_nu": total_nu.round(2),
+            "total_kategori_före": kat_fore["total_kategori"],
+            "total_kategori_nu": kat_nu["total_kategori"],
+            "riktning_total": _riktning(steg_total),
+            "ogiltig_före": par["ogiltig_frånvaro_pct_före"].astype(float).round(2),
+            "ogiltig_nu": par["ogiltig_frånvaro_pct"].astype(float).round(2),
+            "ogiltig_kategori_före": kat_fore["ogiltig_kategori"],
+            "ogiltig_kategori_nu": kat_nu["ogiltig_kategori"],
+            "riktning_ogiltig": _riktning(steg_ogiltig),
+            f"över_{GRANS}_före": over_fore,
+            f"över_{GRANS}_nu": over_nu,
+            f"riktning_{GRANS}": _riktning(steg_grans),
+        })[valda]
+        resultat.attrs["före"] = fore_datum
+        resultat.attrs["nu"] = datum
+        return resultat.sort_values(["skola", "klass", "namn"]).reset_index(drop=True)
+
+
+def spara_ogonblicksbild(
+    df: pd.DataFrame, filer: Iterable[Path], lasar: str = LASAR, lager: Optional[OgonblicksLager] = None
+) -> Optional[Path]:
+    """Spara den rensade tabellen med exportdatum från skolrapporterna (annars dagens datum, med en varning)."""
+    lager = lager or OgonblicksLager()
+    exportdatum = las_exportdatum(filer)
+    if exportdatum is None:
+        exportdatum = date.today()
+        print(f"⚠️ Hittade inget Utskriftsdatum i rapporterna, ögonblicksbilden sparas med dagens datum ({exportdatum})")
+    fanns = exportdatum in lager.datum(lasar)
+
+    # Rader utan personnummer kan inte följas mellan bilderna
+    utan_personnr = df["elev_id"] == TOM_NYCKEL
+    if utan_personnr.any():
+        print(f"⚠️ {int(utan_personnr.sum())} rader saknar personnummer och sparas inte i ögonblicksbilden")
+        df = df[~utan_personnr]
+    dubbletter = df["elev_id"].duplicated(keep="first")
+    if dubbletter.any():
+        print(f"⚠️ {int(dubbletter.sum())} elever finns på flera rader, behåller första raden")
+        df = df[~dubbletter]
+
+    filvag = lager.spara(df, lasar, exportdatum)
+    if filvag is None:
+        print(f"📸 Ögonblicksbild för {exportdatum} finns redan med samma innehåll, sparas inte igen")
+    elif fanns:
+        print(f"📸 Skrev om ögonblicksbild {exportdatum} med ändrat innehåll ({len(df)} elever)")
+    else:
+        print(f"📸 Sparade ögonblicksbild {exportdatum} ({len(df)} elever)")
+    return filvag
+
+
+def skriv_forandringar(forandringar: pd.DataFrame, output_path: Path):
+    from openpyxl import Workbook
+    from rapport import skriv_tabell_blad
+
+    tabell = forandringar.copy()
+    # Kategorier som text och saknade värden (t.ex. "nu" för borttagna elever) som tomma celler
+    for kol in tabell.columns:
+        if isinstance(tabell[kol].dtype, pd.CategoricalDtype) or tabell[kol].isna().any():
+            tabell[kol] = tabell[kol].astype(object).where(tabell[kol].notna(), None)
+    wb = Workbook(write_only=True)
+    skriv_tabell_blad(wb, f"{forandringar.attrs['före']} - {forandringar.attrs['nu']}", tabell)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    wb.save(str(output_path))
+
+
+def kor_forandringar(
+    lasar: str = LASAR, datum: Optional[date] = None, bara_okning: bool = False,
+    output_mapp: Optional[Path] = None, lager: Optional[OgonblicksLager] = None,
+) -> Optional[pd.DataFrame]:
+    """Skriv ``franvaro_forandringar.xlsx`` med förändringarna sedan föregående ögonblicksbild."""
+    lager = lager or OgonblicksLager()
+    forandringar = lager.forandringar(lasar, datum, bara_okning=bara_okning)
+    if forandringar is None:
+        print(f"⚠️ Behöver minst två ögonblicksbilder för {lasar} (finns: {len(lager.datum(lasar))})")
+        return None
+
+    output_path = (output_mapp or OUTPUT_FRANVARO_DIR) / FORANDRINGAR_FILNAMN
+    skriv_forandringar(forandringar, output_path)
+    print(
+        f"✔️ {len(forandringar)} elever har bytt kategori eller passerat {GRANS} % mellan "
+        f"{forandringar.attrs['före']} och {forandringar.attrs['nu']}. Sparades till {output_path}"
+    )
+    return forandringar
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ögonblicksbilder och förändringar mellan dem")
+    parser.add_argument("--lasar", default=LASAR)
+    parser.add_argument("--status", action="store_true", help="Visa sparade ögonblicksbilder")
+    parser.add_argument("--forandringar", action="store_true", help="Förändringar sedan föregående bild")
+    parser.add_argument("--datum", type=date.fromisoformat, default=None, help="Bild att jämföra (YYYY-MM-DD)")
+    parser.add_argument("--bara-okning", action="store_true", help="Bara elever vars frånvaro ökat")
+    args = parser.parse_args()
+
+    if args.forandringar:
+        if kor_forandringar(args.lasar, args.datum, args.bara_okning) is None:
+            sys.exit(1)
+    else:
+        datum = OgonblicksLager().datum(args.lasar)
+        print(f"📸 {len(datum)} ögonblicksbilder för {args.lasar}: {', '.join(map(str, datum)) or 'inga'}")
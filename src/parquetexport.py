@@ -0,0 +1,116 @@
+"""
+Kolumnär export av rensad data och översikter (Parquet, valfritt Arrow IPC).
+
+Skrivs till ``data/output/<läsår>/parquet/``:
+
+    elever/skola=<skola>/del-0.parquet     rensade elevrader (``schema.KOLUMNER``)
+    oversikt/skola=<skola>/del-0.parquet   skolans översikt per årskurs
+    oversikt_kommun.parquet                kommunens översikt per årskurs
+    elever.arrow                           alla elevrader som Arrow IPC (med ``arrow=True``)
+
+Mapparna är partitionerade i Hive-stil, så pyarrow, DuckDB, Polars och Power BI
+får ``skola`` som kolumn och kan läsa en skolas del utan att öppna resten. Typerna
+följer ``schema.SCHEMA``: kategorier som dictionary och tolkade mätvärden som tal.
+Arrow-filen är okomprimerad och minnesmappas av ``las_arrow`` utan kopiering.
+
+Exporten skrivs i en tillfällig mapp som sedan byter plats med den gamla. En
+läsare ser alltså aldrig en halvskriven export, och skolor som försvunnit tas bort.
+
+Användning:
+    franvaro all --parquet [--arrow]
+
+Från Python:
+    from parquetexport import las_elever, las_arrow
+    df = las_elever(skola="Alpha")          # bara Alphas partition läses
+    tabell = las_arrow()                    # pyarrow.Table, minnesmappad
+"""
+import shutil
+from pathlib import Path
+from typing import List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+from config_paths import OUTPUT_FRANVARO_DIR
+from summering import Kub
+
+EXPORTMAPP = "parquet"
+ELEVMAPP = "elever"
+OVERSIKTMAPP = "oversikt"
+KOMMUN_FILNAMN = "oversikt_kommun.parquet"
+ARROW_FILNAMN = "elever.arrow"
+DELNAMN = "del-{i}.parquet"
+
+
+def _skriv_partitionerad(df: pd.DataFrame, mapp: Path):
+    tabell = pa.Table.from_pandas(df, preserve_index=False)
+    pq.write_to_dataset(tabell, mapp, partition_cols=["skola"], basename_template=DELNAMN)
+
+
+def exportera(df: pd.DataFrame, output_mapp: Path, kub: Optional[Kub] = None, arrow: bool = False) -> Path:
+    """
+    Skriv elevraderna och översikterna som Parquet (och ev. Arrow IPC).
+
+    Args:
+        df: Rensad tabell i det kompakta formatet
+        kub: Aggregeringskuben för översikterna (byggs från ``df`` om den inte skickas med)
+        arrow: Skriv även ``elever.arrow``
+
+    Returns:
+        Exportmappen
+    """
+    mapp = output_mapp / EXPORTMAPP
+    tmp = output_mapp / f".{EXPORTMAPP}.tmp"
+    gammal = output_mapp / f".{EXPORTMAPP}.old"
+    for rest in (tmp, gammal):
+        shutil.rmtree(rest, ignore_errors=True)
+    tmp.mkdir(parents=True)
+
+    kub = kub if kub is not None else Kub.fran_tabell(df)
+    _skriv_partitionerad(df, tmp / ELEVMAPP)
+    _skriv_partitionerad(kub.oversikt(["skola", "årskurs"]).reset_index(), tmp / OVERSIKTMAPP)
+    kub.oversikt(["årskurs"]).reset_index().to_parquet(tmp / KOMMUN_FILNAMN, index=False)
+    if arrow:
+        feather.write_feather(
+            pa.Table.from_pandas(df, preserve_index=False), str(tmp / ARROW_FILNAMN), compression="uncompressed"
+        )
+
+    if mapp.exists():
+        mapp.rename(gammal)
+    tmp.rename(mapp)
+    shutil.rmtree(gammal, ignore_errors=True)
+    return mapp
+
+
+def _skola_forst(df: pd.DataFrame) -> pd.DataFrame:
+    """Partitionskolumnen läses in sist; lägg den först igen som i ``schema.KOLUMNER``."""
+    if "skola" not in df:
+        return df
+    return df[["skola"] + [kol for kol in df.columns if kol != "skola"]]
+
+
+def las_elever(
+    output_mapp: Optional[Path] = None, skola: Optional[str] = None, kolumner: Optional[List[str]] = None
+) -> pd.DataFrame:
+    """Elevrader ur exporten; med ``skola`` läses bara den skolans partition."""
+    mapp = (output_mapp or OUTPUT_FRANVARO_DIR) / EXPORTMAPP / ELEVMAPP
+    filter_ = [("skola", "=", skola)] if skola is not None else None
+    return _skola_forst(pq.read_table(mapp, columns=kolumner, filters=filter_, partitioning="hive").to_pandas())
+
+
+def las_oversikt(output_mapp: Optional[Path] = None, skola: Optional[str] = None) -> pd.DataFrame:
+    """Översikten per årskurs för en skola, eller kommunens om ``skola`` inte anges."""
+    mapp = (output_mapp or OUTPUT_FRANVARO_DIR) / EXPORTMAPP
+    if skola is None:
+        return pd.read_parquet(mapp / KOMMUN_FILNAMN)
+    return _skola_forst(
+        pq.read_table(mapp / OVERSIKTMAPP, filters=[("skola", "=", skola)], partitioning="hive").to_pandas()
+    )
+
+
+def las_arrow(output_mapp: Optional[Path] = None) -> pa.Table:
+    """Alla elevrader ur ``elever.arrow``, minnesmappade (buffertarna pekar direkt in i filen)."""
+    filvag = (output_mapp or OUTPUT_FRANVARO_DIR) / EXPORTMAPP / ARROW_FILNAMN
+    with pa.memory_map(str(filvag), "r") as fil:
+        return pa.ipc.open_file(fil).read_all()
@@ -0,0 +1,326 @@
+"""
+Hela flödet i ett steg: samla skolrapporter, tolka, rensa och skapa rapport.
+
+Raderna skickas direkt från insamlingen till tolkningen i minnet, så ingen
+franvaro.xls behöver skrivas och läsas tillbaka (och xlwt:s gräns på 65 536
+rader per blad gäller inte). franvaro.xls kan fortfarande sparas för felsökning.
+
+Med cache (standard) tolkas och rensas varje skolfil för sig och resultatet
+sparas i ``data/processed``; oförändrade filer läses direkt från cachen.
+
+Med ``--strommande`` bearbetas en skolfil i taget i stället (``strommande``).
+
+Användning: python pipeline.py [--parallellt] [--utan-cache] [--spara-franvaro-xls] [--rensad-lista] [--delad-rapport]
+            [--parquet] [--arrow]
+            python pipeline.py --strommande [--utan-cache] [--rensad-lista]
+"""
+import argparse
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Optional
+
+import pandas as pd
+import matning
+from config_paths import LASAR, RAW_FRANVARO_DIR, OUTPUT_FRANVARO_DIR, PROCESSED_FRANVARO_DIR
+from analys import rensa_franvaro
+from elever import varna_for_dubbletter
+from rapport import RAPPORT_FILNAMN, skapa_rapport
+from busavsjo_samla_franvaro import (
+    hitta_rapportfiler, las_skolrapport, samla_franvarotabeller, skriv_franvaro_xls, sla_ihop_tabeller
+)
+from schema import sla_ihop, tom_tabell
+from summering import KUB_FILNAMN, Kub
+from tolkning import tolka_franvaro
+from tolkningscache import TolkningsCache
+from xlslasare import las_blad
+
+
+def bearbeta_skolrapport(filvag: Path, lasar: str = LASAR) -> pd.DataFrame:
+    """Läs, tolka och rensa en enskild skolrapport från läsåret ``lasar``."""
+    with matning.steg("bearbeta_skolrapport", skola=filvag.stem) as post:
+        tabell = sla_ihop_tabeller([(filvag.stem, las_skolrapport(filvag, utan_tomma_rader=True))])
+        post["rader"] = len(tabell)
+        df = tolka_franvaro(tabell)
+        if df.empty:
+            return tom_tabell()
+        return rensa_franvaro(df, lasar)
+
+
+def bearbeta_med_cache(
+    filer: List[Path], cache: TolkningsCache, parallellt: bool = False, max_workers: Optional[int] = None
+) -> tuple:
+    """
+    Rensade elevrader för alla filer; bara nya eller ändrade filer tolkas
+    (för cachens läsår).
+
+    Returns:
+        (rensad tabell i filernas ordning, antal tolkade filer, antal filer från cachen)
+    """
+    delar = {}
+    att_tolka = []
+    for filvag in filer:
+        with matning.steg("cache", skola=filvag.stem) as post:
+            df_s = cache.hamta(filvag)
+            post["rader"] = None if df_s is None else len(df_s)
+        if df_s is None:
+            att_tolka.append(filvag)
+        else:
+            delar[filvag] = df_s
+
+    if parallellt and len(att_tolka) > 1:
+        rapport = matning.aktiv()
+        minne = rapport is not None and rapport.minne
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            framtider = [
+                (filvag, pool.submit(
+                    matning.mat_anrop, "bearbeta_skolrapport", filvag.stem, minne, bearbeta_skolrapport,
+                    filvag, cache.lasar,
+                ))
+                for filvag in att_tolka
+            ]
+            nya = []
+            for filvag, framtid in framtider:
+                try:
+                    df_s, post = framtid.result()
+                except Exception as e:
+                    print(f"⚠️ Kunde inte läsa {filvag.name}: {e}")
+                    continue
+                post["rader"] = len(df_s)
+                matning.lagg_till(post)
+                nya.append((filvag, df_s))
+    else:
+        nya = []
+        for filvag in att_tolka:
+            try:
+                nya.append((filvag, bearbeta_skolrapport(filvag, cache.lasar)))
+            except Exception as e:
+                print(f"⚠️ Kunde inte läsa {filvag.name}: {e}")
+
+    for filvag, df_s in nya:
+        cache.spara(filvag, df_s)
+        delar[filvag] = df_s
+
+    cache.rensa_inaktuella(filer)
+    cache.skriv_index()
+
+    icke_tomma = [delar[filvag] for filvag in filer if filvag in delar and not delar[filvag].empty]
+    return sla_ihop(icke_tomma), len(nya), len(delar) - len(nya)
+
+
+def skriv_rapport_och_kub(
+    df: pd.DataFrame,
+    output_mapp: Path,
+    delad_rapport: bool = False,
+    max_workers: Optional[int] = None,
+    parquet: bool = False,
+    arrow: bool = False,
+) -> Kub:
+    """
+    Bygg aggregeringskuben en gång, spara den och skriv rapporten utifrån den.
+
+    Med ``delad_rapport`` skrivs en arbetsbok per skola och en för kommunen
+    (``skolrapporter``) i stället för den sammanslagna rapporten. Med ``parquet``
+    (eller ``arrow``) exporteras även elevraderna och översikterna kolumnärt
+    (``parquetexport``).
+    """
+    output_mapp.mkdir(parents=True, exist_ok=True)
+    with matning.steg("kub") as post:
+        post["rader"] = len(df)
+        kub = Kub.fran_tabell(df)
+        kub.spara(output_mapp / KUB_FILNAMN)
+
+    if parquet or arrow:
+        from parquetexport import exportera
+
+        with matning.steg("parquet") as post:
+            post["rader"] = len(df)
+            mapp = exportera(df, output_mapp, kub=kub, arrow=arrow)
+        print(f"✔️ Exporterade Parquet{' och Arrow' if arrow else ''} till {mapp}")
+
+    if delad_rapport:
+        from skolrapporter import SKOLMAPP, skapa_delade_rapporter
+
+        with matning.steg("rapport"):
+            skrivna, oforandrade = skapa_delade_rapporter(df, output_mapp, kub=kub, max_workers=max_workers)
+        print(f"✔️ Klar! Skrev {skrivna} arbetsböcker till {output_mapp} och {output_mapp / SKOLMAPP} "
+              f"({oforandrade} oförändrade)")
+        return kub
+
+    output_path = output_mapp / RAPPORT_FILNAMN
+    with matning.steg("rapport"):
+        skapa_rapport(df, output_path, kub=kub)
+    print(f"✔️ Klar! Filen sparades till {output_path}")
+    return kub
+
+
+def analysera_franvaro_xls(
+    input_path: Optional[Path] = None,
+    output_mapp: Optional[Path] = None,
+    delad_rapport: bool = False,
+    parquet: bool = False,
+    arrow: bool = False,
+    lasar: str = LASAR,
+) -> pd.DataFrame:
+    """
+    Steg 2 på en befintlig franvaro.xls (från steg 1): tolka, rensa och skapa rapport
+    (``delad_rapport``, ``parquet`` och ``arrow`` som i ``skriv_rapport_och_kub``,
+    ``lasar`` som i ``kor_pipeline``).
+
+    Returns:
+        Den rensade tabellen (tom om inga datarader hittades)
+    """
+    output_mapp = output_mapp or OUTPUT_FRANVARO_DIR
+    input_path = input_path or output_mapp / "franvaro.xls"
+
+    # OBS: franvaro.xls har första kolumnen "skola". Tomma rader behövs inte för tolkningen.
+    with matning.steg("las_franvaro_xls") as post:
+        raw = las_blad(input_path, utan_tomma_rader=True)
+        post["rader"] = len(raw)
+    with matning.steg("tolka") as post:
+        post["rader"] = len(raw)
+        df = tolka_franvaro(raw)
+    if df.empty:
+        df = tom_tabell()
+        print("⚠️ Hittade inga datarader att skriva ut. Kontrollera att 'franvaro.xls' har kolumn 1=skola, samt rader med 'Klass:' i någon kolumn, och minst en datarad med numeriskt värde.")
+        return df
+
+    with matning.steg("rensa") as post:
+        post["rader"] = len(df)
+        df = rensa_franvaro(df, lasar)
+
+    with matning.steg("dubbletter") as post:
+        post["rader"] = len(df)
+        varna_for_dubbletter(df)
+    skriv_rapport_och_kub(df, output_mapp, delad_rapport=delad_rapport, parquet=parquet, arrow=arrow)
+    return df
+
+
+def kor_pipeline(
+    indata_mapp: Optional[Path] = None,
+    output_mapp: Optional[Path] = None,
+    parallellt: bool = False,
+    max_workers: Optional[int] = None,
+    spara_franvaro_xls: bool = False,
+    anvand_cache: bool = True,
+    cache_mapp: Optional[Path] = None,
+    rensad_lista: bool = False,
+    delad_rapport: bool = False,
+    parquet: bool = False,
+    arrow: bool = False,
+    lasar: str = LASAR,
+) -> pd.DataFrame:
+    """
+    Kör insamling och analys i minnet och skriv den kategoriserade rapporten.
+
+    Args:
+        indata_mapp: Mapp med skolrapporter (standard: ``RAW_FRANVARO_DIR``)
+        output_mapp: Mapp för rapporter (standard: ``OUTPUT_FRANVARO_DIR``)
+        parallellt: Läs skolfilerna i en processpool
+        max_workers: Antal processer vid parallell läsning
+        spara_franvaro_xls: Skriv även den sammanslagna franvaro.xls (felsökning).
+            Kräver att alla filer läses, så cachen används inte då.
+        anvand_cache: Återanvänd tolkade skolfiler från ``data/processed``
+        cache_mapp: Mapp för cachen (standard: ``PROCESSED_FRANVARO_DIR``)
+        rensad_lista: Skriv även den rensade elevlistan (``rensning.kor_rensning``)
+        delad_rapport: En arbetsbok per skola och en för kommunen, skrivna parallellt
+            (``max_workers`` processer), i stället för den sammanslagna rapporten
+        parquet: Exportera även elevrader och översikter som Parquet, partitionerat per skola
+        arrow: Som ``parquet`` och dessutom alla elevrader som en Arrow IPC-fil
+        lasar: Läsåret som rapporterna gäller (seklet i tiosiffriga personnummer)
+
+    Returns:
+        Den rensade tabellen (tom om inga datarader hittades)
+    """
+    indata_mapp = indata_mapp or RAW_FRANVARO_DIR
+    output_mapp = output_mapp or OUTPUT_FRANVARO_DIR
+    cache_mapp = cache_mapp or PROCESSED_FRANVARO_DIR
+
+    filer = hitta_rapportfiler(indata_mapp)
+
+    if anvand_cache and not spara_franvaro_xls:
+        cache = TolkningsCache(cache_mapp, lasar)
+        df, antal_tolkade, antal_cachade = bearbeta_med_cache(
+            filer, cache, parallellt=parallellt, max_workers=max_workers
+        )
+        print(f"✔️ Tolkade {antal_tolkade} rapporter, {antal_cachade} från cachen")
+    else:
+        tabell, antal_filer = samla_franvarotabeller(filer, parallellt=parallellt, max_workers=max_workers)
+        print(f"✔️ Läste {antal_filer} rapporter från '{indata_mapp}'")
+
+        if spara_franvaro_xls:
+            skriv_franvaro_xls(tabell, output_mapp / "franvaro.xls")
+            print(f"✔️ Skapade '{output_mapp / 'franvaro.xls'}' (felsökning)")
+
+        with matning.steg("tolka") as post:
+            post["rader"] = len(tabell)
+            df = tolka_franvaro(tabell)
+        if df.empty:
+            df = tom_tabell()
+        else:
+            with matning.steg("rensa") as post:
+                post["rader"] = len(df)
+                df = rensa_franvaro(df, lasar)
+
+    if rensad_lista:
+        from rensning import kor_rensning
+
+        kor_rensning(filer, output_mapp)
+
+    if df.empty:
+        print("⚠️ Hittade inga datarader att skriva ut. Kontrollera att rapporterna har rader med 'Klass:' och minst en datarad med numeriskt värde.")
+        return df
+
+    with matning.steg("dubbletter") as post:
+        post["rader"] = len(df)
+        varna_for_dubbletter(df)
+    skriv_rapport_och_kub(
+        df, output_mapp, delad_rapport=delad_rapport, max_workers=max_workers, parquet=parquet, arrow=arrow
+    )
+    return df
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Samla och analysera frånvarorapporter i ett steg")
+    parser.add_argument("--parallellt", action="store_true", help="Läs skolfilerna parallellt")
+    parser.add_argument("--arbetare", type=int, default=None, help="Antal processer (standard: alla kärnor)")
+    parser.add_argument("--spara-franvaro-xls", action="store_true",
+                        help="Spara även den sammanslagna franvaro.xls (felsökning, utan cache)")
+    parser.add_argument("--utan-cache", action="store_true", help="Tolka alla filer, använd inte cachen")
+    parser.add_argument("--rensad-lista", action="store_true",
+                        help="Skriv även rensad_output_formaterad.xlsx (namn, personnr, procent per skola)")
+    parser.add_argument("--delad-rapport", action="store_true",
+                        help="En arbetsbok per skola (skolor/) och en för kommunen, skrivna parallellt")
+    parser.add_argument("--parquet", action="store_true",
+                        help="Exportera även elevrader och översikter som Parquet (parquet/, per skola)")
+    parser.add_argument("--arrow", action="store_true", help="Som --parquet, plus parquet/elever.arrow")
+    parser.add_argument("--strommande", action="store_true",
+                        help="En skolfil i taget, minnet begränsas av den största skolan")
+    parser.add_argument("--profil", action="store_true", help="Spara även en cProfile-dump av körningen")
+    parser.add_argument("--minne", action="store_true", help="Mät toppminne per steg (tracemalloc, långsammare)")
+    args = parser.parse_args()
+
+    from bevakning import bygglas
+
+    # Samma lås som franvaro all/watch, så att två byggen av läsåret inte krockar
+    with bygglas(PROCESSED_FRANVARO_DIR):
+        if args.strommande:
+            from strommande import kor_strommande
+
+            with matning.Korningsrapport("pipeline", OUTPUT_FRANVARO_DIR, minne=args.minne, profil=args.profil):
+                resultat = kor_strommande(anvand_cache=not args.utan_cache, rensad_lista=args.rensad_lista)
+            sys.exit(1 if resultat is None else 0)
+
+        with matning.Korningsrapport("pipeline", OUTPUT_FRANVARO_DIR, minne=args.minne, profil=args.profil):
+            resultat = kor_pipeline(
+                parallellt=args.parallellt,
+                max_workers=args.arbetare,
+                spara_franvaro_xls=args.spara_franvaro_xls,
+                anvand_cache=not args.utan_cache,
+                rensad_lista=args.rensad_lista,
+                delad_rapport=args.delad_rapport,
+                parquet=args.parquet,
+                arrow=args.arrow,
+            )
+    if resultat.empty:
+        sys.exit(1)
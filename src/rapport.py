@@ -0,0 +1,271 @@
+"""
+Strömmande Excel-rapport (openpyxl write-only) med delade namngivna stilar.
+
+Raderna skrivs ut direkt när de skapas i stället för att hela arbetsboken byggs
+i minnet och formateras cell för cell i efterhand. Kolumnbredderna räknas fram
+i förväg från DataFrames med vektoriserade stränglängder. Resultatet ser ut
+som tidigare: färgade och centrerade kolumner A–E på datablad, fet kolumn A och
+bredd = längsta värde + 2.
+"""
+import re
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, NamedStyle, PatternFill, Side
+from openpyxl.utils import get_column_letter
+import matning
+from schema import RAPPORTKOLUMNER
+from summering import Kub
+
+RAPPORT_FILNAMN = "franvaro_rensad_kategoriserad.xlsx"
+
+# Färger för datablad, kolumn A–E
+DATA_FARGER = ["FFFFFF", "C0C0C0", "C4D79B", "FFFF99", "FF9999"]
+STILNAMN = [f"Frånvaro data {get_column_letter(nr)}" for nr in range(1, len(DATA_FARGER) + 1)]
+
+# Värden som räknas som tomma när hela raden ska hoppas över
+_TOMMA_TEXTER = ["", "nan", "NaN"]
+
+
+def safe_sheet_name(name: str) -> str:
+    """Excel-bladnamn: max 31 tecken + förbjudna tecken."""
+    name = re.sub(r"[:\/\?\*\[\]]", "_", str(name))
+    return name[:31]
+
+
+def skapa_stilar() -> List[NamedStyle]:
+    """En namngiven stil per formaterad kolumn (A–E) på databladen."""
+    kant = Side(style="thin")
+    stilar = []
+    for nr, (namn, farg) in enumerate(zip(STILNAMN, DATA_FARGER)):
+        stilar.append(NamedStyle(
+            name=namn,
+            fill=PatternFill(start_color=farg, end_color=farg, fill_type="solid"),
+            alignment=Alignment(horizontal="center", vertical="center"),
+            font=Font(bold=(nr == 0)),
+            border=Border(left=kant, right=kant, top=kant, bottom=kant),
+        ))
+    return stilar
+
+
+def _ar_none(kol: pd.Series) -> np.ndarray:
+    return kol.to_numpy(dtype=object) == None  # noqa: E711 (elementvis jämförelse)
+
+
+def textlangder(kol: pd.Series) -> np.ndarray:
+    """
+    ``len(str(v))`` per värde, men 0 för tomma och falska värden (None, "", 0).
+
+    Samma mått som autosize av befintliga celler, fast för en hel kolumn på en gång.
+    """
+    if len(kol) == 0:
+        return np.zeros(0, dtype=np.int64)
+    langd = kol.astype(str).str.len().to_numpy(dtype=float, na_value=np.nan)
+    ar_none = _ar_none(kol)
+    # Saknade värden som inte är None (NaN, NaT) skrivs ut som "nan"/"NaT"
+    langd = np.where(np.isnan(langd) & ~ar_none, 3, langd)
+    falsk = ar_none | (kol.to_numpy(dtype=object) == 0)
+    return np.where(falsk, 0, langd).astype(np.int64)
+
+
+def _max_langd(rubrik, kol: pd.Series) -> int:
+    langder = textlangder(kol)
+    rubrik_langd = len(str(rubrik)) if rubrik else 0
+    return int(max(rubrik_langd, langder.max() if len(langder) else 0))
+
+
+def _rader_med_innehall(df: pd.DataFrame) -> np.ndarray:
+    """Rader där minst en cell inte är tom ("", "nan" eller "NaN" efter strip)."""
+    behall = np.zeros(len(df), dtype=bool)
+    for kol in df.columns:
+        varden = df[kol]
+        text = varden.astype(str).str.strip()
+        tom = text.isin(_TOMMA_TEXTER).to_numpy() | (varden.isna().to_numpy() & ~_ar_none(varden))
+        behall |= ~tom
+    return behall
+
+
+def _for_excel(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Kompakta typer som Python-värden för openpyxl: kategorier och heltal som
+    objekt (saknade heltal som None) och float32 avrundat till decimalvärdet.
+    """
+    ut = {}
+    for kol in df.columns:
+        varden = df[kol]
+        if isinstance(varden.dtype, pd.CategoricalDtype):
+            varden = varden.astype(object)
+        elif pd.api.types.is_extension_array_dtype(varden.dtype) and pd.api.types.is_integer_dtype(varden.dtype):
+            varden = pd.Series(varden.to_numpy(dtype=object, na_value=None), index=df.index, dtype=object)
+        elif varden.dtype == np.float32:
+            varden = varden.astype(np.float64).round(4)
+        ut[kol] = varden
+    return pd.DataFrame(ut, index=df.index)
+
+
+def ny_arbetsbok() -> Workbook:
+    """Strömmande arbetsbok med databladens namngivna stilar registrerade."""
+    wb = Workbook(write_only=True)
+    for stil in skapa_stilar():
+        wb.add_named_style(stil)
+    return wb
+
+
+def _forbered_data(df: pd.DataFrame) -> pd.DataFrame:
+    df = _for_excel(df)
+    return df[_rader_med_innehall(df)]
+
+
+def _langsta(df: pd.DataFrame) -> List[int]:
+    """Längsta värde (eller rubrik) per kolumn; för flera delar av ett blad är bladets det största."""
+    return [_max_langd(kol, df[kol]) for kol in df.columns]
+
+
+def _skriv_data_rader(ws, kolumner: Sequence[str], langsta: Sequence[int], delar: Iterable[pd.DataFrame]):
+    """Kolumnbredder, rubrikrad och raderna i ``delar`` (förberedda med ``_forbered_data``) i tur och ordning."""
+    for nr, langd in enumerate(langsta, start=1):
+        ws.column_dimensions[get_column_letter(nr)].width = langd + 2
+
+    antal_formaterade = min(len(STILNAMN), len(kolumner))
+
+    def rad_med_stil(varden):
+        celler = list(varden)
+        for nr in range(antal_formaterade):
+            cell = WriteOnlyCell(ws, value=celler[nr])
+            cell.style = STILNAMN[nr]
+            celler[nr] = cell
+        return celler
+
+    ws.append(rad_med_stil(kolumner))
+    for df in delar:
+        for rad in df.itertuples(index=False):
+            ws.append(rad_med_stil(rad))
+
+
+def skriv_data_blad(wb: Workbook, titel: str, df: pd.DataFrame):
+    """
+    Datablad: rubrikrad + elevrader, kolumn A–E formaterade med namngivna stilar.
+
+    Arbetsboken ska komma från ``ny_arbetsbok`` (stilarna måste finnas). Helt tomma rader hoppas över.
+    """
+    df = _forbered_data(df)
+    _skriv_data_rader(wb.create_sheet(titel), df.columns, _langsta(df), [df])
+
+
+def _skriv_summering_blad(ws, summering: pd.DataFrame):
+    """Översiktsblad: rubrikrad, rad med indexnamn och en rad per årskurs."""
+    index = summering.index.to_series(index=range(len(summering)))
+    ws.column_dimensions["A"].width = _max_langd(None, index) + 2
+    for nr, kol in enumerate(summering.columns, start=2):
+        ws.column_dimensions[get_column_letter(nr)].width = _max_langd(kol, summering[kol]) + 2
+
+    ws.append([None] + list(summering.columns))
+    ws.append(list(summering.index.names))
+    for ak, rad in zip(summering.index, summering.itertuples(index=False)):
+        ws.append([ak] + list(rad))
+
+
+def skriv_tabell_blad(wb: Workbook, titel: str, df: pd.DataFrame):
+    """Enkelt blad utan formatering: rubrikrad och en rad per rad i ``df`` (index skrivs inte)."""
+    ws = wb.create_sheet(titel)
+    for nr, kol in enumerate(df.columns, start=1):
+        ws.column_dimensions[get_column_letter(nr)].width = _max_langd(kol, df[kol]) + 2
+
+    ws.append(list(df.columns))
+    for rad in df.itertuples(index=False):
+        ws.append(list(rad))
+
+
+def bladnamn(skola: Optional[str] = None) -> Tuple[str, str]:
+    """(databladets, översiktens) fliknamn för kommunen (``skola=None``) eller en skola."""
+    if skola is None:
+        return "Rensad data - Kommun", "Översikt - Kommun"
+    return safe_sheet_name(f"{skola} - Rensad data"), safe_sheet_name(f"{skola} - Översikt")
+
+
+def _skriv_blad_par(wb: Workbook, skola: Optional[str], df: pd.DataFrame, summering: pd.DataFrame):
+    datablad, oversiktsblad = bladnamn(skola)
+    skriv_data_blad(wb, datablad, df[RAPPORTKOLUMNER])
+    _skriv_summering_blad(wb.create_sheet(oversiktsblad), summering)
+
+
+def skapa_delrapport(df: pd.DataFrame, summering: pd.DataFrame, output_path: Path, skola: Optional[str] = None):
+    """
+    Arbetsbok med bara kommunens (``skola=None``) eller en skolas två flikar.
+
+    Flikarna är desamma som i den sammanslagna rapporten.
+    """
+    wb = ny_arbetsbok()
+    _skriv_blad_par(wb, skola, df, summering)
+    wb.save(str(output_path))
+
+
+def skapa_rapport(df: pd.DataFrame, output_path: Path, kub: Optional[Kub] = None):
+    """
+    Skriv rensad data och översikter (kommun + en flik per skola) till en xlsx-fil.
+
+    Översikterna tas ur aggregeringskuben (byggs från ``df`` om den inte skickas med).
+    """
+    with matning.steg("summering") as post:
+        post["rader"] = len(df)
+        if kub is None:
+            kub = Kub.fran_tabell(df)
+        summering_kommun, summeringar_skolor = kub.summeringar()
+
+    wb = ny_arbetsbok()
+
+    with matning.steg("skriv_blad") as post:
+        post["rader"] = len(df)
+        _skriv_blad_par(wb, None, df, summering_kommun)
+
+        # Skolvisa flikar
+        for skola, df_s in df.groupby("skola", sort=True, observed=True):
+            _skriv_blad_par(wb, skola, df_s, summeringar_skolor[skola])
+
+    with matning.steg("spara_xlsx"):
+        wb.save(str(output_path))
+
+
+class StrommandeRapport:
+    """
+    Den sammanslagna rapporten (samma flikar som ``skapa_rapport``), skriven en skola i taget.
+
+    Kommunens flikar skapas först men fylls i sist (``spara``), när elevraderna kan
+    läsas tillbaka del för del och kolumnbredderna är de största av skolornas.
+    openpyxl skriver varje flik till en egen temporär fil och skolans flikar stängs
+    direkt, så inget blad hålls i minnet. Skolorna ska läggas till i sorterad ordning,
+    som i ``skapa_rapport``.
+    """
+
+    def __init__(self):
+        self.wb = ny_arbetsbok()
+        datablad, oversiktsblad = bladnamn(None)
+        self._kommun_data = self.wb.create_sheet(datablad)
+        self._kommun_oversikt = self.wb.create_sheet(oversiktsblad)
+        # Rubrikernas längd tills skolorna lagts till (även kommunfliken utan skolor får rubrikrad)
+        self._kolumner: List[str] = list(RAPPORTKOLUMNER)
+        self._langsta: List[int] = [len(kol) for kol in RAPPORTKOLUMNER]
+
+    def lagg_till_skola(self, skola: str, df: pd.DataFrame, summering: pd.DataFrame):
+        """Skriv skolans två flikar direkt."""
+        df = _forbered_data(df[RAPPORTKOLUMNER])
+        langsta = _langsta(df)
+        self._langsta = [max(a, b) for a, b in zip(self._langsta, langsta)]
+
+        datablad, oversiktsblad = bladnamn(skola)
+        ws_data, ws_oversikt = self.wb.create_sheet(datablad), self.wb.create_sheet(oversiktsblad)
+        _skriv_data_rader(ws_data, df.columns, langsta, [df])
+        _skriv_summering_blad(ws_oversikt, summering)
+        ws_data.close()
+        ws_oversikt.close()
+
+    def spara(self, delar: Iterable[pd.DataFrame], summering_kommun: pd.DataFrame, output_path: Path):
+        """Fyll kommunens flikar med elevraderna i ``delar`` (i den ordning de ska stå) och spara."""
+        forberedda = (_forbered_data(df[RAPPORTKOLUMNER]) for df in delar)
+        _skriv_data_rader(self._kommun_data, self._kolumner, self._langsta, forberedda)
+        _skriv_summering_blad(self._kommun_oversikt, summering_kommun)
+        self.wb.save(str(output_path))
@@ -0,0 +1,219 @@
+"""
+Rensad elevlista ur skolornas exporter (ersätter logiken i ``skript rensa fil.py``).
+
+Ur varje export behålls elevraderna (från rad 8, utan "Namn"- och "Klass"-rader).
+Som i det gamla skriptet tas kolumn A och minutkolumnerna D-H bort; namn,
+personnr, de tre procentkolumnerna och eventuella kolumner efter K behålls.
+Celler med tabbseparerade värden delas upp i egna kolumner. Listan skrivs med
+rapportens datablad (``rapport.skriv_data_blad``): en flik per skola i
+``data/output/<läsår>/rensad_output_formaterad.xlsx``.
+
+Exporten läses och rensas i fönster om ``BITSTORLEK`` rader (``las_blad`` med
+``forsta_rad``/``sista_rad``), så bara ett fönsters råa celler finns i minnet åt
+gången; de rensade fönstren slås ihop en gång på slutet. Tabbarna räknas och delas
+med pandas strängfunktioner (``str.count``, ``str.split``).
+
+Användning:
+    python rensning.py                     # alla skolrapporter i rådatamappen
+    python rensning.py skola.xls [...]     # valda exporter
+    franvaro all --rensad-lista            # som en del av pipelinen
+"""
+import argparse
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+import matning
+from config_paths import OUTPUT_FRANVARO_DIR, RAW_FRANVARO_DIR
+from openpyxl.utils import get_column_letter
+from xlslasare import las_blad
+
+RENSAD_FILNAMN = "rensad_output_formaterad.xlsx"
+
+# Rubriker för exportens kolumner B-C och I-K; kolumner efter K får sin kolumnbokstav
+LISTKOLUMNER = {1: "Namn", 2: "Personnr", 8: "N %", 9: "GF %", 10: "F %"}
+# Kolumnerna som tas bort (A och D-H) och antalet kolumner i ett xls-blad
+BORTTAGNA_KOLUMNER = {0, 3, 4, 5, 6, 7}
+MAX_KOLUMNER = 256
+# Rubrikrader i exporten före första elevraden
+FORSTA_ELEVRAD = 7
+BITSTORLEK = 50_000
+
+
+def _har_tabb(kol: pd.Series) -> pd.Series:
+    """True för textceller med minst en tabb."""
+    inga = pd.Series(False, index=kol.index)
+    if kol.dtype == object:
+        sort = pd.api.types.infer_dtype(kol, skipna=True)
+        if sort not in ("string", "mixed", "mixed-integer"):
+            return inga
+        # Bara text och None: strängtypen ger snabba str-funktioner; blandade kolumner
+        # (text och tal) använder objektkolumnens, där talen blir NaN
+        if sort == "string":
+            kol = kol.astype("str")
+    elif not pd.api.types.is_string_dtype(kol.dtype):
+        return inga
+    try:
+        return kol.str.contains("\t", regex=False).fillna(False).astype(bool)
+    except AttributeError:
+        # Blandad kolumn utan text (t.ex. tal och sanningsvärden)
+        return inga
+
+
+def _dela_kolumn(varden: pd.Series, har_tabb: pd.Series, antal: int) -> List[pd.Series]:
+    """``antal`` delar per cell; celler utan tabb (``har_tabb`` False) hamnar orörda i första delen."""
+    # Bara cellerna med tabb delas, övriga rader får None i de nya delarna
+    delar = (
+        varden[har_tabb].astype("str").str.split("\t", expand=True, regex=False)
+        .reindex(index=varden.index, columns=range(antal))
+        .astype(object)
+    )
+    delar[0] = delar[0].where(har_tabb, varden)
+    return [delar[nr].where(delar[nr].notna(), None) for nr in range(antal)]
+
+
+def dela_tabbar(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Dela celler med tabbar i egna kolumner.
+
+    En kolumn där någon cell innehåller tabbar ersätts (på samma plats) av så
+    många kolumner som den längsta cellen har delar: ``kol``, ``kol_2``, ``kol_3``...
+    Celler utan tabb hamnar i första delen, övriga delar blir None. Värden som
+    inte är text lämnas orörda.
+
+    Returns:
+        Ny tabell (samma index); oförändrad om ingen cell innehåller tabbar
+    """
+    tabbar = {kol: _har_tabb(df[kol]) for kol in df.columns}
+    tabbar = {kol: har_tabb for kol, har_tabb in tabbar.items() if har_tabb.any()}
+    if not tabbar:
+        return df
+
+    kolumner = {}
+    for kol in df.columns:
+        if kol not in tabbar:
+            kolumner[kol] = df[kol]
+            continue
+        # Största antalet tabbar i en cell avgör antalet delar
+        antal = int(df.loc[tabbar[kol], kol].astype("str").str.count("\t").max()) + 1
+        for nr, del_ in enumerate(_dela_kolumn(df[kol], tabbar[kol], antal)):
+            kolumner[kol if nr == 0 else f"{kol}_{nr + 1}"] = del_
+    return pd.DataFrame(kolumner, index=df.index)
+
+
+def rensa_export(raw: pd.DataFrame) -> pd.DataFrame:
+    """
+    Elevlistan ur en inläst export (eller ett fönster av den).
+
+    Args:
+        raw: Exportens celler med kolumnnummer som etiketter (som ``las_blad``),
+            från ``FORSTA_ELEVRAD``; kolumnerna i ``BORTTAGNA_KOLUMNER`` ignoreras
+
+    Returns:
+        Övriga kolumner i exportens ordning med rubrikerna i ``LISTKOLUMNER`` (eller
+        kolumnbokstaven), efter ev. tabbuppdelning; tomma celler som None
+    """
+    kolumner = [kol for kol in raw.columns if kol not in BORTTAGNA_KOLUMNER]
+    df = raw[kolumner].rename(columns=lambda kol: LISTKOLUMNER.get(kol, get_column_letter(kol + 1)))
+    df = df.mask(df == "", None)
+
+    if "Namn" in df:
+        df = df[~df["Namn"].astype(str).str.startswith(("Namn", "Klass"))]
+    df = df.reset_index(drop=True)
+    return dela_tabbar(df)
+
+
+def _sla_ihop_fonster(delar: List[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Rensade fönster till en lista.
+
+    En kolumn kan ha delats i olika många delar i olika fönster; varje del får
+    sin plats direkt efter föregående kolumn och saknade delar blir None.
+    """
+    if len(delar) == 1:
+        return delar[0]
+    ordning: List[str] = []
+    for del_ in delar:
+        for nr, kol in enumerate(del_.columns):
+            if kol not in ordning:
+                ordning.insert(ordning.index(del_.columns[nr - 1]) + 1 if nr else 0, kol)
+    fyllda = [del_.assign(**{kol: None for kol in ordning if kol not in del_})[ordning] for del_ in delar]
+    return pd.concat(fyllda, ignore_index=True)
+
+
+def las_export(filvag: Path, bitstorlek: int = BITSTORLEK) -> pd.DataFrame:
+    """
+    Läs exporten utom de borttagna kolumnerna och rensa den.
+
+    Bladet läses och rensas ``bitstorlek`` rader i taget, så bara ett fönsters
+    råa celler hålls i minnet samtidigt. Resultatet är detsamma som om hela
+    bladet rensats på en gång.
+    """
+    kolumner = [kol for kol in range(MAX_KOLUMNER) if kol not in BORTTAGNA_KOLUMNER]
+    delar = []
+    start = FORSTA_ELEVRAD
+    while True:
+        raw = las_blad(filvag, kolumner=kolumner, forsta_rad=start, sista_rad=start + bitstorlek)
+        if len(raw) or not delar:
+            delar.append(rensa_export(raw))
+        if len(raw) < bitstorlek:
+            break
+        start += bitstorlek
+    return _sla_ihop_fonster(delar)
+
+
+def skriv_rensade_listor(listor: Dict[str, pd.DataFrame], output_path: Path):
+    """En flik per skola, formaterad som rapportens datablad."""
+    from rapport import ny_arbetsbok, safe_sheet_name, skriv_data_blad
+
+    wb = ny_arbetsbok()
+    for skola, lista in listor.items():
+        skriv_data_blad(wb, safe_sheet_name(skola), lista)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    wb.save(str(output_path))
+
+
+def kor_rensning(filer: Iterable[Path], output_mapp: Optional[Path] = None) -> Optional[Path]:
+    """
+    Skriv ``rensad_output_formaterad.xlsx`` för exporterna.
+
+    Returns:
+        Sökväg till filen, eller None om ingen export kunde läsas
+    """
+    listor = {}
+    for filvag in filer:
+        try:
+            with matning.steg("rensad_lista", skola=filvag.stem) as post:
+                listor[filvag.stem] = las_export(filvag)
+                post["rader"] = len(listor[filvag.stem])
+        except Exception as e:
+            print(f"⚠️ Kunde inte läsa {filvag.name}: {e}")
+    if not listor:
+        print("⚠️ Inga exporter att rensa.")
+        return None
+
+    output_path = (output_mapp or OUTPUT_FRANVARO_DIR) / RENSAD_FILNAMN
+    with matning.steg("skriv_rensad_lista"):
+        skriv_rensade_listor(listor, output_path)
+    print(f"✔️ Klar! Filen '{output_path}' har sparats ({len(listor)} skolor).")
+    return output_path
+
+
+def hitta_filer(filer: List[Path]) -> List[Path]:
+    """Angivna filer, annars alla skolrapporter i rådatamappen."""
+    if filer:
+        return filer
+    from busavsjo_samla_franvaro import hitta_rapportfiler
+
+    return hitta_rapportfiler(RAW_FRANVARO_DIR)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rensad elevlista (namn, personnr, procent) ur exporterna")
+    parser.add_argument("filer", nargs="*", type=Path, help="Exporter (standard: alla i rådatamappen)")
+    parser.add_argument("--output-mapp", type=Path, default=None, help=f"Standard: {OUTPUT_FRANVARO_DIR}")
+    args = parser.parse_args()
+
+    if kor_rensning(hitta_filer(args.filer), args.output_mapp) is None:
+        sys.exit(1)
@@ -0,0 +1,112 @@
+"""
+Kompakt, typat format för den rensade elevtabellen.
+
+Det här är det kanoniska formatet i minnet efter rensningen (``analys.rensa_franvaro``):
+cachen, summeringar, gränsberäkningar och rapporten arbetar alla på det.
+
+- ``skola``, ``klass`` och ``årskurs`` är kategoriska (samma fåtal texter upprepas)
+- exportens mätvärden (``undv_tid`` … ``f_pct``) behålls som text, så att rapportens
+  datablad visar dem som i exporten; de upprepas mycket och sparas som kategorier
+- samma mätvärden tolkade som tal: minuterna (``undervisning_min`` m.fl.) och
+  procenten som ``float32`` (decimalminuter behålls, saknade värden som NaN)
+- ``elev_id`` (int64) och ``födelseår`` kommer från det normaliserade personnumret
+  (``elever.elevnycklar``); de används för jämförelser och skrivs inte i rapporten
+"""
+from typing import List
+
+import pandas as pd
+
+KATEGORIKOLUMNER = ["skola", "klass", "årskurs"]
+TEXTKOLUMNER = ["namn", "personnr"]
+ELEVKOLUMNER = ["elev_id", "födelseår"]
+
+# Råa minutkolumner (och antal lektioner) från exporten och vad de tolkas till
+RAA_MINUTKOLUMNER = {
+    "undv_tid": "undervisning_min",
+    "lekt": "lektioner",
+    "n_min": "närvaro_min",
+    "gf_min": "giltig_frånvaro_min",
+    "f_min": "ogiltig_frånvaro_min",
+}
+# Råa procentkolumner från exporten och vad de tolkas till
+RAA_PROCENTKOLUMNER = {
+    "n_pct": "närvaro_pct",
+    "gf_pct": "giltig_frånvaro_pct",
+    "f_pct": "ogiltig_frånvaro_pct",
+}
+EXPORTKOLUMNER = list(RAA_MINUTKOLUMNER) + list(RAA_PROCENTKOLUMNER)
+MINUTKOLUMNER = list(RAA_MINUTKOLUMNER.values())
+PROCENTKOLUMNER = list(RAA_PROCENTKOLUMNER.values())
+
+# Kolumner som är kategoriska och måste byggas om när delar slås ihop
+KATEGORISKA = KATEGORIKOLUMNER + EXPORTKOLUMNER
+
+# Rapportens datablad: exportens kolumner, årskurs och procenten som kategoriseras
+RAPPORTKOLUMNER = (
+    ["skola", "klass"] + TEXTKOLUMNER + EXPORTKOLUMNER + ["årskurs", "närvaro_pct", "ogiltig_frånvaro_pct"]
+)
+KOLUMNER = RAPPORTKOLUMNER + ["giltig_frånvaro_pct"] + MINUTKOLUMNER + ELEVKOLUMNER
+
+SCHEMA = {
+    **{kol: "category" for kol in KATEGORISKA},
+    **{kol: "str" for kol in TEXTKOLUMNER},
+    **{kol: "float32" for kol in MINUTKOLUMNER + PROCENTKOLUMNER},
+    "elev_id": "int64",
+    "födelseår": "Int16",
+}
+# Arrow-typ för varje typ i SCHEMA; kategorierna skiljer sig mellan delar och sparas som text
+_ARROWTYPER = {"category": "string", "str": "string", "float32": "float32", "int64": "int64", "Int16": "int16"}
+
+
+def arrow_schema():
+    """
+    ``SCHEMA`` som pyarrow-schema, med de kategoriska kolumnerna som text.
+
+    Används när delar skrivs till samma Parquet-fil: typerna tas från schemat och
+    inte från första delen, där en kolumn utan värden annars får Arrow-typen null.
+    """
+    import pyarrow as pa
+
+    return pa.schema([(kol, pa.type_for_alias(_ARROWTYPER[SCHEMA[kol]])) for kol in KOLUMNER])
+
+
+def kompaktera(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Ge en rensad tabell det kompakta formatet.
+
+    Args:
+        df: Tabell med exportens kolumner, de tolkade mätvärdena (``MINUTKOLUMNER``,
+            ``PROCENTKOLUMNER``), årskurs och ``ELEVKOLUMNER``
+
+    Returns:
+        Ny tabell med kolumnerna i ``KOLUMNER`` och typerna i ``SCHEMA`` (samma index)
+    """
+    ut = {}
+    for kol in KOLUMNER:
+        varden = df[kol]
+        if kol in EXPORTKOLUMNER:
+            # Tal i exporten (t.ex. 33700.0) står som text, som i franvaro.xls
+            varden = varden.where(varden.isna(), varden.astype(str))
+        ut[kol] = varden.astype(SCHEMA[kol])
+    return pd.DataFrame(ut, index=df.index)
+
+
+def tom_tabell() -> pd.DataFrame:
+    """Tom tabell med det kompakta formatet."""
+    return pd.DataFrame({kol: pd.Series(dtype=SCHEMA[kol]) for kol in KOLUMNER})
+
+
+def sla_ihop(delar: List[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Slå ihop kompakta tabeller (t.ex. en per skola) till en.
+
+    Kategorierna skiljer sig mellan delarna, så de kategoriska kolumnerna byggs om
+    efter sammanslagningen i stället för att falla tillbaka till text.
+    """
+    if not delar:
+        return tom_tabell()
+    df = pd.concat(delar, ignore_index=True)
+    for kol in KATEGORISKA:
+        if not isinstance(df[kol].dtype, pd.CategoricalDtype):
+            df[kol] = df[kol].astype("category")
+    return df
@@ -54,9 +54,9 @@ def skapa_lasar_struktur(lasar: str):
     print(f"   📁 {raw_franvaro}")
     print(f"   📁 {output_lasar}")
     print(f"\n💡 Nästa steg:")
-    print(f"   1. Uppdatera LASAR = '{lasar}' i src/config_paths.py")
-    print(f"   2. Lägg rådata i data/raw/franvaro/{lasar}/")
-    print(f"   3. Kör src/busavsjo_samla_franvaro.py")
+    print(f"   1. Lägg rådata i data/raw/franvaro/{lasar}/")
+    print(f"   2. Kör ./franvaro --lasar {lasar} all (LASAR i src/config_paths.py behöver inte ändras)")
+    print(f"   (Alla läsår på en gång, utan att ändra LASAR: src/batch_lasar.py)")
     
     return True
 
@@ -0,0 +1,146 @@
+"""
+Delad rapport: en arbetsbok per skola och en för kommunen.
+
+I stället för en stor arbetsbok med två flikar per skola skrivs:
+    data/output/<läsår>/franvaro_kommun.xlsx     kommunens rensade data och översikt
+    data/output/<läsår>/skolor/<skola>.xlsx      skolans två flikar
+
+Flikarna är desamma som i den sammanslagna rapporten, så varje rektor kan hämta
+bara sin egen skola. Arbetsböckerna skrivs parallellt i en processpool (en per
+uppgift, kommunen först eftersom den är störst).
+
+För varje arbetsbok sparas ett fingeravtryck av raderna och översikten i
+``skolor/index.json``. En skola vars rader inte ändrats sedan förra körningen
+skrivs inte om, och filer för skolor som inte längre finns tas bort.
+
+Användning:
+    franvaro all --delad-rapport
+    python pipeline.py --delad-rapport
+"""
+import hashlib
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+import matning
+from rapport import skapa_delrapport
+from summering import Kub
+
+KOMMUN_FILNAMN = "franvaro_kommun.xlsx"
+SKOLMAPP = "skolor"
+INDEXFIL = "index.json"
+
+# Höj när rapportens utseende ändras så att alla arbetsböcker skrivs om
+RAPPORT_VERSION = 1
+
+
+def skolfilnamn(skola: str) -> str:
+    """Filnamn för skolans arbetsbok (tecken som inte får finnas i filnamn blir _)."""
+    return re.sub(r'[\\/:*?"<>|]', "_", str(skola)).strip() + ".xlsx"
+
+
+def fingeravtryck(df: pd.DataFrame, summering: pd.DataFrame) -> str:
+    """SHA-256 av raderna (i ordning), kolumnernas namn och typer samt översikten."""
+    h = hashlib.sha256(f"v{RAPPORT_VERSION}|{list(df.columns)}|{list(df.dtypes.astype(str))}".encode("utf-8"))
+    h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    h.update(str(list(summering.columns)).encode("utf-8"))
+    h.update(pd.util.hash_pandas_object(summering, index=True).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def _las_index(indexfil: Path) -> Dict[str, str]:
+    try:
+        return json.loads(indexfil.read_text(encoding="utf-8"))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def skapa_delade_rapporter(
+    df: pd.DataFrame,
+    output_mapp: Path,
+    kub: Optional[Kub] = None,
+    max_workers: Optional[int] = None,
+) -> Tuple[int, int]:
+    """
+    Skriv kommunens och skolornas arbetsböcker; oförändrade hoppas över.
+
+    Args:
+        kub: Aggregeringskuben för översikterna (byggs från ``df`` om den inte skickas med)
+        max_workers: Antal processer (standard: alla kärnor; med en skrivs allt i den här processen)
+
+    Returns:
+        (antal skrivna arbetsböcker, antal oförändrade)
+    """
+    skolmapp = output_mapp / SKOLMAPP
+    skolmapp.mkdir(parents=True, exist_ok=True)
+
+    with matning.steg("summering") as post:
+        post["rader"] = len(df)
+        if kub is None:
+            kub = Kub.fran_tabell(df)
+        summering_kommun, summeringar_skolor = kub.summeringar()
+
+    uppgifter = [(None, df, summering_kommun, output_mapp / KOMMUN_FILNAMN)]
+    for skola, df_s in df.groupby("skola", sort=True, observed=True):
+        uppgifter.append((skola, df_s, summeringar_skolor[skola], skolmapp / skolfilnamn(skola)))
+
+    index = _las_index(skolmapp / INDEXFIL)
+    nytt_index = {}
+    att_skriva = []
+    with matning.steg("fingeravtryck") as post:
+        post["rader"] = len(df)
+        for skola, df_s, summering, output_path in uppgifter:
+            nyckel = output_path.relative_to(output_mapp).as_posix()
+            nytt_index[nyckel] = fingeravtryck(df_s, summering)
+            if index.get(nyckel) != nytt_index[nyckel] or not output_path.exists():
+                att_skriva.append((nyckel, skola, df_s, summering, output_path))
+
+    misslyckade = _skriv_arbetsbocker(att_skriva, max_workers)
+    for nyckel in misslyckade:
+        # Skrivs om nästa gång
+        del nytt_index[nyckel]
+
+    for nyckel in set(index) - set(nytt_index) - set(misslyckade):
+        (output_mapp / nyckel).unlink(missing_ok=True)
+    (skolmapp / INDEXFIL).write_text(json.dumps(nytt_index, indent=2, ensure_ascii=False), encoding="utf-8")
+
+    return len(att_skriva) - len(misslyckade), len(uppgifter) - len(att_skriva)
+
+
+def _skriv_arbetsbocker(att_skriva: List[tuple], max_workers: Optional[int]) -> List[str]:
+    """Skriv arbetsböckerna, i en processpool om det finns mer än en. Returnerar nycklarna som misslyckades."""
+    misslyckade = []
+    if len(att_skriva) > 1 and (max_workers or os.cpu_count() or 1) > 1:
+        rapport = matning.aktiv()
+        minne = rapport is not None and rapport.minne
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            framtider = [
+                (nyckel, df_s, pool.submit(
+                    matning.mat_anrop, "skriv_arbetsbok", skola or "Kommun", minne,
+                    skapa_delrapport, df_s, summering, output_path, skola,
+                ))
+                for nyckel, skola, df_s, summering, output_path in att_skriva
+            ]
+            for nyckel, df_s, framtid in framtider:
+                try:
+                    _, post = framtid.result()
+                except Exception as e:
+                    print(f"⚠️ Kunde inte skriva {nyckel}: {e}")
+                    misslyckade.append(nyckel)
+                    continue
+                post["rader"] = len(df_s)
+                matning.lagg_till(post)
+    else:
+        for nyckel, skola, df_s, summering, output_path in att_skriva:
+            try:
+                with matning.steg("skriv_arbetsbok", skola=skola or "Kommun") as post:
+                    post["rader"] = len(df_s)
+                    skapa_delrapport(df_s, summering, output_path, skola)
+            except Exception as e:
+                print(f"⚠️ Kunde inte skriva {nyckel}: {e}")
+                misslyckade.append(nyckel)
+    return misslyckade
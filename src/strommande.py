@@ -0,0 +1,202 @@
+"""
+Strömmande läge: en skolfil i taget, med minnet begränsat av den största skolan.
+
+Pipelinen (``kor_pipeline``) håller alla skolors rader i minnet samtidigt. Här läses,
+tolkas och rensas en skolrapport i taget (``skolvis``), och från varje skola behålls
+bara små delsummeringar som kan läggas ihop:
+
+- delkuben (antal per klass, årskurs och kategori, ``Kub``); summan ger kommunens
+  översikt och ``franvaro_kub.parquet``
+- tröskelhistogrammet (``TroskelHistogram``), gallrat till de gränser som ska
+  redovisas (>11 % eller ``--trosklar``)
+- elevnycklarna (``elev_id``) för dubblettkontrollen
+
+Skolans flikar skrivs till rapporten direkt och dess rensade rader läggs som en
+radgrupp i en mellanfil (Parquet, i outputmappen eftersom /tmp kan ligga i minnet).
+Kommunens flikar fylls i sist, en radgrupp i taget. Rapporten blir densamma som
+med pipelinen.
+
+Ögonblicksbilden sparas inte (den behöver alla rader); kör ``franvaro snapshot`` vid behov.
+
+Användning:
+    franvaro all --strommande [--utan-cache] [--trosklar 5 10 11]
+    python pipeline.py --strommande
+"""
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import matning
+from config_paths import LASAR, OUTPUT_FRANVARO_DIR, PROCESSED_FRANVARO_DIR, RAW_FRANVARO_DIR
+from busavsjo_samla_franvaro import hitta_rapportfiler
+from elever import TOM_NYCKEL, varna_for_dubbletter
+from pipeline import bearbeta_skolrapport
+from rapport import RAPPORT_FILNAMN, StrommandeRapport
+from schema import KATEGORISKA, KOLUMNER, SCHEMA, arrow_schema, sla_ihop
+from summering import KUB_FILNAMN, Kub
+from tolkningscache import TolkningsCache
+from trosklar import STANDARDGRANSER, TroskelHistogram
+
+MELLANFIL = ".franvaro_rensad.parquet.tmp"
+MELLANSCHEMA = arrow_schema()
+# Delsummeringarna läggs ihop efter så här många skolor, så att de inte växer med antalet skolor
+SLA_IHOP_VAR = 32
+
+
+def skolvis(
+    filer: Iterable[Path], cache: Optional[TolkningsCache] = None, lasar: str = LASAR
+) -> Iterator[Tuple[Path, pd.DataFrame]]:
+    """
+    Rensade elevrader en skolfil i taget (ur cachen om filen inte ändrats).
+
+    Filer som inte kan läsas hoppas över med en varning, liksom filer utan datarader.
+    """
+    for filvag in filer:
+        df_s = None
+        if cache is not None:
+            with matning.steg("cache", skola=filvag.stem) as post:
+                df_s = cache.hamta(filvag)
+                post["rader"] = None if df_s is None else len(df_s)
+        if df_s is None:
+            try:
+                df_s = bearbeta_skolrapport(filvag, lasar)
+            except Exception as e:
+                print(f"⚠️ Kunde inte läsa {filvag.name}: {e}")
+                continue
+            if cache is not None:
+                cache.spara(filvag, df_s)
+        if not df_s.empty:
+            yield filvag, df_s
+
+
+def _for_mellanfil(df: pd.DataFrame) -> pa.Table:
+    """
+    Skolans rader med mellanfilens schema (``schema.arrow_schema``). Kategorierna
+    skiljer sig mellan skolorna, så de sparas som text.
+    """
+    df = df[KOLUMNER].astype({kol: "str" for kol in KATEGORISKA})
+    return pa.Table.from_pandas(df, schema=MELLANSCHEMA, preserve_index=False)
+
+
+def _fran_mellanfil(tabell: pa.Table) -> pd.DataFrame:
+    """Raderna i det kompakta formatet igen (mellanfilens schema saknar pandas typer)."""
+    return tabell.to_pandas().astype(SCHEMA)
+
+
+def _varna_for_dubbletter(
+    fil: pq.ParquetFile, filer: List[Path], radgrupper: Dict[Path, int], nycklar: Dict[Path, np.ndarray]
+):
+    """``varna_for_dubbletter``, men bara raderna vars elev_id förekommer flera gånger läses tillbaka."""
+    alla = np.concatenate(list(nycklar.values()))
+    # Rader utan personnummer är inte dubbletter av varandra
+    upprepade = np.unique(alla[pd.Series(alla).duplicated(keep=False).to_numpy() & (alla != TOM_NYCKEL)])
+    if not len(upprepade):
+        return
+    delar = []
+    for filvag in filer:
+        if filvag in radgrupper:
+            rader = np.isin(nycklar[filvag], upprepade)
+            if rader.any():
+                delar.append(_fran_mellanfil(fil.read_row_group(radgrupper[filvag]))[rader])
+    varna_for_dubbletter(sla_ihop(delar))
+
+
+def kor_strommande(
+    indata_mapp: Optional[Path] = None,
+    output_mapp: Optional[Path] = None,
+    anvand_cache: bool = True,
+    cache_mapp: Optional[Path] = None,
+    rensad_lista: bool = False,
+    trosklar: Sequence[float] = STANDARDGRANSER,
+    lasar: str = LASAR,
+) -> Optional[Tuple[Kub, TroskelHistogram]]:
+    """
+    Samma rapport och kub som ``kor_pipeline``, men en skola i taget.
+
+    Args:
+        indata_mapp: Mapp med skolrapporter (standard: ``RAW_FRANVARO_DIR``)
+        output_mapp: Mapp för rapporter (standard: ``OUTPUT_FRANVARO_DIR``)
+        anvand_cache: Återanvänd tolkade skolfiler från ``data/processed``
+        cache_mapp: Mapp för cachen (standard: ``PROCESSED_FRANVARO_DIR``)
+        rensad_lista: Skriv även den rensade elevlistan (``rensning.kor_rensning``)
+        trosklar: Gränser som histogrammet ska kunna svara på (det gallras till dem)
+        lasar: Läsåret som rapporterna gäller (seklet i tiosiffriga personnummer)
+
+    Returns:
+        (hopslagen kub, hopslaget tröskelhistogram), eller None om inga datarader hittades
+    """
+    indata_mapp = indata_mapp or RAW_FRANVARO_DIR
+    output_mapp = output_mapp or OUTPUT_FRANVARO_DIR
+    cache_mapp = cache_mapp or PROCESSED_FRANVARO_DIR
+    output_mapp.mkdir(parents=True, exist_ok=True)
+
+    filer = hitta_rapportfiler(indata_mapp)
+    cache = TolkningsCache(cache_mapp, lasar) if anvand_cache else None
+    mellanfil = output_mapp / MELLANFIL
+    rapport = StrommandeRapport()
+    kuber, histogram, nycklar, radgrupper = [], [], {}, {}
+    skrivare = None
+    try:
+        # Skolornas flikar i samma ordning som i skapa_rapport (sorterat på skola)
+        for filvag, df_s in skolvis(sorted(filer, key=lambda f: f.stem), cache, lasar):
+            with matning.steg("delsummering", skola=filvag.stem) as post:
+                post["rader"] = len(df_s)
+                kub = Kub.fran_tabell(df_s)
+                kuber.append(kub)
+                histogram.append(TroskelHistogram.fran_tabell(df_s).gallra(trosklar))
+                nycklar[filvag] = df_s["elev_id"].to_numpy()
+                if len(kuber) >= SLA_IHOP_VAR:
+                    kuber, histogram = [Kub.sla_ihop(kuber)], [TroskelHistogram.sla_ihop(histogram)]
+
+            with matning.steg("skriv_skola", skola=filvag.stem) as post:
+                post["rader"] = len(df_s)
+                _, summeringar = kub.summeringar()
+                for skola, df_skola in df_s.groupby("skola", sort=True, observed=True):
+                    rapport.lagg_till_skola(skola, df_skola, summeringar[skola])
+                tabell = _for_mellanfil(df_s)
+                if skrivare is None:
+                    skrivare = pq.ParquetWriter(mellanfil, MELLANSCHEMA)
+                skrivare.write_table(tabell, row_group_size=len(tabell))
+                radgrupper[filvag] = len(radgrupper)
+
+        if cache is not None:
+            cache.rensa_inaktuella(filer)
+            cache.skriv_index()
+        print(f"✔️ Bearbetade {len(radgrupper)} rapporter en i taget")
+
+        if rensad_lista:
+            from rensning import kor_rensning
+
+            kor_rensning(filer, output_mapp)
+
+        if skrivare is None:
+            print("⚠️ Hittade inga datarader att skriva ut. Kontrollera att rapporterna har rader med 'Klass:' och minst en datarad med numeriskt värde.")
+            return None
+        skrivare.close()
+
+        with matning.steg("kub") as post:
+            kub = Kub.sla_ihop(kuber)
+            post["rader"] = int(kub.celler["antal"].sum())
+            kub.spara(output_mapp / KUB_FILNAMN)
+            histogram = TroskelHistogram.sla_ihop(histogram)
+
+        with pq.ParquetFile(mellanfil) as fil:
+            with matning.steg("dubbletter") as post:
+                post["rader"] = fil.metadata.num_rows
+                _varna_for_dubbletter(fil, filer, radgrupper, nycklar)
+
+            output_path = output_mapp / RAPPORT_FILNAMN
+            with matning.steg("rapport") as post:
+                post["rader"] = fil.metadata.num_rows
+                # Kommunens rader i filernas ordning, som i pipelinen
+                delar = (_fran_mellanfil(fil.read_row_group(radgrupper[f])) for f in filer if f in radgrupper)
+                rapport.spara(delar, kub.summeringar()[0], output_path)
+        print(f"✔️ Klar! Filen sparades till {output_path}")
+        return kub, histogram
+    finally:
+        if skrivare is not None:
+            skrivare.close()
+        mellanfil.unlink(missing_ok=True)
@@ -0,0 +1,212 @@
+"""
+Kategorisering och översikter per årskurs (kommun och skola).
+
+Kategorierna räknas fram en gång för hela datamängden med vektoriserad
+indelning. Sedan byggs en aggregeringskub (``Kub``): antal elever per
+(skola, klass, årskurs, total kategori, ogiltig kategori). Alla översikter –
+kommun, skola, klass, skola och årskurs – är summeringar av kubens celler och
+behöver aldrig gå igenom elevraderna igen. Kuben kan sparas som Parquet och
+läsas in för nya vyer utan att rapporterna tolkas om.
+"""
+from pathlib import Path
+from typing import Dict, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from schema import tom_tabell
+
+TOTALKATEGORIER = ["0,0-5,0%", "5,1-15,0%", "15,1-30,0%", "30,1-50,0%", "50,1--%"]
+OGILTIGKATEGORIER = ["1,0-5,0%", "5,1-15,0%", "15,1--%"]
+
+# Intervallgränser (höger-slutna): total frånvaro = 100 - närvaro_pct
+TOTAL_GRANSER = [-np.inf, 5.0, 15.0, 30.0, 50.0, np.inf]
+# Ogiltig frånvaro under 1,0 % räknas inte i någon kategori
+OGILTIG_GRANSER = [1.0, 5.0, 15.0, np.inf]
+
+SUMMERING_KOLUMNER = (
+    [f"Total frånvaro {kat}" for kat in TOTALKATEGORIER]
+    + [f"Ogiltig frånvaro {kat}" for kat in OGILTIGKATEGORIER]
+    + ["Elevantal"]
+)
+
+
+def kategorisera(df_in: pd.DataFrame) -> pd.DataFrame:
+    """
+    Dela in varje elev i total- respektive ogiltig-kategori.
+
+    Returns:
+        DataFrame med kolumnerna ``total_kategori`` och ``ogiltig_kategori``
+        (kategoriska, NaN där eleven inte hamnar i någon kategori)
+    """
+    total = pd.cut(100 - df_in["närvaro_pct"], bins=TOTAL_GRANSER, labels=TOTALKATEGORIER)
+    ogiltig = pd.cut(
+        df_in["ogiltig_frånvaro_pct"], bins=OGILTIG_GRANSER,
+        labels=OGILTIGKATEGORIER, include_lowest=True
+    )
+    return pd.DataFrame({"total_kategori": total, "ogiltig_kategori": ogiltig}, index=df_in.index)
+
+
+KUB_FILNAMN = "franvaro_kub.parquet"
+DIMENSIONER = ["skola", "klass", "årskurs"]
+# Vyer som räknas fram direkt när kuben byggs (rapportens översikter och jämförelsen)
+STANDARDVYER = [("årskurs",), ("skola", "årskurs")]
+
+
+class Kub:
+    """
+    Antal elever per (skola, klass, årskurs, total_kategori, ogiltig_kategori).
+
+    ``celler`` har en rad per kombination som förekommer; kategorierna är NaN för
+    elever utan kategori (t.ex. ogiltig frånvaro under 1,0 %). Vyer (``oversikt``)
+    sparas när de räknats ut första gången.
+    """
+
+    def __init__(self, celler: pd.DataFrame):
+        self.celler = celler
+        self._vyer: Dict[Tuple[str, ...], pd.DataFrame] = {}
+
+    @classmethod
+    def fran_tabell(cls, df_in: pd.DataFrame) -> "Kub":
+        """Bygg kuben från rensad data med en enda gruppräkning."""
+        kat = kategorisera(df_in)
+        koder, varden = [], {}
+        for dim in DIMENSIONER:
+            kod, unika = pd.factorize(df_in[dim], use_na_sentinel=False)
+            koder.append(kod)
+            varden[dim] = np.asarray(unika, dtype=object)
+        # Ingen kategori (-1) blir en egen kod sist
+        for kol, etiketter in [("total_kategori", TOTALKATEGORIER), ("ogiltig_kategori", OGILTIGKATEGORIER)]:
+            kod = kat[kol].cat.codes.to_numpy().astype(np.int64)
+            koder.append(np.where(kod < 0, len(etiketter), kod))
+
+        former = [len(varden[dim]) for dim in DIMENSIONER] + [len(TOTALKATEGORIER) + 1, len(OGILTIGKATEGORIER) + 1]
+        if len(df_in):
+            platt = np.ravel_multi_index(koder, former)
+            unika_celler, antal = np.unique(platt, return_counts=True)
+        else:
+            unika_celler, antal = np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        cell_koder = np.unravel_index(unika_celler, former)
+
+        celler = {dim: varden[dim][cell_koder[nr]] for nr, dim in enumerate(DIMENSIONER)}
+        for nr, (kol, etiketter) in enumerate(
+            [("total_kategori", TOTALKATEGORIER), ("ogiltig_kategori", OGILTIGKATEGORIER)], start=len(DIMENSIONER)
+        ):
+            kod = np.where(cell_koder[nr] == len(etiketter), -1, cell_koder[nr])
+            celler[kol] = pd.Categorical.from_codes(kod, categories=etiketter)
+        celler["antal"] = antal.astype("int64")
+
+        kub = cls(pd.DataFrame(celler))
+        for vy in STANDARDVYER:
+            kub.oversikt(vy)
+        return kub
+
+    @classmethod
+    def sla_ihop(cls, kuber: Sequence["Kub"]) -> "Kub":
+        """
+        Summera delkuber (t.ex. en per skola) cell för cell.
+
+        Antalen är additiva, så alla vyer blir desamma som om kuben byggts från alla
+        rader på en gång.
+        """
+        if not kuber:
+            return cls.fran_tabell(tom_tabell())
+        celler = pd.concat([kub.celler for kub in kuber], ignore_index=True)
+        nycklar = DIMENSIONER + ["total_kategori", "ogiltig_kategori"]
+        celler = celler.groupby(nycklar, observed=True, dropna=False, sort=False)["antal"].sum().reset_index()
+
+        kub = cls(celler)
+        for vy in STANDARDVYER:
+            kub.oversikt(vy)
+        return kub
+
+    def oversikt(self, per: Sequence[str] = ("årskurs",), **urval) -> pd.DataFrame:
+        """
+        Antal per kategori (``SUMMERING_KOLUMNER``) per grupp.
+
+        Args:
+            per: Dimensioner att gruppera på, t.ex. ("skola", "klass")
+            urval: Filtrera först, t.ex. ``skola="Alpha"``
+
+        Returns:
+            Sorterad tabell med en rad per grupp (MultiIndex vid flera dimensioner).
+            Som i översikterna räknas bara elever med årskurs.
+        """
+        per = tuple(per)
+        if not urval and per in self._vyer:
+            return self._vyer[per]
+
+        celler = self.celler[self.celler["årskurs"].notna()]
+        for dim, varde in urval.items():
+            celler = celler[celler[dim] == varde]
+        nycklar = list(per)
+
+        if celler.empty:
+            index = pd.MultiIndex.from_arrays([[] for _ in nycklar], names=nycklar) if len(nycklar) > 1 \
+                else pd.Index([], name=nycklar[0], dtype=object)
+            vy = pd.DataFrame(0, index=index, columns=SUMMERING_KOLUMNER, dtype="int64")
+        else:
+            delar = []
+            for kol, etiketter, prefix in [
+                ("total_kategori", TOTALKATEGORIER, "Total frånvaro"),
+                ("ogiltig_kategori", OGILTIGKATEGORIER, "Ogiltig frånvaro"),
+            ]:
+                del_ = (
+                    celler.groupby(nycklar + [kol], observed=True)["antal"].sum()
+                    .unstack(kol).reindex(columns=etiketter)
+                )
+                del_.columns = [f"{prefix} {kat}" for kat in etiketter]
+                delar.append(del_)
+            delar.append(celler.groupby(nycklar)["antal"].sum().rename("Elevantal"))
+            vy = pd.concat(delar, axis=1).fillna(0).astype("int64")[SUMMERING_KOLUMNER].sort_index()
+
+        if not urval:
+            self._vyer[per] = vy
+        return vy
+
+    def summeringar(self) -> Tuple[pd.DataFrame, Dict[str, pd.DataFrame]]:
+        """(kommunöversikt, {skola: skolöversikt}) som rapportens översiktsflikar."""
+        kommun = self.oversikt(["årskurs"]).copy()
+        kommun.index.name = None
+
+        per_skola = {}
+        antal = self.oversikt(["skola", "årskurs"])
+        skolor = antal.index.get_level_values("skola")
+        for skola in sorted(skolor.unique()):
+            antal_s = antal[skolor == skola]
+            antal_s.index = antal_s.index.get_level_values("årskurs")
+            antal_s.index.name = None
+            per_skola[skola] = antal_s
+        return kommun, per_skola
+
+    def spara(self, filvag: Path):
+        filvag.parent.mkdir(parents=True, exist_ok=True)
+        self.celler.to_parquet(filvag, index=False)
+
+    @classmethod
+    def las(cls, filvag: Path) -> "Kub":
+        return cls(pd.read_parquet(filvag))
+
+
+def bygg_summering(df_in: pd.DataFrame) -> pd.DataFrame:
+    """Samma översikt som tidigare, men för valfritt urval (kommun/skola)."""
+    return Kub.fran_tabell(df_in).summeringar()[0]
+
+
+def bygg_antal_per_skola(df_in: pd.DataFrame) -> pd.DataFrame:
+    """
+    Antal elever per kategori för varje (skola, årskurs).
+
+    Returns:
+        DataFrame med MultiIndex (skola, årskurs), sorterat, och ``SUMMERING_KOLUMNER``
+    """
+    return Kub.fran_tabell(df_in).oversikt(["skola", "årskurs"])
+
+
+def bygg_summeringar(df_in: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, pd.DataFrame]]:
+    """
+    Bygg kommunöversikten och en översikt per skola från en enda gruppräkning.
+
+    Returns:
+        (kommunöversikt, {skola: skolöversikt}) där skolorna ligger i sorterad ordning
+    """
+    return Kub.fran_tabell(df_in).summeringar()
@@ -0,0 +1,131 @@
+"""
+Syntetiska skolrapporter (.xls) i samma layout som den riktiga exporten.
+
+Varje fil får fyra rubrikrader, en "Klass:"-rad per klass följd av två tomma
+rader och kolumnrubrikerna, och sedan elevrader (med tom rad emellan) med de
+tio mätkolumnerna som text: minuter och procent med svenska "%"/decimalkomma.
+Första skolan heter "Rörvik" och har blandklassen "1-2" (elever födda 17/18),
+så att blandklasslogiken också körs.
+
+Användning:
+    python syntetiska_rapporter.py MAPP [--skolor 20] [--klasser 12] [--elever 25] [--frö 0]
+"""
+import argparse
+import random
+from pathlib import Path
+from typing import List
+
+import xlwt
+
+# Klassnamn i den ordning de delas ut; årskursen ger elevernas födelseår
+KLASSNAMN = ["F", "1A", "1B", "2", "3A", "3B", "4A", "4B", "5", "6A", "6B", "AGSä", "AGSäo"]
+KOLUMNRUBRIKER = ["Namn", "Personnr", "Undv. tid", "Lekt.", "N min", "GF min", "F\xa0min", "N\xa0%", "GF\xa0%", "F %"]
+FORNAMN = ["Alva", "Elsa", "Maja", "Wilma", "Ali", "Theo", "Liam", "Omar", "Nora", "Signe", "Hugo", "Aziz"]
+EFTERNAMN = ["Andersson", "Björk", "Nilsson", "Ali", "Klasson", "Mulhem", "Sallku", "Lind", "Berg"]
+
+# Läsårets startår: elever i Åk k är födda startår - 7 - k (Åk 1 -> 18 för 2025)
+STARTAR = 2025
+MAX_RADER = 65536  # xlwt:s gräns per blad
+
+
+def _fodelsear(klass: str, rng: random.Random) -> int:
+    if klass == "1-2":
+        return rng.choice([17, 18])
+    siffra = next((t for t in klass if t.isdigit()), None)
+    arskurs = int(siffra) if siffra else 0  # F och AGSä räknas som förskoleklass
+    return (STARTAR - 7 - arskurs) % 100
+
+
+def _procent(varde: float, rng: random.Random) -> str:
+    """Procent som i exporten: heltal eller decimalkomma, hårt eller vanligt mellanslag."""
+    text = f"{varde:.0f}" if rng.random() < 0.8 else f"{varde:.1f}".replace(".", ",")
+    return text + rng.choice(["\xa0%", " %"])
+
+
+def _elevrad(klass: str, rng: random.Random) -> list:
+    ar = _fodelsear(klass, rng)
+    personnr = f"{ar:02d}{rng.randint(1, 12):02d}{rng.randint(1, 28):02d}-{rng.randint(0, 9999):04d}"
+    undv_tid = rng.randint(18000, 40000)
+    narvaro = rng.choice([100, 99, 97, 95, 93, 91, 88.5, 85, 80, 72, 55.5, 40])
+    ogiltig = min(100 - narvaro, rng.choice([0, 0, 0, 0.5, 1, 3, 5, 5.1, 12, 16, 30]))
+    giltig = 100 - narvaro - ogiltig
+    return [
+        f"{rng.choice(FORNAMN)} {rng.choice(EFTERNAMN)}",
+        personnr,
+        str(undv_tid),
+        str(undv_tid // 48),
+        str(round(undv_tid * narvaro / 100)),
+        str(round(undv_tid * giltig / 100)),
+        str(round(undv_tid * ogiltig / 100)),
+        _procent(narvaro, rng),
+        _procent(giltig, rng),
+        _procent(ogiltig, rng),
+    ]
+
+
+def skolrapport_rader(skola_nr: int, antal_klasser: int, antal_elever: int, rng: random.Random) -> List[list]:
+    """Alla rader (11 kolumner) i en skolrapport."""
+    tom = [""] * 11
+    rader = [
+        ["", "", "", "", "", f"Utskriftsdatum: {STARTAR + 1}-06-10 13:11:35"] + [""] * 5,
+        ["", "Frånvarorapport skola"] + [""] * 9,
+        list(tom),
+        ["Statistik över skolans närvaro/frånvaro"] + [""] * 10,
+    ]
+    for k in range(antal_klasser):
+        klass = "1-2" if skola_nr == 0 and k == 0 else KLASSNAMN[k % len(KLASSNAMN)]
+        if k >= len(KLASSNAMN):
+            klass += str(k // len(KLASSNAMN) + 1)
+        rader += [["", f"Klass: {klass}"] + [""] * 9, list(tom), list(tom), [""] + KOLUMNRUBRIKER]
+        for e in range(antal_elever):
+            if e > 0:
+                rader.append(list(tom))
+            rader.append([""] + _elevrad(klass, rng))
+    return rader
+
+
+def skriv_xls(rader: List[list], filvag: Path):
+    if len(rader) > MAX_RADER:
+        raise ValueError(f"{len(rader)} rader får inte plats i ett xls-blad (max {MAX_RADER})")
+    wb = xlwt.Workbook()
+    ws = wb.add_sheet("Sheet1")
+    for r, rad in enumerate(rader):
+        for c, varde in enumerate(rad):
+            if varde != "":
+                ws.write(r, c, varde)
+    wb.save(str(filvag))
+
+
+def skapa_syntetiska_rapporter(
+    mapp: Path, skolor: int = 20, klasser: int = 12, elever: int = 25, fro: int = 0
+) -> List[Path]:
+    """
+    Skriv ``skolor`` rapporter med ``klasser`` klasser à ``elever`` elever.
+
+    Samma frö ger samma filer, så resultat kan jämföras mellan körningar.
+
+    Returns:
+        Sökvägarna till de skapade filerna, i sorterad ordning
+    """
+    mapp.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(fro)
+    filer = []
+    for nr in range(skolor):
+        namn = "Rörvik" if nr == 0 else f"Skola {nr:03d}"
+        filvag = mapp / f"{namn}.xls"
+        skriv_xls(skolrapport_rader(nr, klasser, elever, rng), filvag)
+        filer.append(filvag)
+    return sorted(filer)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Skapa syntetiska skolrapporter")
+    parser.add_argument("mapp", type=Path, help="Mapp att skriva .xls-filerna till")
+    parser.add_argument("--skolor", type=int, default=20)
+    parser.add_argument("--klasser", type=int, default=12)
+    parser.add_argument("--elever", type=int, default=25)
+    parser.add_argument("--frö", dest="fro", type=int, default=0)
+    args = parser.parse_args()
+
+    filer = skapa_syntetiska_rapporter(args.mapp, args.skolor, args.klasser, args.elever, args.fro)
+    print(f"✔️ Skapade {len(filer)} rapporter i '{args.mapp}'")
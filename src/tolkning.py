@@ -0,0 +1,108 @@
+"""
+Kolumnorienterad tolkning av den sammanslagna frånvarofilen (franvaro.xls).
+
+Indata är den råa tabellen där kolumn 0 är skola och resten är exporten som den
+ser ut i skolornas rapporter: "Klass:"-rader följda av elevrader med mätvärden.
+Hela tabellen tolkas med arrayoperationer i stället för rad för rad.
+"""
+import numpy as np
+import pandas as pd
+
+# EXAKT 10 kolumner efter skola och klass
+MATKOLUMNER = [
+    "namn", "personnr", "undv_tid", "lekt",
+    "n_min", "gf_min", "f_min", "n_pct", "gf_pct", "f_pct"
+]
+KOLUMNER = ["skola", "klass"] + MATKOLUMNER
+
+
+def _som_serie(varden: np.ndarray) -> pd.Series:
+    """Platta ut en 2D-objektarray till en Series (radvis ordning)."""
+    return pd.Series(varden.ravel(), dtype=object)
+
+
+def _klassmarkorer(varden: np.ndarray) -> pd.Series:
+    """
+    Hitta "Klass:"-rader och returnera klassnamnet per rad (NaN för övriga rader).
+
+    Första cellen som innehåller "Klass:" i en rad avgör, oavsett kolumn.
+    """
+    n_rader, n_kol = varden.shape
+    text = _som_serie(varden).astype(str)
+    ar_markor = text.str.contains("Klass:", regex=False).fillna(False).to_numpy(dtype=bool)
+    ar_markor = ar_markor.reshape(n_rader, n_kol)
+
+    har_markor = ar_markor.any(axis=1)
+    forsta = ar_markor.argmax(axis=1)
+
+    klass = pd.Series(np.nan, index=range(n_rader), dtype=object)
+    rader = np.flatnonzero(har_markor)
+    if len(rader):
+        celler = pd.Series(varden[rader, forsta[rader]], dtype=object)
+        klass.iloc[rader] = celler.str.split(":", n=1).str[1].str.strip().to_numpy()
+    return klass
+
+
+def _tomma(varden: np.ndarray) -> np.ndarray:
+    """Tom cell = None/NaN, "" eller "nan" (efter strip, skiftlägesokänsligt)."""
+    platt = _som_serie(varden)
+    text = platt.astype(str).str.strip().str.lower()
+    tom = platt.isna() | text.isin(["", "nan"])
+    return tom.to_numpy(dtype=bool).reshape(varden.shape)
+
+
+def _numeriska(varden: np.ndarray) -> np.ndarray:
+    """Celler som går att tolka som tal."""
+    platt = _som_serie(varden)
+    return pd.to_numeric(platt, errors="coerce").notna().to_numpy(dtype=bool).reshape(varden.shape)
+
+
+def tolka_franvaro(raw: pd.DataFrame) -> pd.DataFrame:
+    """
+    Tolka rådata (kolumn 0 = skola) till en tabell med en rad per elev.
+
+    - "Klass:"-rader (i valfri kolumn) sätter aktuell klass för följande rader
+    - Ledande tomkolumner efter skola tas bort
+    - Rader utan något numeriskt värde (rubriker, tomrader) filtreras bort
+    - Exakt 10 kolumner behålls efter skola, kortare rader fylls ut med ""
+
+    Returns:
+        DataFrame med kolumnerna i ``KOLUMNER`` (tom om inga datarader hittades)
+    """
+    if raw.empty:
+        return pd.DataFrame(columns=KOLUMNER)
+
+    varden = raw.to_numpy(dtype=object)
+
+    klass_per_rad = _klassmarkorer(varden)
+    ar_markor = klass_per_rad.notna().to_numpy()
+    aktuell_klass = klass_per_rad.ffill()
+
+    # Rader före första "Klass:" (eller efter en tom "Klass:") hoppas över
+    kandidat = ~ar_markor & aktuell_klass.notna().to_numpy() & (aktuell_klass != "").to_numpy()
+    rader = np.flatnonzero(kandidat)
+    if not len(rader):
+        return pd.DataFrame(columns=KOLUMNER)
+
+    rest = varden[rader, 1:]
+    bredd = rest.shape[1]
+
+    # Kräv minst ett numeriskt värde i mätkolumnerna
+    har_numeriskt = _numeriska(rest).any(axis=1) if bredd else np.zeros(len(rader), dtype=bool)
+    rader, rest = rader[har_numeriskt], rest[har_numeriskt]
+    if not len(rader):
+        return pd.DataFrame(columns=KOLUMNER)
+
+    # Droppa ledande tomkolumner: antal inledande tomma celler per rad
+    ledande = np.cumprod(_tomma(rest), axis=1).sum(axis=1)
+    kolumn = ledande[:, None] + np.arange(len(MATKOLUMNER))
+    inom = kolumn < bredd
+    matvarden = np.take_along_axis(rest, np.minimum(kolumn, bredd - 1), axis=1)
+    matvarden = np.where(inom, matvarden, "")
+
+    skola = pd.Series(varden[rader, 0].astype(str), dtype=object).str.strip()
+
+    df = pd.DataFrame(matvarden, columns=MATKOLUMNER)
+    df.insert(0, "klass", aktuell_klass.iloc[rader].to_numpy())
+    df.insert(0, "skola", skola.to_numpy())
+    return df.infer_objects()
@@ -0,0 +1,164 @@
+"""
+Innehållsadresserad cache för tolkade och rensade skolrapporter.
+
+Varje rå .xls-fil i ``RAW_FRANVARO_DIR`` identifieras med storlek, mtime och
+SHA-256 av innehållet. De rensade elevraderna för skolan sparas som Parquet i
+``data/processed/franvaro/<läsår>/``, så att nästa körning bara behöver tolka
+nya eller ändrade filer. Kräver pyarrow.
+
+Användning:
+    python tolkningscache.py --status   # visa cachade skolor
+    python tolkningscache.py --rensa    # töm cachen för aktuellt läsår
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+import pandas as pd
+from config_paths import LASAR
+
+try:
+    from config.blandklasser_config import få_avtryck
+except ImportError:
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+    from config.blandklasser_config import få_avtryck
+
+# Höj när tolkning/rensning ändras så att gamla cacheposter inte återanvänds
+CACHE_VERSION = 4
+INDEXFIL = "index.json"
+
+
+def berakna_hash(filvag: Path) -> str:
+    """SHA-256 av filens innehåll."""
+    h = hashlib.sha256()
+    with open(filvag, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _for_parquet(df: pd.DataFrame) -> pd.DataFrame:
+    """Kolumner med blandade typer (t.ex. tal och text) sparas som text."""
+    df = df.copy()
+    for kol in df.columns:
+        if df[kol].dtype == object and pd.api.types.infer_dtype(df[kol], skipna=True).startswith("mixed"):
+            df[kol] = df[kol].where(df[kol].isna(), df[kol].astype(str))
+    return df
+
+
+class TolkningsCache:
+    """
+    Cache över rensade elevrader per skolfil.
+
+    Indexet (``index.json``) mappar filnamn -> fingeravtryck och cachenyckel.
+    Cachenyckeln bygger på innehållet, skolnamnet, ``CACHE_VERSION``, läsåret
+    (seklet i födelseåret beror på det) och blandklasskonfigurationen (årskursen
+    i de cachade raderna beror på den).
+    """
+
+    def __init__(self, cache_mapp: Path, lasar: str = LASAR):
+        self.cache_mapp = Path(cache_mapp)
+        self.lasar = lasar
+        self.indexfil = self.cache_mapp / INDEXFIL
+        self.index = {}
+        self.konfig = få_avtryck()
+        # Fingeravtryck som räknats ut i den här körningen (t.ex. vid en miss i hamta)
+        self._avtryck: Dict[str, dict] = {}
+        if self.indexfil.exists():
+            try:
+                self.index = json.loads(self.indexfil.read_text(encoding="utf-8"))
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Kunde inte läsa cacheindex {self.indexfil}: {e}")
+
+    def _fingeravtryck(self, filvag: Path) -> dict:
+        """Storlek och mtime alltid; hash återanvänds om storlek och mtime är oförändrade."""
+        stat = filvag.stat()
+        for post in (self._avtryck.get(filvag.name, {}), self.index.get(filvag.name, {})):
+            if post.get("storlek") == stat.st_size and post.get("mtime_ns") == stat.st_mtime_ns:
+                sha256 = post["sha256"]
+                break
+        else:
+            sha256 = berakna_hash(filvag)
+        avtryck = {"storlek": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": sha256}
+        self._avtryck[filvag.name] = avtryck
+        return avtryck
+
+    def _nyckel(self, skola: str, sha256: str) -> str:
+        return hashlib.sha256(f"v{CACHE_VERSION}|{self.lasar}|{self.konfig}|{skola}|{sha256}".encode("utf-8")).hexdigest()
+
+    def _sokvag(self, nyckel: str) -> Path:
+        return self.cache_mapp / f"{nyckel}.parquet"
+
+    def hamta(self, filvag: Path) -> Optional[pd.DataFrame]:
+        """Cachade rader för filen, eller None om filen är ny eller ändrad."""
+        avtryck = self._fingeravtryck(filvag)
+        nyckel = self._nyckel(filvag.stem, avtryck["sha256"])
+        sokvag = self._sokvag(nyckel)
+        if not sokvag.exists():
+            return None
+        try:
+            df = pd.read_parquet(sokvag)
+        except Exception as e:
+            print(f"⚠️ Kunde inte läsa cache för {filvag.name}: {e}")
+            return None
+        self.index[filvag.name] = {**avtryck, "nyckel": nyckel, "skola": filvag.stem}
+        return df
+
+    def spara(self, filvag: Path, df: pd.DataFrame):
+        """Spara rensade rader för filen."""
+        avtryck = self._fingeravtryck(filvag)
+        nyckel = self._nyckel(filvag.stem, avtryck["sha256"])
+        self.cache_mapp.mkdir(parents=True, exist_ok=True)
+        _for_parquet(df).to_parquet(self._sokvag(nyckel), index=False)
+        self.index[filvag.name] = {**avtryck, "nyckel": nyckel, "skola": filvag.stem}
+
+    def rensa_inaktuella(self, aktuella_filer: Iterable[Path]) -> int:
+        """
+        Ta bort poster för filer som inte längre finns och cachefiler som inget pekar på.
+
+        Returns:
+            Antal borttagna cachefiler
+        """
+        namn = {filvag.name for filvag in aktuella_filer}
+        self.index = {fil: post for fil, post in self.index.items() if fil in namn}
+        anvanda = {post["nyckel"] for post in self.index.values()}
+
+        borttagna = 0
+        for sokvag in self.cache_mapp.glob("*.parquet"):
+            if sokvag.stem not in anvanda:
+                sokvag.unlink()
+                borttagna += 1
+        return borttagna
+
+    def tom(self) -> int:
+        """Invalidera hela cachen. Returnerar antal borttagna cachefiler."""
+        self.index = {}
+        return self.rensa_inaktuella([])
+
+    def skriv_index(self):
+        self.cache_mapp.mkdir(parents=True, exist_ok=True)
+        self.indexfil.write_text(json.dumps(self.index, indent=2, ensure_ascii=False), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    from config_paths import PROCESSED_FRANVARO_DIR
+
+    parser = argparse.ArgumentParser(description="Hantera cachen för tolkade skolrapporter")
+    parser.add_argument("--rensa", action="store_true", help="Töm cachen för aktuellt läsår")
+    parser.add_argument("--status", action="store_true", help="Visa cachade skolor")
+    args = parser.parse_args()
+
+    cache = TolkningsCache(PROCESSED_FRANVARO_DIR)
+    if args.rensa:
+        antal = cache.tom()
+        cache.skriv_index()
+        print(f"✔️ Tömde cachen i '{PROCESSED_FRANVARO_DIR}' ({antal} filer borttagna)")
+    else:
+        if not cache.index:
+            print(f"📁 Cachen i '{PROCESSED_FRANVARO_DIR}' är tom")
+        for fil, post in sorted(cache.index.items()):
+            print(f"   📄 {fil}: {post['storlek']} byte, sha256 {post['sha256'][:12]}…")
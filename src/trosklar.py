@@ -0,0 +1,271 @@
+"""
+Antal elever över valfria frånvarogränser ("hur många ligger över X %?").
+
+Total och ogiltig frånvaro delas in i ett fint histogram (0,1 procentenhet per
+fack) per (skola, årskurs) en gång. Histogrammet summeras bakifrån, så antalet
+elever över en gräns är sedan bara en uppslagning per grupp och gräns – oavsett
+hur många gränser som efterfrågas behöver eleverna inte gås igenom igen.
+
+Gränserna måste ligga på 0,1-rutnätet (t.ex. 5, 10, 11, 15,5); då är svaren exakta.
+
+Användning:
+    python trosklar.py                          # 5/10/11/15/20/30 %
+    python trosklar.py 11 20 --matt ogiltig
+"""
+import argparse
+import sys
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from config_paths import LASAR, OUTPUT_FRANVARO_DIR, PROCESSED_FRANVARO_DIR, RAW_FRANVARO_DIR
+
+# Facksbredd i procentenheter och antal fack (0-100 %)
+STEG = 0.1
+ANTAL_FACK = int(round(100 / STEG)) + 1
+
+STANDARDGRANSER = [5, 10, 11, 15, 20, 30]
+MATT = ("total", "ogiltig")
+NYCKLAR = ["skola", "årskurs"]
+TROSKEL_FILNAMN = "franvaro_over_trosklar.xlsx"
+
+
+def _fack(procent: pd.Series) -> np.ndarray:
+    """
+    Fack per värde: ``ceil(v / STEG)`` (höger-slutna fack), -1 för saknade värden.
+
+    Fack k innehåller (k-1)·STEG < v <= k·STEG, så "v > gräns" är exakt "fack > gräns/STEG".
+    Kvoten avrundas till tre decimaler (``np.round(..., 3)``), vilket ger upplösningen
+    0,0001 procentenheter: 11,00001 räknas inte som > 11, men 11,0001 gör det.
+    """
+    varden = procent.to_numpy(dtype=float)
+    saknas = np.isnan(varden)
+    # Avrundning tar bort flyttalsfel (även från float32) innan facket bestäms
+    fack = np.ceil(np.round(np.nan_to_num(varden) / STEG, 3))
+    fack = np.clip(fack, 0, ANTAL_FACK - 1).astype(np.int64)
+    fack[saknas] = -1
+    return fack
+
+
+def _grans_till_fack(grans: float) -> int:
+    fack = round(grans / STEG)
+    if not np.isclose(fack * STEG, grans) or not 0 <= fack < ANTAL_FACK:
+        raise ValueError(f"Gränsen {grans} % ligger inte på {STEG}-rutnätet mellan 0 och 100")
+    return int(fack)
+
+
+def _kolumnnamn(grans: float) -> str:
+    return f"> {grans:g} %"
+
+
+def _gruppera(nivaer: Sequence) -> tuple:
+    """
+    (gruppkod per rad, unika grupper som MultiIndex över ``NYCKLAR``).
+
+    Saknad årskurs blir en egen grupp så att totalen omfattar alla elever.
+    """
+    koder, unika_nivaer = [], []
+    for varden in nivaer:
+        kod, unika = pd.factorize(varden, use_na_sentinel=False)
+        koder.append(kod)
+        unika_nivaer.append(unika)
+    grupp_kod, par = pd.factorize(pd.MultiIndex.from_arrays(koder))
+    grupper = pd.MultiIndex.from_arrays(
+        [pd.Index(unika_nivaer[i]).take(par.get_level_values(i)) for i in range(len(NYCKLAR))],
+        names=NYCKLAR,
+    )
+    return grupp_kod, grupper
+
+
+class TroskelHistogram:
+    """
+    Kumulativa histogram över total och ogiltig frånvaro per (skola, årskurs).
+
+    ``over[matt][g, k]`` är antalet elever i grupp g med värde i fack > k. Ett gallrat
+    histogram (``gallra``) har bara kolumnerna för facken i ``fack``.
+    """
+
+    def __init__(
+        self, grupper: pd.MultiIndex, over: dict, elevantal: np.ndarray, fack: Optional[np.ndarray] = None
+    ):
+        self.grupper = grupper
+        self.over = over
+        self.elevantal = elevantal
+        self.fack = fack
+
+    def _kolumner(self, trosklar: Sequence[float]) -> List[int]:
+        """Kolumnerna i ``over`` för gränserna."""
+        fack = [_grans_till_fack(g) for g in trosklar]
+        if self.fack is None:
+            return fack
+        saknas = [g for g, f in zip(trosklar, fack) if f not in self.fack]
+        if saknas:
+            raise ValueError(f"Histogrammet är gallrat och saknar gränserna {saknas}")
+        return list(np.searchsorted(self.fack, fack))
+
+    def gallra(self, trosklar: Iterable[float]) -> "TroskelHistogram":
+        """
+        Bara de kolumner som behövs för ``trosklar`` (ett par tal per grupp i stället för ett
+        per fack), t.ex. när ett histogram per skola ska sparas och läggas ihop.
+        """
+        trosklar = sorted(set(trosklar))
+        kolumner = self._kolumner(trosklar)
+        fack = np.array([_grans_till_fack(g) for g in trosklar], dtype=np.int64)
+        over = {matt: self.over[matt][:, kolumner] for matt in MATT}
+        return TroskelHistogram(self.grupper, over, self.elevantal, fack)
+
+    @classmethod
+    def fran_tabell(cls, df: pd.DataFrame) -> "TroskelHistogram":
+        """Bygg histogrammen från rensad data (kolumnerna från ``analys.rensa_franvaro``)."""
+        grupp_kod, grupper = _gruppera([df[nyckel] for nyckel in NYCKLAR])
+        n_grupper = len(grupper)
+
+        procent = {
+            "total": 100 - df["närvaro_pct"],
+            "ogiltig": df["ogiltig_frånvaro_pct"],
+        }
+        over = {}
+        for matt, varden in procent.items():
+            fack = _fack(varden)
+            har = fack >= 0
+            antal = np.bincount(
+                grupp_kod[har] * ANTAL_FACK + fack[har], minlength=n_grupper * ANTAL_FACK
+            ).reshape(n_grupper, ANTAL_FACK)
+            # Antal i fack > k: summera bakifrån och flytta ett steg
+            bakifran = np.cumsum(antal[:, ::-1], axis=1)[:, ::-1]
+            over[matt] = np.concatenate(
+                [bakifran[:, 1:], np.zeros((n_grupper, 1), dtype=np.int64)], axis=1
+            )
+
+        elevantal = np.bincount(grupp_kod, minlength=n_grupper)
+        return cls(grupper, over, elevantal)
+
+    @classmethod
+    def sla_ihop(cls, delar: Sequence["TroskelHistogram"]) -> "TroskelHistogram":
+        """
+        Summera histogram (t.ex. ett per skola); en grupp som finns i flera delar läggs ihop.
+
+        Antalen per fack är additiva, så resultatet är detsamma som ``fran_tabell`` på alla rader.
+        Delarna ska vara gallrade på samma sätt (eller inte alls).
+        """
+        alla = delar[0].grupper.append([del_.grupper for del_ in delar[1:]])
+        grupp_kod, grupper = _gruppera([alla.get_level_values(nyckel) for nyckel in NYCKLAR])
+        over = {}
+        for matt in MATT:
+            over[matt] = np.zeros((len(grupper), delar[0].over[matt].shape[1]), dtype=np.int64)
+            np.add.at(over[matt], grupp_kod, np.concatenate([del_.over[matt] for del_ in delar]))
+        elevantal = np.bincount(
+            grupp_kod, weights=np.concatenate([del_.elevantal for del_ in delar]), minlength=len(grupper)
+        ).astype(np.int64)
+        return cls(grupper, over, elevantal, delar[0].fack)
+
+    def antal_over(
+        self, trosklar: Iterable[float], matt: str = "total", per: Sequence[str] = ("årskurs",)
+    ) -> pd.DataFrame:
+        """
+        Antal elever med frånvaro strikt över varje gräns.
+
+        Args:
+            trosklar: Gränser i procent (på 0,1-rutnätet)
+            matt: "total" (100 - närvaro) eller "ogiltig"
+            per: Nivåer att redovisa per, någon av ("skola", "årskurs") eller tom för hela kommunen
+
+        Returns:
+            En rad per grupp (sorterad), kolumnerna "> X %" och "Elevantal".
+            Rader med saknad årskurs tas bara med när ``per`` inte innehåller årskurs.
+        """
+        if matt not in MATT:
+            raise ValueError(f"Okänt mått '{matt}', välj bland {MATT}")
+        trosklar = list(trosklar)
+
+        tabell = pd.DataFrame(
+            self.over[matt][:, self._kolumner(trosklar)], index=self.grupper,
+            columns=[_kolumnnamn(g) for g in trosklar],
+        )
+        tabell["Elevantal"] = self.elevantal
+
+        per = list(per)
+        if not per:
+            return tabell.sum().to_frame("Kommun").T
+        if "årskurs" in per:
+            tabell = tabell[tabell.index.get_level_values("årskurs").notna()]
+        return tabell.groupby(level=per).sum().sort_index()
+
+
+def las_rensad_data(
+    indata_mapp: Optional[Path] = None, cache_mapp: Optional[Path] = None, lasar: str = LASAR
+) -> pd.DataFrame:
+    """
+    Rensad data för läsåret via pipelinens cache (bara nya eller ändrade skolfiler tolkas).
+    """
+    from busavsjo_samla_franvaro import hitta_rapportfiler
+    from pipeline import bearbeta_med_cache
+    from tolkningscache import TolkningsCache
+
+    filer = hitta_rapportfiler(indata_mapp or RAW_FRANVARO_DIR)
+    df, _, _ = bearbeta_med_cache(filer, TolkningsCache(cache_mapp or PROCESSED_FRANVARO_DIR, lasar))
+    return df
+
+
+def skriv_troskelrapport(
+    histogram: TroskelHistogram, trosklar: List[float], output_path: Path, matt: Sequence[str] = MATT
+):
+    """En flik per mått och nivå (kommun, per årskurs, per skola och årskurs)."""
+    from openpyxl import Workbook
+    from rapport import skriv_tabell_blad
+
+    wb = Workbook(write_only=True)
+    for m in matt:
+        rubrik = "Total" if m == "total" else "Ogiltig"
+        skriv_tabell_blad(wb, f"{rubrik} - Kommun", histogram.antal_over(trosklar, m, per=()))
+        skriv_tabell_blad(wb, f"{rubrik} - Per årskurs", histogram.antal_over(trosklar, m).reset_index())
+        skriv_tabell_blad(wb, f"{rubrik} - Per skola", histogram.antal_over(trosklar, m, per=NYCKLAR).reset_index())
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    wb.save(str(output_path))
+
+
+def kor_trosklar(
+    trosklar: Optional[List[float]] = None,
+    matt: Sequence[str] = MATT,
+    df: Optional[pd.DataFrame] = None,
+    output_mapp: Optional[Path] = None,
+    histogram: Optional[TroskelHistogram] = None,
+) -> Optional[Path]:
+    """
+    Skriv ``franvaro_over_trosklar.xlsx`` för de valda gränserna.
+
+    Args:
+        df: Rensad data från en pipelinekörning; annars läses den via cachen
+        histogram: Färdigt histogram (t.ex. hopslaget från skolornas); då behövs inte ``df``
+
+    Returns:
+        Sökväg till rapporten, eller None om inga datarader fanns
+    """
+    trosklar = trosklar or STANDARDGRANSER
+    if histogram is None:
+        if df is None:
+            df = las_rensad_data()
+        if df.empty:
+            print("⚠️ Hittade inga datarader.")
+            return None
+        histogram = TroskelHistogram.fran_tabell(df)
+    output_path = (output_mapp or OUTPUT_FRANVARO_DIR) / TROSKEL_FILNAMN
+    skriv_troskelrapport(histogram, trosklar, output_path, matt=matt)
+
+    for m in matt:
+        kommun = histogram.antal_over(trosklar, m, per=()).iloc[0]
+        print(f"{m.capitalize()} frånvaro: " + ", ".join(f"{k}: {v}" for k, v in kommun.items()))
+    print(f"✔️ Klar! Filen sparades till {output_path}")
+    return output_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Antal elever över valfria frånvarogränser")
+    parser.add_argument("trosklar", nargs="*", type=float, help=f"Gränser i procent (standard: {STANDARDGRANSER})")
+    parser.add_argument("--matt", choices=MATT, action="append", help="Mått (standard: båda)")
+    args = parser.parse_args()
+
+    if kor_trosklar(args.trosklar or None, matt=args.matt or MATT) is None:
+        sys.exit(1)
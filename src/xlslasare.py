@@ -0,0 +1,247 @@
+"""
+Läsning av första bladet i en xls-fil: bara de kolumner och rader som behövs.
+
+Alla läsare ger samma värden som xlrd:s ``row_values`` för de celler som väljs
+(text som str, tal som float, tomma celler som "") och samma bladstorlek som
+xlrd. Resultatet byggs kolumn för kolumn i arrayer, aldrig som en lista av rader.
+
+Läsare:
+    "biff"  (standard) Filen minnesmappas och ges till xlrd med ``on_demand``, så
+            bara arbetsbokens gemensamma del (delade strängar, bladens positioner)
+            tolkas. Första bladets cellposter läses sedan direkt ur bufferten:
+            poster i kolumner eller rader som inte efterfrågas hoppas över utan att
+            värdet avkodas, och tomma celler (BLANK/MULBLANK) kostar nästan inget.
+            Bufferten, bladets position och de delade strängarna hämtas ur xlrd:s
+            interna tillstånd, så läsaren används bara med xlrd ``XLRD_VERSION``
+            (fastlåst i README); med en annan version läses filen med "xlrd".
+    "xlrd"  Hela bladet via xlrd, sedan ``col_values`` för de valda kolumnerna.
+            Referens, och används för filer äldre än BIFF8 (Excel 97).
+
+Användning:
+    python xlslasare.py fil.xls [--kolumner 1 2 8 9 10] [--lasare xlrd]
+"""
+import argparse
+import mmap
+import struct
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import xlrd
+from xlrd.biffh import unpack_unicode
+from xlrd.sheet import unpack_RK
+
+STANDARDLASARE = "biff"
+# Versionen som "biff" är provad mot (tests/test_xlslasare.py), se _las_biff
+XLRD_VERSION = "2.0.2"
+_varnat_for_version = False
+
+# BIFF8-poster i ett kalkylblad som bär cellvärden
+_LABELSST = 0x00FD
+_NUMBER = 0x0203
+_RK = 0x027E
+_MULRK = 0x00BD
+_LABEL = 0x0204
+_BOOLERR = 0x0205
+_FORMULA = (0x0006, 0x0206, 0x0406)
+_STRING = 0x0207
+_BOF = (0x0809, 0x0409, 0x0209, 0x0009)
+_EOF = 0x000A
+
+_POST = struct.Struct("<HH")
+_CELL = struct.Struct("<HH")
+_LABELSST_CELL = struct.Struct("<HHHi")
+_NUMBER_CELL = struct.Struct("<HHHd")
+
+
+def _las_biff(filvag: Path, kolumner: Optional[Iterable[int]], forsta_rad: int, sista_rad: Optional[int]):
+    """
+    Cellposterna i första bladet, direkt ur den minnesmappade filen.
+
+    None om filen inte är BIFF8 eller om xlrd inte är ``XLRD_VERSION``.
+    """
+    global _varnat_for_version
+    if xlrd.__VERSION__ != XLRD_VERSION:
+        if not _varnat_for_version:
+            print(f"⚠️ xlrd {xlrd.__VERSION__} (inte {XLRD_VERSION}): xls-filer läses med läsaren 'xlrd'")
+            _varnat_for_version = True
+        return None
+    with open(filvag, "rb") as fil:
+        buffert = mmap.mmap(fil.fileno(), 0, access=mmap.ACCESS_READ)
+    bok = None
+    try:
+        bok = xlrd.open_workbook(file_contents=buffert, on_demand=True)
+        if bok.biff_version < 80 or not bok.nsheets:
+            return None
+        # Internt tillstånd i xlrd XLRD_VERSION (inget publikt API ger bladets position)
+        mem, pos, strangar = bok.mem, bok._sh_abs_posn[0], bok._sharedstrings
+
+        valda = None if kolumner is None else set(kolumner)
+        stopp = sista_rad if sista_rad is not None else 1 << 16
+        celler: Dict[int, Tuple[list, list]] = {}
+        max_rad = max_kol = -1
+
+        def spara(rad: int, kol: int, varde):
+            if forsta_rad <= rad < stopp and (valda is None or kol in valda):
+                rader, varden = celler.setdefault(kol, ([], []))
+                rader.append(rad)
+                varden.append(varde)
+
+        # Bladets BOF-post hoppas över
+        _, langd = _POST.unpack_from(mem, pos)
+        pos += 4 + langd
+        slut = len(mem)
+        while pos + 4 <= slut:
+            kod, langd = _POST.unpack_from(mem, pos)
+            data = pos + 4
+            pos = data + langd
+            if kod == _LABELSST:
+                rad, kol, _, index = _LABELSST_CELL.unpack_from(mem, data)
+                if rad > max_rad:
+                    max_rad = rad
+                if kol > max_kol:
+                    max_kol = kol
+                # Vanligaste posten: samma som spara(), utan funktionsanropet
+                if forsta_rad <= rad < stopp and (valda is None or kol in valda):
+                    rader, varden = celler.setdefault(kol, ([], []))
+                    rader.append(rad)
+                    varden.append(strangar[index])
+            elif kod == _NUMBER:
+                rad, kol, _, tal = _NUMBER_CELL.unpack_from(mem, data)
+                max_rad, max_kol = max(max_rad, rad), max(max_kol, kol)
+                spara(rad, kol, tal)
+            elif kod == _RK:
+                rad, kol = _CELL.unpack_from(mem, data)
+                max_rad, max_kol = max(max_rad, rad), max(max_kol, kol)
+                spara(rad, kol, unpack_RK(mem[data + 6:data + 10]))
+            elif kod == _MULRK:
+                rad, forsta_kol = _CELL.unpack_from(mem, data)
+                sista_kol, = struct.unpack_from("<H", mem, pos - 2)
+                max_rad, max_kol = max(max_rad, rad), max(max_kol, sista_kol)
+                for nr, kol in enumerate(range(forsta_kol, sista_kol + 1)):
+                    start = data + 4 + 6 * nr + 2
+                    spara(rad, kol, unpack_RK(mem[start:start + 4]))
+            elif kod == _LABEL:
+                rad, kol = _CELL.unpack_from(mem, data)
+                max_rad, max_kol = max(max_rad, rad), max(max_kol, kol)
+                spara(rad, kol, unpack_unicode(mem[data:pos], 6, lenlen=2))
+            elif kod == _BOOLERR:
+                rad, kol, _, varde = struct.unpack_from("<HHHB", mem, data)
+                max_rad, max_kol = max(max_rad, rad), max(max_kol, kol)
+                spara(rad, kol, varde)
+            elif kod in _FORMULA:
+                rad, kol, _, resultat = struct.unpack_from("<HHH8s", mem, data)
+                max_rad, max_kol = max(max_rad, rad), max(max_kol, kol)
+                if resultat[6:8] != b"\xff\xff":
+                    spara(rad, kol, struct.unpack("<d", resultat)[0])
+                elif resultat[0] == 0:
+                    # Textresultatet ligger i nästa STRING-post (efter ev. SHRFMLA/ARRAY)
+                    while pos + 4 <= slut:
+                        kod, langd = _POST.unpack_from(mem, pos)
+                        data, pos = pos + 4, pos + 4 + langd
+                        if kod == _STRING:
+                            spara(rad, kol, unpack_unicode(mem[data:pos], 0, lenlen=2))
+                            break
+                elif resultat[0] in (1, 2):
+                    spara(rad, kol, resultat[2])
+                elif resultat[0] == 3:
+                    spara(rad, kol, "")
+            elif kod in _BOF:
+                # Inbäddat diagram: hoppa fram till dess EOF
+                while pos + 4 <= slut:
+                    kod, langd = _POST.unpack_from(mem, pos)
+                    pos += 4 + langd
+                    if kod == _EOF:
+                        break
+            elif kod == _EOF:
+                break
+
+        return max_rad + 1, max_kol + 1, celler
+    finally:
+        if bok is not None:
+            bok.release_resources()
+        buffert.close()
+
+
+def _las_xlrd(filvag: Path, kolumner: Optional[Iterable[int]], forsta_rad: int, sista_rad: Optional[int]):
+    """Hela bladet via xlrd och ``col_values`` för de valda kolumnerna."""
+    bok = xlrd.open_workbook(str(filvag), on_demand=True)
+    try:
+        blad = bok.sheet_by_index(0)
+        stopp = blad.nrows if sista_rad is None else min(sista_rad, blad.nrows)
+        celler = {}
+        for kol in range(blad.ncols) if kolumner is None else kolumner:
+            if 0 <= kol < blad.ncols and forsta_rad < stopp:
+                celler[kol] = (range(forsta_rad, stopp), blad.col_values(kol, forsta_rad, stopp))
+        return blad.nrows, blad.ncols, celler
+    finally:
+        bok.release_resources()
+
+
+LASARE: Dict[str, Callable] = {"biff": _las_biff, "xlrd": _las_xlrd}
+
+
+def las_blad(
+    filvag: Path,
+    kolumner: Optional[Iterable[int]] = None,
+    forsta_rad: int = 0,
+    sista_rad: Optional[int] = None,
+    utan_tomma_rader: bool = False,
+    lasare: str = STANDARDLASARE,
+) -> pd.DataFrame:
+    """
+    Läs valda kolumner och rader ur första bladet.
+
+    Args:
+        kolumner: Kolumnnummer att läsa (standard: alla). Kolumner utanför bladet hoppas över.
+        forsta_rad, sista_rad: Radintervall [forsta_rad, sista_rad)
+        utan_tomma_rader: Ta bort rader där alla valda celler är tomma
+        lasare: Namn i ``LASARE``
+
+    Returns:
+        Tabell med objektkolumner märkta med kolumnnumret i bladet. Indexet är
+        radnumret i bladet.
+    """
+    if lasare not in LASARE:
+        raise ValueError(f"Okänd läsare '{lasare}', välj bland {sorted(LASARE)}")
+    resultat = LASARE[lasare](filvag, kolumner, forsta_rad, sista_rad)
+    if resultat is None:
+        resultat = _las_xlrd(filvag, kolumner, forsta_rad, sista_rad)
+    nrows, ncols, celler = resultat
+
+    stopp = max(forsta_rad, nrows if sista_rad is None else min(sista_rad, nrows))
+    valda = range(ncols) if kolumner is None else [k for k in kolumner if 0 <= k < ncols]
+    antal = stopp - forsta_rad
+
+    data = {}
+    har_varde = np.zeros(antal, dtype=bool)
+    for kol in valda:
+        varden = np.full(antal, "", dtype=object)
+        if kol in celler:
+            rader, cellvarden = celler[kol]
+            rader = np.asarray(rader, dtype=np.int64) - forsta_rad
+            cellvarden = np.asarray(cellvarden, dtype=object)
+            varden[rader] = cellvarden
+            if utan_tomma_rader:
+                har_varde[rader[cellvarden != ""]] = True
+        data[kol] = varden
+
+    index = pd.RangeIndex(forsta_rad, stopp)
+    tabell = pd.DataFrame(data, index=index, columns=list(valda), dtype=object)
+    if utan_tomma_rader:
+        tabell = tabell[har_varde]
+    return tabell
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Läs valda kolumner ur första bladet i en xls-fil")
+    parser.add_argument("fil", type=Path)
+    parser.add_argument("--kolumner", nargs="+", type=int, default=None)
+    parser.add_argument("--utan-tomma-rader", action="store_true")
+    parser.add_argument("--lasare", choices=sorted(LASARE), default=STANDARDLASARE)
+    args = parser.parse_args()
+
+    tabell = las_blad(args.fil, args.kolumner, utan_tomma_rader=args.utan_tomma_rader, lasare=args.lasare)
+    with pd.option_context("display.max_rows", 40, "display.max_columns", None, "display.width", 250):
+        print(tabell)
@@ -0,0 +1,8 @@
+"""Testerna importerar modulerna i src/ som skripten gör (``from config_paths import ...``)."""
+import sys
+from pathlib import Path
+
+ROT = Path(__file__).resolve().parent.parent
+for mapp in (ROT, ROT / "src"):
+    if str(mapp) not in sys.path:
+        sys.path.insert(0, str(mapp))
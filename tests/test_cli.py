@@ -0,0 +1,35 @@
+"""Bevakningsläget: ett misslyckat bygge ska inte avsluta bevakningen."""
+import argparse
+
+import bevakning
+import cli
+from bevakning import Andring
+
+
+class FalskBevakare:
+    """Ger två ändringar i följd i stället för att läsa mappen."""
+
+    def __init__(self, indata_mapp, intervall, lugn):
+        pass
+
+    def andringar(self):
+        yield Andring.mellan(None, (("a.xlsx", 1, 1.0),))
+        yield Andring.mellan((("a.xlsx", 1, 1.0),), (("a.xlsx", 2, 2.0),))
+
+
+def test_watch_fortsatter_efter_misslyckat_bygge(monkeypatch, capsys):
+    byggen = []
+
+    def kommando_all(args):
+        byggen.append(len(byggen))
+        if len(byggen) == 1:
+            raise ValueError("trasig export")
+        return 0
+
+    monkeypatch.setattr(bevakning, "Bevakare", FalskBevakare)
+    monkeypatch.setattr(cli, "kommando_all", kommando_all)
+    args = argparse.Namespace(lasar="2025-2026", intervall=2.0, lugn=10.0, utan_matning=True)
+
+    assert cli.kommando_watch(args) == 0
+    assert byggen == [0, 1]
+    assert "trasig export" in capsys.readouterr().out
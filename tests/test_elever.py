@@ -0,0 +1,27 @@
+"""Elevnycklar: sekel ur läsåret och dubbletter utan personnummer."""
+import pandas as pd
+
+from elever import TOM_NYCKEL, elevnycklar, hitta_dubbletter, lasarets_referensar
+
+
+def test_sekel_ur_lasaret():
+    personnr = pd.Series(["250301-1234", "990301-1234", "250301+1234"], dtype=object)
+    assert lasarets_referensar("2025-2026") == 2026
+    assert list(elevnycklar(personnr, lasarets_referensar("2025-2026"))["födelseår"]) == [2025, 1999, 1925]
+    # Ett läsår innan ÅÅ: samma nummer hör till förra seklet
+    assert list(elevnycklar(personnr, lasarets_referensar("2023-2024"))["födelseår"]) == [1925, 1999, 1825]
+
+
+def test_rader_utan_personnummer_ar_inte_dubbletter():
+    df = pd.DataFrame({
+        "personnr": [None, "", " ", "120301-1234", "201203011234", "T123"],
+        "namn": ["A", "B", "C", "D", "D", "E"],
+        "skola": ["S1", "S1", "S2", "S1", "S2", "S1"],
+        "klass": ["7A", "7B", "8A", "7A", "8B", "7A"],
+    })
+    df["elev_id"] = elevnycklar(df["personnr"])["elev_id"]
+
+    assert (df["elev_id"].iloc[:3] == TOM_NYCKEL).all()
+    dubbletter = hitta_dubbletter(df)
+    assert list(dubbletter["namn"]) == ["D"]
+    assert dubbletter["skolor"].iloc[0] == "S1, S2"
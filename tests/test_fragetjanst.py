@@ -0,0 +1,82 @@
+"""Frågetjänsten: samtidiga frågor mot en lokal server och de sparade svarens storlek."""
+import io
+import threading
+from contextlib import redirect_stdout
+from http.client import HTTPConnection
+
+import pytest
+
+import fragetjanst
+from fragetjanst import Fragetjanst, Lage, provadresser, skapa_server
+from syntetiska_rapporter import skapa_syntetiska_rapporter
+from trosklar import las_rensad_data
+
+TRADAR = 8
+VARV = 20
+
+
+@pytest.fixture(scope="module")
+def tjanst(tmp_path_factory) -> Fragetjanst:
+    indata = tmp_path_factory.mktemp("raw")
+    skapa_syntetiska_rapporter(indata, skolor=3, klasser=4, elever=6)
+    tjanst = Fragetjanst(indata, tmp_path_factory.mktemp("cache"), lasar="2025-2026")
+    with redirect_stdout(io.StringIO()):
+        assert tjanst.ladda_om()
+    return tjanst
+
+
+def _rensad_data(tjanst: Fragetjanst):
+    """Den rensade datan som tjänsten läste in (ur cachen)."""
+    with redirect_stdout(io.StringIO()):
+        return las_rensad_data(tjanst.indata_mapp, tjanst.cache_mapp)
+
+
+def test_samtidiga_fragor_ger_samma_svar_som_direkt(tjanst):
+    adresser = provadresser(tjanst.lage) + ["/skolor?x=1", "/trosklar?grans=11&grans=20&per=skola"]
+    # Ett eget läge (utan sparade svar) ger facit
+    facit = Lage(_rensad_data(tjanst), tjanst.lage.signatur, tjanst.lasar)
+    forvantat = {adress: facit.fraga(adress) for adress in adresser}
+
+    server = skapa_server(tjanst, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_address[1]
+    fel = []
+    start = threading.Barrier(TRADAR)
+
+    def klient(nr: int):
+        anslutning = HTTPConnection("127.0.0.1", port, timeout=10)
+        start.wait()
+        try:
+            for i in range(VARV * len(adresser)):
+                adress = adresser[(nr + i) % len(adresser)]
+                anslutning.request("GET", adress)
+                svar = anslutning.getresponse()
+                if (svar.status, svar.read()) != forvantat[adress]:
+                    fel.append(adress)
+        except Exception as e:
+            fel.append(f"{type(e).__name__}: {e}")
+        finally:
+            anslutning.close()
+
+    tradar = [threading.Thread(target=klient, args=(nr,)) for nr in range(TRADAR)]
+    try:
+        for trad in tradar:
+            trad.start()
+        for trad in tradar:
+            trad.join()
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert fel == []
+
+
+def test_sparade_svar_vaxer_inte_med_okanda_parametrar(tjanst, monkeypatch):
+    lage = tjanst.lage
+    for nr in range(50):
+        assert lage.fraga(f"/skolor?x={nr}") == lage.fraga("/skolor")
+    assert sum(1 for nyckel in lage.svar if nyckel[0] == ("skolor",)) == 1
+
+    monkeypatch.setattr(fragetjanst, "MAX_SVAR", 10)
+    for nr in range(50):
+        lage.fraga(f"/trosklar?grans={nr}")
+    assert len(lage.svar) <= 10
@@ -0,0 +1,57 @@
+"""FranvaroDataset: översikter räknas ut vid behov och om när en rapport ändras."""
+import io
+import os
+import random
+from contextlib import redirect_stdout
+
+import pytest
+
+import busavsjo_samla_franvaro
+from franvarodata import FranvaroDataset
+from syntetiska_rapporter import skapa_syntetiska_rapporter, skolrapport_rader, skriv_xls
+
+
+@pytest.fixture
+def data(tmp_path, monkeypatch):
+    skapa_syntetiska_rapporter(tmp_path / "raw", 2, 2, 4, 1)
+
+    # Översikterna ska aldrig behöva exportens råa rader
+    def samla(*args, **kwargs):
+        raise AssertionError("raa_rader lästes")
+
+    monkeypatch.setattr(busavsjo_samla_franvaro, "samla_franvarotabeller", samla)
+    return FranvaroDataset("2025-2026", tmp_path / "raw", tmp_path / "cache")
+
+
+def kommun(data):
+    with redirect_stdout(io.StringIO()):
+        return data.kommun
+
+
+def test_kommun_raknas_ut_en_gang(data):
+    forsta = kommun(data)
+    assert kommun(data) is forsta
+    assert "kommun" in data.utraknat and "raa_rader" not in data.utraknat
+
+
+def test_andrad_fil_raknas_om(data):
+    forsta = kommun(data)
+
+    # Ny ändringstid men samma innehåll: räknas om, samma värden
+    filvag = data.indata_mapp / "Skola 001.xls"
+    mtime = filvag.stat().st_mtime_ns + 10**9
+    os.utime(filvag, ns=(mtime, mtime))
+    assert "kommun" not in data.utraknat
+    efter_touch = kommun(data)
+    assert efter_touch is not forsta
+    assert efter_touch.equals(forsta)
+
+    # Fler elever i Skola 001
+    skriv_xls(skolrapport_rader(1, 2, 7, random.Random(3)), filvag)
+    andrad = kommun(data)
+    assert andrad["Elevantal"].sum() == forsta["Elevantal"].sum() + 2 * 3
+
+    # En skola tillkommer
+    skriv_xls(skolrapport_rader(2, 2, 5, random.Random(4)), data.indata_mapp / "Skola 002.xls")
+    assert kommun(data)["Elevantal"].sum() == andrad["Elevantal"].sum() + 2 * 5
+    assert "raa_rader" not in data.utraknat
@@ -0,0 +1,110 @@
+"""
+Dagens resultat jämfört med baslinjens på syntetiska skolrapporter.
+
+``golden/syntetisk_4x8x15_s0.json`` har hashar av franvaro.xls och varje blad i
+rapporten när de ursprungliga skripten (steg 1 + ``skript works.py``, före
+pipelinen, cachen och det kompakta formatet) kördes på samma syntetiska
+rapporter. Varje väg som skriver rapporten ska ge exakt samma celler, med typer.
+"""
+import hashlib
+import io
+import json
+from contextlib import redirect_stdout
+from pathlib import Path
+
+import pytest
+import xlrd
+from openpyxl import load_workbook
+
+from analys import rensa_franvaro
+from busavsjo_samla_franvaro import busavsjo_samla_franvarorapporter, hitta_rapportfiler, samla_franvarotabeller
+from pipeline import kor_pipeline
+from rapport import RAPPORT_FILNAMN, skapa_rapport
+from strommande import kor_strommande
+from syntetiska_rapporter import skapa_syntetiska_rapporter
+from tolkning import tolka_franvaro
+from xlslasare import las_blad
+
+STORLEK = {"skolor": 4, "klasser": 8, "elever": 15, "fro": 0}
+GOLDEN = Path(__file__).parent / "golden" / "syntetisk_4x8x15_s0.json"
+
+
+def hash_rader(rader) -> str:
+    """
+    Hash av cellvärden inklusive typ (33700 och '33700.0' ska skilja sig).
+
+    Tomma celler sist i en rad räknas inte: openpyxl fyller ut raderna till bladets
+    dimension, som bara finns i arbetsböcker som inte skrivits strömmande.
+    """
+    h = hashlib.sha256()
+    for rad in rader:
+        rad = list(rad)
+        while rad and rad[-1] is None:
+            rad.pop()
+        h.update(repr(tuple(rad)).encode("utf-8"))
+    return h.hexdigest()
+
+
+def xls_avtryck(filvag: Path) -> str:
+    sheet = xlrd.open_workbook(str(filvag)).sheet_by_index(0)
+    return hash_rader(sheet.row_values(i) for i in range(sheet.nrows))
+
+
+def rapport_avtryck(filvag: Path) -> dict:
+    """Hash per blad i rapporten, i bladens ordning."""
+    wb = load_workbook(filvag, read_only=True)
+    avtryck = {ws.title: hash_rader(ws.iter_rows(values_only=True)) for ws in wb.worksheets}
+    wb.close()
+    return avtryck
+
+
+@pytest.fixture(scope="module")
+def golden() -> dict:
+    return json.loads(GOLDEN.read_text(encoding="utf-8"))
+
+
+@pytest.fixture(scope="module")
+def indata(tmp_path_factory) -> Path:
+    mapp = tmp_path_factory.mktemp("raw")
+    skapa_syntetiska_rapporter(mapp, **STORLEK)
+    return mapp
+
+
+def test_steg_1_och_2(indata, tmp_path, golden):
+    with redirect_stdout(io.StringIO()):
+        busavsjo_samla_franvarorapporter(indata_mapp=indata, output_mapp=tmp_path)
+        df = rensa_franvaro(tolka_franvaro(las_blad(tmp_path / "franvaro.xls", utan_tomma_rader=True)))
+        skapa_rapport(df, tmp_path / RAPPORT_FILNAMN)
+    assert xls_avtryck(tmp_path / "franvaro.xls") == golden["franvaro.xls"]
+    assert rapport_avtryck(tmp_path / RAPPORT_FILNAMN) == golden[RAPPORT_FILNAMN]
+
+
+def test_steg_1_parallellt(indata, tmp_path, golden):
+    # Processpoolen ska ge samma tabell och samma franvaro.xls som en seriell körning
+    filer = hitta_rapportfiler(indata)
+    seriell, _ = samla_franvarotabeller(filer)
+    parallell, _ = samla_franvarotabeller(filer, parallellt=True, max_workers=2)
+    assert parallell.equals(seriell)
+
+    with redirect_stdout(io.StringIO()):
+        busavsjo_samla_franvarorapporter(indata_mapp=indata, output_mapp=tmp_path / "seriell")
+        busavsjo_samla_franvarorapporter(
+            indata_mapp=indata, output_mapp=tmp_path / "parallell", parallellt=True, max_workers=2
+        )
+    avtryck = xls_avtryck(tmp_path / "parallell" / "franvaro.xls")
+    assert avtryck == xls_avtryck(tmp_path / "seriell" / "franvaro.xls")
+    assert avtryck == golden["franvaro.xls"]
+
+
+def test_pipeline(indata, tmp_path, golden):
+    with redirect_stdout(io.StringIO()):
+        kor_pipeline(indata, tmp_path, cache_mapp=tmp_path / "cache")
+        # Andra körningen tar allt ur cachen
+        kor_pipeline(indata, tmp_path, cache_mapp=tmp_path / "cache")
+    assert rapport_avtryck(tmp_path / RAPPORT_FILNAMN) == golden[RAPPORT_FILNAMN]
+
+
+def test_strommande(indata, tmp_path, golden):
+    with redirect_stdout(io.StringIO()):
+        kor_strommande(indata, tmp_path, anvand_cache=False)
+    assert rapport_avtryck(tmp_path / RAPPORT_FILNAMN) == golden[RAPPORT_FILNAMN]
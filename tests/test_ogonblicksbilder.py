@@ -0,0 +1,49 @@
+"""Ögonblicksbilder: omskrivning vid ändrat innehåll och förändringar mellan två bilder."""
+from datetime import date
+
+import pandas as pd
+
+from ogonblicksbilder import OgonblicksLager
+
+LASAR = "2025-2026"
+
+
+def _bild(rader) -> pd.DataFrame:
+    """Minimal ögonblicksbild: (elev_id, namn, närvaro_pct, ogiltig_frånvaro_pct) per elev."""
+    df = pd.DataFrame(rader, columns=["elev_id", "namn", "närvaro_pct", "ogiltig_frånvaro_pct"])
+    df["personnr"] = df["elev_id"].astype(str)
+    df["skola"] = "Alpha"
+    df["klass"] = "1A"
+    df["årskurs"] = "Åk 1"
+    return df.astype({"närvaro_pct": "float32", "ogiltig_frånvaro_pct": "float32"})
+
+
+def test_samma_datum_skrivs_om_bara_vid_andrat_innehall(tmp_path):
+    lager = OgonblicksLager(tmp_path)
+    forsta = _bild([(1, "Ada", 97, 0)])
+    assert lager.spara(forsta, LASAR, date(2026, 3, 2)) is not None
+    assert lager.spara(forsta, LASAR, date(2026, 3, 2)) is None
+
+    komplett = _bild([(1, "Ada", 97, 0), (2, "Bo", 90, 2)])
+    assert lager.spara(komplett, LASAR, date(2026, 3, 2)) is not None
+    assert len(lager.las(LASAR, date(2026, 3, 2))) == 2
+
+
+def test_forandringar_med_nya_och_borttagna_elever(tmp_path):
+    lager = OgonblicksLager(tmp_path)
+    lager.spara(_bild([(1, "Ada", 97, 3), (2, "Bo", 80, 2), (3, "Cy", 95, 0)]), LASAR, date(2026, 3, 2))
+    # Ada: total upp men ogiltig ned; Bo försvinner; Dan är ny över 11 %
+    lager.spara(_bild([(1, "Ada", 80, 0), (3, "Cy", 95, 0), (4, "Dan", 70, 12)]), LASAR, date(2026, 3, 9))
+    lager.spara(_bild([(1, "Ada", 80, 0), (3, "Cy", 95, 0), (4, "Dan", 70, 12)]), LASAR, date(2026, 3, 9))
+
+    df = lager.forandringar(LASAR).set_index("namn")
+    assert sorted(df.index) == ["Ada", "Bo", "Dan"]
+    assert df.loc["Ada", "status"] == "kvar"
+    assert df.loc["Ada", "riktning_total"] == "upp"
+    assert df.loc["Ada", "riktning_ogiltig"] == "ned"
+    assert df.loc["Bo", "status"] == "borttagen"
+    assert df.loc["Dan", "status"] == "ny"
+    assert df.loc["Dan", "riktning_total"] == ""
+
+    okning = lager.forandringar(LASAR, bara_okning=True)
+    assert sorted(okning["namn"]) == ["Ada", "Dan"]
@@ -0,0 +1,75 @@
+"""Parquetexporten läst tillbaka: samma rader och typer som tabellen i minnet."""
+import io
+from contextlib import redirect_stdout
+from urllib.parse import quote
+
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+import parquetexport
+from parquetexport import DELNAMN, ELEVMAPP, EXPORTMAPP, exportera, las_arrow, las_elever
+from pipeline import bearbeta_skolrapport
+from schema import sla_ihop
+from syntetiska_rapporter import skapa_syntetiska_rapporter
+
+SKOLOR = ["Rörvik", "Skola 001", "Skola 002"]
+
+
+@pytest.fixture(scope="module")
+def elever(tmp_path_factory):
+    filer = skapa_syntetiska_rapporter(tmp_path_factory.mktemp("raw"), len(SKOLOR), 3, 5, 4)
+    with redirect_stdout(io.StringIO()):
+        return sla_ihop([bearbeta_skolrapport(filvag) for filvag in filer])
+
+
+def sorterad(df: pd.DataFrame) -> pd.DataFrame:
+    return df.sort_values(["skola", "elev_id"]).reset_index(drop=True)
+
+
+def test_samma_rader_och_typer(elever, tmp_path):
+    exportera(elever, tmp_path, arrow=True)
+
+    for skola in SKOLOR:
+        tillbaka = las_elever(tmp_path, skola=skola)
+        # Kategorier, float32 och nullbara heltal (födelseår Int16) överlever rundturen
+        assert tillbaka.dtypes.to_dict() == elever.dtypes.to_dict()
+        assert str(tillbaka["födelseår"].dtype) == "Int16"
+        # En partition har bara sina egna värden bland kategorierna, därav check_categorical=False
+        forvantat = elever[elever["skola"] == skola].reset_index(drop=True)
+        pd.testing.assert_frame_equal(tillbaka, forvantat, check_categorical=False)
+
+    pd.testing.assert_frame_equal(sorterad(las_elever(tmp_path)), sorterad(elever), check_categorical=False)
+    pd.testing.assert_frame_equal(las_arrow(tmp_path).to_pandas(), elever.reset_index(drop=True))
+
+
+def test_hive_partitioner(elever, tmp_path):
+    mapp = exportera(elever, tmp_path) / ELEVMAPP
+    assert sorted(p.name for p in mapp.iterdir()) == sorted(f"skola={quote(s)}" for s in SKOLOR)
+    for skola in SKOLOR:
+        delar = list((mapp / f"skola={quote(skola)}").iterdir())
+        assert [p.name for p in delar] == [DELNAMN.format(i=0)]
+        # Skolan finns bara i mappnamnet, inte som kolumn i filen
+        assert "skola" not in pq.read_schema(delar[0]).names
+        assert pq.read_metadata(delar[0]).num_rows == (elever["skola"] == skola).sum()
+
+
+def test_byte_av_mapp(elever, tmp_path, monkeypatch):
+    exportera(elever, tmp_path)
+    forra = sorterad(las_elever(tmp_path))
+
+    # Skrivningen avbryts: den gamla exporten ligger kvar orörd
+    def avbryt(df, mapp):
+        raise OSError("disken full")
+
+    monkeypatch.setattr(parquetexport, "_skriv_partitionerad", avbryt)
+    with pytest.raises(OSError):
+        exportera(elever[elever["skola"] != "Skola 002"], tmp_path)
+    monkeypatch.undo()
+    pd.testing.assert_frame_equal(sorterad(las_elever(tmp_path)), forra)
+
+    # En skola försvinner: dess partition tas bort och inga tillfälliga mappar blir kvar
+    exportera(elever[elever["skola"] != "Skola 002"], tmp_path)
+    assert sorted(p.name for p in tmp_path.iterdir()) == [EXPORTMAPP]
+    assert not (tmp_path / EXPORTMAPP / ELEVMAPP / f"skola={quote('Skola 002')}").exists()
+    assert sorted(las_elever(tmp_path)["skola"].astype(str).unique()) == ["Rörvik", "Skola 001"]
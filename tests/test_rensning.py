@@ -0,0 +1,67 @@
+"""Rensad elevlista jämfört med logiken i det gamla ``skript rensa fil.py``."""
+import pandas as pd
+import pytest
+import xlwt
+
+from rensning import las_export
+
+
+def gamla_skriptet(filvag) -> pd.DataFrame:
+    """Stegen ur det gamla skriptet (före rensning.py), utan formateringen."""
+    df = pd.read_excel(filvag, header=None)
+    df = df.iloc[7:].reset_index(drop=True)
+    mask = df[1].astype(str).str.startswith(("Namn", "Klass"))
+    df = df[~mask].reset_index(drop=True)
+    df.drop(df.columns[3:8], axis=1, inplace=True, errors='ignore')
+    df.drop(df.columns[0], axis=1, inplace=True, errors='ignore')
+    for col in df.columns:
+        if df[col].astype(str).str.contains('\t').any():
+            expanded = df[col].astype(str).str.split('\t', expand=True)
+            df = pd.concat([df.drop(columns=[col]), expanded], axis=1)
+    return df
+
+
+def normalisera(varde):
+    """Det gamla skriptet skrev saknade värden i delade kolumner som "nan"."""
+    return None if pd.isna(varde) or varde in ("", "nan") else varde
+
+
+@pytest.fixture
+def export(tmp_path):
+    """En export med 13 kolumner (två efter K) och tabbar i namn och kolumn L."""
+    filvag = tmp_path / "Skola.xls"
+    wb = xlwt.Workbook()
+    ws = wb.add_sheet("Blad1")
+    ws.write(0, 5, "Utskriftsdatum: 2026-03-02 08:00:00")
+    rad = 7
+    for klass in ["7A", "7B"]:
+        ws.write(rad, 1, f"Klass: {klass}")
+        ws.write(rad + 1, 1, "Namn")
+        rad += 2
+        for nr in range(4):
+            namn = f"Elev {nr}\tAndranamn" if nr == 1 else f"Elev {nr}"
+            celler = [namn, f"1201{nr:02d}-1234", "100", "10", "90", "5", "5",
+                      f"{90 - nr} %", "5 %", f"{5 + nr},0 %", "extra" if nr else "a\tb\tc", f"M{nr}"]
+            for kol, varde in enumerate(celler, start=1):
+                ws.write(rad, kol, varde)
+            rad += 2
+    wb.save(str(filvag))
+    return filvag
+
+
+def test_samma_celler_som_gamla_skriptet(export):
+    ny = las_export(export)
+    gammal = gamla_skriptet(export)
+
+    assert list(ny.columns) == ["Namn", "Namn_2", "Personnr", "N %", "GF %", "F %", "L", "L_2", "L_3", "M"]
+    # Det gamla skriptet lade de delade kolumnerna sist
+    ordning = ["Personnr", "N %", "GF %", "F %", "M", "Namn", "Namn_2", "L", "L_2", "L_3"]
+    assert ny.shape == gammal.shape
+    for (_, ny_rad), (_, gammal_rad) in zip(ny[ordning].iterrows(), gammal.iterrows()):
+        assert [normalisera(v) for v in ny_rad] == [normalisera(v) for v in gammal_rad]
+
+
+@pytest.mark.parametrize("bitstorlek", [1, 3, 5])
+def test_fonster_ger_samma_lista(export, bitstorlek):
+    # Med små fönster har bara en del av fönstren tabbar i namnen och i kolumn L
+    pd.testing.assert_frame_equal(las_export(export, bitstorlek=bitstorlek), las_export(export))
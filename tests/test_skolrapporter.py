@@ -0,0 +1,96 @@
+"""Delad rapport: bara ändrade skolor skrivs om, och flikarna är desamma som i den sammanslagna."""
+import io
+import json
+import os
+from contextlib import redirect_stdout
+
+import pytest
+from openpyxl import load_workbook
+
+from pipeline import bearbeta_skolrapport
+from rapport import bladnamn, skapa_rapport
+from schema import sla_ihop
+from skolrapporter import INDEXFIL, KOMMUN_FILNAMN, SKOLMAPP, skapa_delade_rapporter, skolfilnamn
+from syntetiska_rapporter import skapa_syntetiska_rapporter
+
+SKOLOR = ["Rörvik", "Skola 001", "Skola 002"]
+GAMMAL_MTIME = 1_000_000_000_000_000_000
+
+
+@pytest.fixture(scope="module")
+def elever(tmp_path_factory):
+    filer = skapa_syntetiska_rapporter(tmp_path_factory.mktemp("raw"), len(SKOLOR), 3, 6, 2)
+    with redirect_stdout(io.StringIO()):
+        return sla_ihop([bearbeta_skolrapport(filvag) for filvag in filer])
+
+
+def arbetsbocker(output_mapp):
+    """{nyckel i index.json: sökväg} för kommunen och skolorna."""
+    bocker = {KOMMUN_FILNAMN: output_mapp / KOMMUN_FILNAMN}
+    bocker.update({f"{SKOLMAPP}/{skolfilnamn(s)}": output_mapp / SKOLMAPP / skolfilnamn(s) for s in SKOLOR})
+    return bocker
+
+
+def aldra(bocker):
+    """Sätt en gammal mtime, så att en omskriven fil syns oavsett filsystemets upplösning."""
+    for filvag in bocker.values():
+        if filvag.exists():
+            os.utime(filvag, ns=(GAMMAL_MTIME, GAMMAL_MTIME))
+
+
+def omskrivna(bocker):
+    return {
+        nyckel for nyckel, filvag in bocker.items()
+        if filvag.exists() and filvag.stat().st_mtime_ns != GAMMAL_MTIME
+    }
+
+
+def blad(filvag):
+    wb = load_workbook(filvag, read_only=True)
+    innehall = {ws.title: list(ws.iter_rows(values_only=True)) for ws in wb.worksheets}
+    wb.close()
+    return innehall
+
+
+def test_bara_andrade_skolor_skrivs_om(elever, tmp_path):
+    bocker = arbetsbocker(tmp_path)
+    assert skapa_delade_rapporter(elever, tmp_path, max_workers=1) == (4, 0)
+    index = json.loads((tmp_path / SKOLMAPP / INDEXFIL).read_text(encoding="utf-8"))
+    assert set(index) == set(bocker)
+
+    # Oförändrade rader: inget skrivs om
+    aldra(bocker)
+    assert skapa_delade_rapporter(elever, tmp_path, max_workers=1) == (0, 4)
+    assert omskrivna(bocker) == set()
+
+    # En elev i Skola 001 ändras: skolans och kommunens arbetsböcker skrivs om
+    andrad = elever.copy()
+    andrad.loc[andrad.index[andrad["skola"] == "Skola 001"][0], "namn"] = "Ändrad Elev"
+    assert skapa_delade_rapporter(andrad, tmp_path, max_workers=1) == (2, 2)
+    assert omskrivna(bocker) == {KOMMUN_FILNAMN, f"{SKOLMAPP}/{skolfilnamn('Skola 001')}"}
+    nytt_index = json.loads((tmp_path / SKOLMAPP / INDEXFIL).read_text(encoding="utf-8"))
+    assert {k for k in index if index[k] != nytt_index[k]} == omskrivna(bocker)
+
+    # Skola 002 försvinner: dess arbetsbok och indexpost tas bort
+    aldra(bocker)
+    utan = andrad[andrad["skola"] != "Skola 002"]
+    assert skapa_delade_rapporter(utan, tmp_path, max_workers=1) == (1, 2)
+    assert not bocker[f"{SKOLMAPP}/{skolfilnamn('Skola 002')}"].exists()
+    assert omskrivna(bocker) == {KOMMUN_FILNAMN}
+    index = json.loads((tmp_path / SKOLMAPP / INDEXFIL).read_text(encoding="utf-8"))
+    assert set(index) == set(bocker) - {f"{SKOLMAPP}/{skolfilnamn('Skola 002')}"}
+
+
+def test_samma_flikar_som_sammanslagna_rapporten(elever, tmp_path):
+    with redirect_stdout(io.StringIO()):
+        skapa_rapport(elever, tmp_path / "rapport.xlsx")
+        skapa_delade_rapporter(elever, tmp_path, max_workers=2)
+    sammanslagen = blad(tmp_path / "rapport.xlsx")
+
+    for skola, filvag in [(None, tmp_path / KOMMUN_FILNAMN)] + [
+        (s, tmp_path / SKOLMAPP / skolfilnamn(s)) for s in SKOLOR
+    ]:
+        delrapport = blad(filvag)
+        assert list(delrapport) == list(bladnamn(skola))
+        for namn, rader in delrapport.items():
+            assert rader == sammanslagen[namn], namn
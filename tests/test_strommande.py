@@ -0,0 +1,41 @@
+"""Mellanfilen och rapporten i det strömmande bygget."""
+import io
+from contextlib import redirect_stdout
+
+import pandas as pd
+import pyarrow.parquet as pq
+from openpyxl import load_workbook
+
+from pipeline import bearbeta_skolrapport
+from rapport import StrommandeRapport
+from schema import RAPPORTKOLUMNER, SCHEMA, sla_ihop, tom_tabell
+from strommande import MELLANSCHEMA, _for_mellanfil, _fran_mellanfil
+from summering import Kub
+from syntetiska_rapporter import skapa_syntetiska_rapporter
+
+
+def test_mellanfil_med_tomma_kolumner_i_forsta_skolan(tmp_path):
+    filer = skapa_syntetiska_rapporter(tmp_path / "raw", 2, 3, 5, 1)
+    with redirect_stdout(io.StringIO()):
+        forsta, andra = (bearbeta_skolrapport(filvag) for filvag in sorted(filer))
+    # Kolumner utan ett enda värde i första skolan: objekt med None, tomma kategorier och NA
+    forsta = forsta.assign(namn=None, gf_pct=pd.Categorical([None] * len(forsta)), födelseår=pd.NA)
+
+    filvag = tmp_path / "mellanfil.parquet"
+    with pq.ParquetWriter(filvag, MELLANSCHEMA) as skrivare:
+        for df in (forsta, andra):
+            skrivare.write_table(_for_mellanfil(df))
+
+    with pq.ParquetFile(filvag) as fil:
+        delar = [_fran_mellanfil(fil.read_row_group(nr)) for nr in range(fil.num_row_groups)]
+    forvantat = [df.astype(SCHEMA).reset_index(drop=True) for df in (forsta, andra)]
+    pd.testing.assert_frame_equal(sla_ihop(delar), sla_ihop(forvantat))
+
+
+def test_rapport_utan_skolor(tmp_path):
+    rapport = StrommandeRapport()
+    rapport.spara([], Kub.fran_tabell(tom_tabell()).summeringar()[0], tmp_path / "rapport.xlsx")
+
+    wb = load_workbook(tmp_path / "rapport.xlsx", read_only=True)
+    assert next(wb.worksheets[0].iter_rows(values_only=True)) == tuple(RAPPORTKOLUMNER)
+    wb.close()
@@ -0,0 +1,87 @@
+"""Histogrammets antal över gränserna jämfört med att räkna ``v > gräns`` för hand."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from trosklar import TroskelHistogram
+
+TROSKLAR = [0, 5, 10.9, 11, 11.1, 20, 88.9, 89, 99.9]
+# Gränsfall: på en gräns, strax över/under den i float32, mitt mellan två fack, 100 % och saknade
+GRANSFALL = [89.0, 88.9, 11.05, 100.0, np.nan, 11.0, 0.0, 89.1]
+
+
+@pytest.fixture(scope="module")
+def elever() -> pd.DataFrame:
+    rng = np.random.default_rng(7)
+    antal = 400
+    narvaro = np.round(rng.uniform(60, 100, antal), 2)
+    ogiltig = np.round(rng.uniform(0, 30, antal), 2)
+    narvaro[:len(GRANSFALL)] = GRANSFALL
+    ogiltig[-len(GRANSFALL):] = GRANSFALL
+    arskurs = rng.choice(["Åk 1", "Åk 2", "Åk 7"], antal).astype(object)
+    arskurs[::37] = None
+    return pd.DataFrame({
+        "skola": pd.Categorical(rng.choice(["Alpha", "Beta", "Rörvik"], antal)),
+        "årskurs": pd.Categorical(arskurs),
+        "närvaro_pct": narvaro.astype(np.float32),
+        "ogiltig_frånvaro_pct": ogiltig.astype(np.float32),
+    })
+
+
+def for_hand(df: pd.DataFrame, matt: str, per: list) -> pd.DataFrame:
+    """
+    ``v > gräns`` per elev, summerat per grupp, på exportens decimalvärden: float32 och
+    ``100 - närvaro`` ger fel långt under 0,0001 (88,9 sparas som 88,900002 och
+    100 - 89,1 blir 10,900002), så värdena avrundas till fyra decimaler före jämförelsen.
+    """
+    varden = 100 - df["närvaro_pct"] if matt == "total" else df["ogiltig_frånvaro_pct"]
+    varden = varden.astype(float).round(4)
+    over = pd.DataFrame({f"> {g:g} %": (varden > g).astype(np.int64) for g in TROSKLAR})
+    over["Elevantal"] = 1
+    if not per:
+        return over.sum().to_frame("Kommun").T
+    if "årskurs" in per:
+        over, df = over[df["årskurs"].notna()], df[df["årskurs"].notna()]
+    return over.groupby([df[kol].astype(str) for kol in per]).sum().sort_index()
+
+
+def lika(histogram: pd.DataFrame, facit: pd.DataFrame):
+    """Samma antal per grupp; gruppnamnen jämförs som text (histogrammet har kategorier)."""
+    def som_text(tabell):
+        namn = [tuple(map(str, v)) if isinstance(v, tuple) else str(v) for v in tabell.index]
+        return tabell.set_axis(pd.Index(namn, dtype=object, tupleize_cols=False))
+    pd.testing.assert_frame_equal(som_text(histogram), som_text(facit), check_dtype=False, check_names=False)
+
+
+@pytest.mark.parametrize("matt", ["total", "ogiltig"])
+@pytest.mark.parametrize("per", [["årskurs"], ["skola"], ["skola", "årskurs"], []])
+def test_som_for_hand(elever, matt, per):
+    histogram = TroskelHistogram.fran_tabell(elever)
+    lika(histogram.antal_over(TROSKLAR, matt=matt, per=per), for_hand(elever, matt, per))
+
+
+@pytest.mark.parametrize("matt", ["total", "ogiltig"])
+def test_gallrade_och_hopslagna(elever, matt):
+    hela = TroskelHistogram.fran_tabell(elever).antal_over(TROSKLAR, matt=matt, per=["skola", "årskurs"])
+    skolor = [TroskelHistogram.fran_tabell(df) for _, df in elever.groupby("skola", observed=True)]
+
+    gallrade = TroskelHistogram.sla_ihop([h.gallra(TROSKLAR) for h in skolor])
+    assert gallrade.over[matt].shape[1] == len(TROSKLAR)
+    pd.testing.assert_frame_equal(gallrade.antal_over(TROSKLAR, matt=matt, per=["skola", "årskurs"]), hela)
+    pd.testing.assert_frame_equal(
+        TroskelHistogram.sla_ihop(skolor).antal_over(TROSKLAR, matt=matt, per=["skola", "årskurs"]), hela
+    )
+    with pytest.raises(ValueError):
+        gallrade.antal_over([12], matt=matt)
+
+
+def test_upplosning_en_tiotusendels_procentenhet():
+    # Facket avrundas till 0,0001 procentenheter, så 11,00001 räknas inte som > 11
+    df = pd.DataFrame({
+        "skola": pd.Categorical(["Alpha"] * 2),
+        "årskurs": pd.Categorical(["Åk 1"] * 2),
+        "närvaro_pct": np.array([50, 50], dtype=np.float32),
+        "ogiltig_frånvaro_pct": np.array([11.00001, 11.001], dtype=np.float32),
+    })
+    antal = TroskelHistogram.fran_tabell(df).antal_over([11], matt="ogiltig", per=[])
+    assert antal["> 11 %"].iloc[0] == 1
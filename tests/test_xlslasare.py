@@ -0,0 +1,101 @@
+"""
+``las_blad`` med läsaren "biff" jämfört med xlrd:s publika ``row_values``.
+
+Läsaren tolkar bladets cellposter själv och hämtar bufferten, bladets position
+och de delade strängarna ur xlrd:s interna tillstånd. Testerna fångar en
+xlrd-version eller en filvariant där det inte längre stämmer.
+"""
+import io
+from contextlib import redirect_stdout
+
+import pandas as pd
+import pytest
+import xlrd
+import xlwt
+
+import xlslasare
+from busavsjo_samla_franvaro import busavsjo_samla_franvarorapporter
+from syntetiska_rapporter import skapa_syntetiska_rapporter
+from xlslasare import las_blad
+
+
+def facit(filvag, kolumner=None, forsta_rad=0, sista_rad=None, utan_tomma_rader=False) -> pd.DataFrame:
+    """Samma urval som las_blad, byggt med ``row_values`` rad för rad."""
+    blad = xlrd.open_workbook(str(filvag)).sheet_by_index(0)
+    stopp = blad.nrows if sista_rad is None else min(sista_rad, blad.nrows)
+    valda = range(blad.ncols) if kolumner is None else [k for k in kolumner if 0 <= k < blad.ncols]
+    rader = {nr: blad.row_values(nr) for nr in range(forsta_rad, stopp)}
+    data = {kol: [rad[kol] if kol < len(rad) else "" for rad in rader.values()] for kol in valda}
+    tabell = pd.DataFrame(data, index=pd.RangeIndex(forsta_rad, max(forsta_rad, stopp)),
+                          columns=list(valda), dtype=object)
+    if utan_tomma_rader:
+        tabell = tabell[(tabell != "").any(axis=1)]
+    return tabell
+
+
+def lika(a: pd.DataFrame, b: pd.DataFrame):
+    """Samma celler med samma Python-typ (1.0 och "1.0" ska skilja sig)."""
+    pd.testing.assert_frame_equal(a, b)
+    for kol in a.columns:
+        assert [type(v) for v in a[kol]] == [type(v) for v in b[kol]], kol
+
+
+@pytest.fixture(scope="module")
+def blandad_xls(tmp_path_factory):
+    """Ett blad med alla posttyper xlwt skriver: text, tal, heltal, bool, formler, tomma celler med format."""
+    filvag = tmp_path_factory.mktemp("xls") / "blandad.xls"
+    wb = xlwt.Workbook()
+    ws = wb.add_sheet("Blad1")
+    ram = xlwt.easyxf("borders: left thin")
+    ws.write(0, 0, "Rubrik")
+    ws.write(0, 3, "Åsa Öberg\tklass 7A")
+    for rad in range(1, 40):
+        ws.write(rad, 0, f"text {rad % 7}")            # delade strängar
+        ws.write(rad, 1, rad)                          # heltal (RK)
+        ws.write(rad, 2, rad / 3)                      # flyttal (NUMBER)
+        ws.write(rad, 4, -rad * 1000.25)
+        ws.write(rad, 5, "", ram)                      # tom cell med format (BLANK/MULBLANK)
+        ws.write(rad, 6, "", ram)
+    ws.write(5, 7, True)
+    ws.write(6, 7, False)
+    ws.write(7, 8, xlwt.Formula("B2+C2"))
+    ws.write(8, 8, xlwt.Formula('"a"&"b"'))
+    ws.write(45, 9, "sista raden")                     # tomma rader 40-44
+    wb.save(str(filvag))
+    return filvag
+
+
+@pytest.fixture(scope="module")
+def exporter(tmp_path_factory):
+    """Syntetiska skolexporter och franvaro.xls som steg 1 skriver av dem."""
+    mapp = tmp_path_factory.mktemp("exporter")
+    skapa_syntetiska_rapporter(mapp / "raw", 2, 4, 10, 3)
+    with redirect_stdout(io.StringIO()):
+        busavsjo_samla_franvarorapporter(indata_mapp=mapp / "raw", output_mapp=mapp)
+    return sorted((mapp / "raw").glob("*.xls")) + [mapp / "franvaro.xls"]
+
+
+@pytest.mark.parametrize("urval", [
+    {},
+    {"kolumner": [1, 2, 8, 9, 10]},
+    {"kolumner": [0, 3, 7, 8, 99], "forsta_rad": 2, "sista_rad": 30},
+    {"utan_tomma_rader": True},
+    {"kolumner": [9], "utan_tomma_rader": True},
+])
+def test_blandad_fil(blandad_xls, urval):
+    lika(las_blad(blandad_xls, lasare="biff", **urval), facit(blandad_xls, **urval))
+
+
+@pytest.mark.parametrize("urval", [{}, {"kolumner": [1, 2, 8, 9, 10], "utan_tomma_rader": True}])
+def test_exporter(exporter, urval):
+    for filvag in exporter:
+        lika(las_blad(filvag, lasare="biff", **urval), facit(filvag, **urval))
+
+
+def test_annan_xlrd_version_laser_med_xlrd(blandad_xls, monkeypatch):
+    monkeypatch.setattr(xlrd, "__VERSION__", "9.9.9")
+    monkeypatch.setattr(xlslasare, "_varnat_for_version", False)
+    with redirect_stdout(io.StringIO()) as utskrift:
+        tabell = las_blad(blandad_xls, lasare="biff")
+    assert "xlrd 9.9.9" in utskrift.getvalue()
+    lika(tabell, facit(blandad_xls))